@@ -0,0 +1,78 @@
+"""
+Benchmark the Python API against shelling out to wfctl and parsing its JSON.
+
+Both sides list every view and read each app-id. Memory is what the caller
+holds on to afterwards: the re-parsed dicts for the CLI, the record list
+(the views the connection read, plus one slot per record) for the API.
+
+    PYTHONPATH=. python benchmarks/bench_api.py [--views 1000] [-n 20]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from wfctl.api import Client
+from wfctl.mockserver import MockWayfireServer, MockWayfireState
+
+
+def held(build):
+    """Return (result, bytes still allocated by build once it returns), leaving out the mock server."""
+    tracemalloc.start(25)
+    result = build()
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, "*/mockserver.py", all_frames=True)]
+    )
+    tracemalloc.stop()
+    return result, sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wfctl Python API benchmark")
+    parser.add_argument("--views", type=int, default=1000)
+    parser.add_argument("-n", type=int, default=20, help="iterations")
+    args = parser.parse_args()
+
+    server = MockWayfireServer(MockWayfireState(views=args.views)).start()
+    env = dict(os.environ, WAYFIRE_SOCKET=server.socket_path, WFCTL_NO_DAEMON="1", WFCTL_CACHE="off")
+    command = [sys.executable, "-m", "wfctl.main", "list", "views", "--format", "compact"]
+
+    def shell_out():
+        out = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        views = json.loads(out)
+        return [view["app-id"] for view in views], views
+
+    client = Client(server.socket_path)
+
+    def in_process():
+        views = client.views()
+        return [view.app_id for view in views], views
+
+    start = time.perf_counter()
+    for _ in range(args.n):
+        shell_out()
+    cli = (time.perf_counter() - start) / args.n
+
+    start = time.perf_counter()
+    for _ in range(args.n):
+        in_process()
+    api = (time.perf_counter() - start) / args.n
+
+    _, cli_bytes = held(lambda: shell_out()[1])
+    _, api_bytes = held(lambda: in_process()[1])
+    wrapped, wrapped_bytes = held(lambda: list(client.views()))
+    client.close()
+    server.stop()
+
+    print(f"{args.views} views, mean of {args.n}")
+    print(f"wfctl subprocess + json   {cli * 1000:9.2f} ms  {cli_bytes / 1024:9.1f} KiB held")
+    print(f"Client.views()            {api * 1000:9.2f} ms  {api_bytes / 1024:9.1f} KiB held  ({cli / api:.0f}x)")
+    print(f"  every record wrapped                 {wrapped_bytes / 1024:9.1f} KiB held  "
+          f"({(wrapped_bytes - api_bytes) / max(len(wrapped), 1):.0f} B per record)")
+
+
+if __name__ == "__main__":
+    main()
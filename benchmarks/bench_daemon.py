@@ -0,0 +1,103 @@
+"""
+Compare cold CLI invocations against round-trips through ``wfctl --daemon``.
+
+Runs against the compositor in $WAYFIRE_SOCKET, or the bundled mock server
+when it is unset:
+
+    PYTHONPATH=. python benchmarks/bench_daemon.py -n 50 get focused workspace
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from wfctl.daemon import forward
+from wfctl.mockserver import MockWayfireServer
+
+
+def summarize(label, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(
+        f"{label:<24} min {samples[0] * 1000:8.2f} ms  "
+        f"median {statistics.median(samples) * 1000:8.2f} ms  "
+        f"p95 {p95 * 1000:8.2f} ms"
+    )
+
+
+def time_cli(argv, n, env):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "wfctl.main"] + argv,
+            env=env, stdout=subprocess.DEVNULL, check=False,
+        )
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def time_forward(argv, n):
+    samples = []
+    devnull = open(os.devnull, "w")
+    stdout = sys.stdout
+    try:
+        sys.stdout = devnull
+        for _ in range(n):
+            start = time.perf_counter()
+            forward(argv)
+            samples.append(time.perf_counter() - start)
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+    return samples
+
+
+def wait_for_socket(path, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise RuntimeError("daemon did not start")
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", type=int, default=30, help="iterations per mode")
+    parser.add_argument("command", nargs="*", default=["get", "focused", "workspace"])
+    args = parser.parse_args()
+
+    mock = None
+    if not os.getenv("WAYFIRE_SOCKET"):
+        mock = MockWayfireServer().start()
+        os.environ["WAYFIRE_SOCKET"] = mock.socket_path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "wfctl-bench.sock")
+        env = dict(os.environ, WFCTL_DAEMON_SOCKET=path)
+
+        cold = time_cli(args.command, args.n, dict(env, WFCTL_NO_DAEMON="1"))
+
+        daemon = subprocess.Popen([sys.executable, "-m", "wfctl.main", "--daemon"], env=env)
+        try:
+            wait_for_socket(path)
+            via_cli = time_cli(args.command, args.n, env)
+            os.environ["WFCTL_DAEMON_SOCKET"] = path
+            round_trip = time_forward(args.command, args.n)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+            if mock is not None:
+                mock.stop()
+
+    print(f"command: wfctl {' '.join(args.command)}  ({args.n} iterations)")
+    summarize("cold CLI", cold)
+    summarize("CLI via daemon", via_cli)
+    summarize("daemon round-trip", round_trip)
+
+
+if __name__ == "__main__":
+    main()
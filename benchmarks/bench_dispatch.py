@@ -0,0 +1,56 @@
+"""
+Micro-benchmark command dispatch over the full builtin command table.
+
+Compares the former linear substring scan plus per-call inspect.signature
+against the token-prefix trie used by execute_command.
+
+    PYTHONPATH=. python benchmarks/bench_dispatch.py [-n 20000]
+"""
+import argparse
+import inspect
+import time
+
+from wfctl.dispatch import commands
+from wfctl.ipc import command_map
+
+
+def linear_dispatch(command):
+    cmd = [cmd for cmd in command_map if cmd in command]
+    if cmd:
+        func = command_map[cmd[0]]
+        return func, len(inspect.signature(func).parameters) > 0
+    return None
+
+
+def trie_dispatch(command):
+    return commands.match(command)
+
+
+def bench(func, lines, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        for line in lines:
+            func(line)
+    return (time.perf_counter() - start) / (n * len(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wfctl dispatch micro-benchmark")
+    parser.add_argument("-n", type=int, default=20000, help="passes over the command table")
+    args = parser.parse_args()
+
+    # Every builtin command with typical trailing arguments, plus a miss.
+    lines = [f"{name} 42 100 200" for name in command_map] + ["no such command 1"]
+
+    for name in command_map:
+        assert trie_dispatch(f"{name} 42 100 200")[0] == name, name
+
+    linear = bench(linear_dispatch, lines, args.n)
+    trie = bench(trie_dispatch, lines, args.n)
+    print(f"{len(lines)} command lines, {args.n} passes")
+    print(f"linear scan + inspect  {linear * 1e6:8.3f} us/dispatch")
+    print(f"token trie             {trie * 1e6:8.3f} us/dispatch  ({linear / trie:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+End-to-end benchmark of every wfctl command against the bundled mock server.
+
+For each scale, a mock compositor with that many views is started and each
+command_map entry is executed in-process over a warm connection. View
+filtering, search and event throughput of the watch path are timed too.
+
+    PYTHONPATH=. python benchmarks/bench_e2e.py [--scales 10,1000,10000] [-n 10]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from wayfire import WayfireSocket
+
+from wfctl import connection
+from wfctl.ipc import capture_command, command_map
+from wfctl.mockserver import DEFAULT_PLUGINS, MockWayfireServer, MockWayfireState
+from wfctl.monitor import EventStream, socket_events
+
+LAYOUT_FILE = os.path.join(tempfile.gettempdir(), f"wfctl-bench-layout-{os.getpid()}.json")
+
+OPTIONS_FILE = os.path.join(tempfile.gettempdir(), f"wfctl-bench-options-{os.getpid()}.json")
+
+EVENTS_FILE = os.path.join(tempfile.gettempdir(), f"wfctl-bench-events-{os.getpid()}.ndjson")
+
+RULES_FILE = os.path.join(tempfile.gettempdir(), f"wfctl-bench-rules-{os.getpid()}.toml")
+
+# Representative command line for every command_map entry; i is the
+# iteration number and n the number of views, for commands that consume views.
+SAMPLES = {
+    "list views": lambda i, n: "list views",
+    "list outputs": lambda i, n: "list outputs",
+    "search views": lambda i, n: "search views kitty",
+    "set workspace": lambda i, n: f"set workspace {i % 9 + 1}",
+    "get focused output": lambda i, n: "get focused output",
+    "get focused view": lambda i, n: "get focused view",
+    "get focused workspace": lambda i, n: "get focused workspace",
+    "next workspace": lambda i, n: "next workspace",
+    "prev workspace": lambda i, n: "prev workspace",
+    "workspace": lambda i, n: f"workspace {('left', 'right', 'up', 'down')[i % 4]}",
+    "move view to workspace": lambda i, n: f"move view to workspace {i % 9 + 1} {i % n + 1}",
+    "fullscreen view": lambda i, n: "fullscreen view 1 true",
+    "get view": lambda i, n: "get view 1",
+    "resize view": lambda i, n: "resize view 1 640 480",
+    "move view": lambda i, n: f"move view 1 {i} {i}",
+    "move views": lambda i, n: "move views " + " ".join(f"{v}:{i}:{i}" for v in range(1, min(n, 50) + 1)),
+    "resize views": lambda i, n: "resize views " + " ".join(f"{v}:640:480" for v in range(1, min(n, 50) + 1)),
+    "save layout": lambda i, n: f"save layout {LAYOUT_FILE}",
+    "apply": lambda i, n: f"apply {LAYOUT_FILE}",
+    "close view": lambda i, n: f"close view {n - i}",
+    "minimize view": lambda i, n: "minimize view 2 false",
+    "maximize view": lambda i, n: "maximize view 2",
+    "set view alpha": lambda i, n: "set view alpha 1 0.8",
+    "list inputs": lambda i, n: "list inputs",
+    "configure device": lambda i, n: "configure device 1 enable",
+    "get option": lambda i, n: "get option core/plugins",
+    "set option": lambda i, n: "set option core/vwidth=3 core/vheight=3",
+    "dump options": lambda i, n: "dump options core/plugins core/vwidth core/vheight input/xkb_layout",
+    "restore options": lambda i, n: f"restore options {OPTIONS_FILE}",
+    "enable plugin": lambda i, n: "enable plugin expo cube",
+    "disable plugin": lambda i, n: "disable plugin expo cube",
+    "status plugin": lambda i, n: "status plugin expo",
+    "wait": lambda i, n: "wait view-mapped app-id=kitty --timeout 1",
+    "record": lambda i, n: f"record {EVENTS_FILE} --duration 0.01",
+    "replay": lambda i, n: f"replay {EVENTS_FILE} --max --into mirror",
+    # `rules` runs until interrupted, so its matching is timed over the recording.
+    "rules": lambda i, n: f"replay {EVENTS_FILE} --max --into rules --rules {RULES_FILE}",
+}
+
+# Extra scenarios that exercise filtering paths rather than distinct commands.
+SCENARIOS = {
+    "list views (filter)": lambda i, n: "list views firefox",
+}
+
+
+def time_command(make, n_views, iterations):
+    samples = []
+    ok = True
+    for i in range(iterations):
+        command = make(i, n_views)
+        start = time.perf_counter()
+        # record and replay report their statistics on stderr.
+        with contextlib.redirect_stderr(io.StringIO()):
+            _, status = capture_command(command)
+        samples.append(time.perf_counter() - start)
+        ok = ok and status == 0
+    return statistics.median(samples), ok
+
+
+def time_events(socket_path, count):
+    """Time streaming count events through the `wfctl -m` pipeline."""
+    watcher = WayfireSocket(socket_path)
+    watcher.watch()
+    trigger = WayfireSocket(socket_path)
+    stream = EventStream(io.StringIO())
+    events = socket_events(watcher)
+    start = time.perf_counter()
+    trigger.send_json({"method": "mock/emit-events", "data": {"count": count}})
+    for _ in range(count):
+        stream.feed(next(events))
+    stream.close()
+    elapsed = time.perf_counter() - start
+    watcher.close()
+    trigger.close()
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wfctl end-to-end benchmark")
+    parser.add_argument("--scales", default="10,1000,10000", help="comma separated view counts")
+    parser.add_argument("-n", type=int, default=10, help="iterations per command")
+    parser.add_argument("--events", type=int, default=20000, help="events for the watch benchmark")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mock reply delay")
+    args = parser.parse_args()
+
+    with open(OPTIONS_FILE, "w") as f:
+        json.dump({"core/vwidth": "3", "core/plugins": DEFAULT_PLUGINS}, f)
+    with open(RULES_FILE, "w") as f:
+        f.write('[[rule]]\nevent = ["view-mapped", "view-title-changed"]\napp-id = "kitty"\n'
+                'actions = "set view alpha {id} 0.9"\n')
+
+    missing = set(command_map) - set(SAMPLES)
+    if missing:
+        parser.error(f"no sample command for: {', '.join(sorted(missing))}")
+
+    for scale in (int(s) for s in args.scales.split(",")):
+        state = MockWayfireState(views=max(scale, args.n + 2))
+        with MockWayfireServer(state, latency=args.latency_ms / 1000) as server:
+            os.environ["WAYFIRE_SOCKET"] = server.socket_path
+            connection.reset()
+            print(f"\n== {scale} views ==")
+            for name, make in {**SAMPLES, **SCENARIOS}.items():
+                median, ok = time_command(make, len(state.views), args.n)
+                flag = "" if ok else "  (error)"
+                print(f"{name:<24} {median * 1000:9.3f} ms{flag}")
+            rate = time_events(server.socket_path, args.events)
+            print(f"{'watch events':<24} {rate:9.0f} events/s")
+            connection.reset()
+
+    for path in (LAYOUT_FILE, EVENTS_FILE):
+        if os.path.exists(path):
+            os.unlink(path)
+    os.unlink(OPTIONS_FILE)
+    os.unlink(RULES_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark running a command on many Wayfire instances serially versus with --sockets.
+
+Each instance is a mock server with its own socket and reply latency. The
+serial side runs one wfctl process per instance, as a shell loop over the
+seats would; the fan-out side is one `wfctl --sockets` call.
+
+    PYTHONPATH=. python benchmarks/bench_fleet.py [--instances 40] [--latency-ms 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from wfctl.mockserver import MockWayfireServer, MockWayfireState
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wfctl multi-instance benchmark")
+    parser.add_argument("--instances", type=int, default=40)
+    parser.add_argument("--views", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--command", default="list views")
+    args = parser.parse_args()
+
+    runtime_dir = tempfile.mkdtemp(prefix="wfctl-fleet-")
+    servers = [
+        MockWayfireServer(
+            MockWayfireState(views=args.views),
+            socket_path=os.path.join(runtime_dir, f"wayfire-seat{i}.socket"),
+            latency=args.latency_ms / 1000,
+        ).start()
+        for i in range(args.instances)
+    ]
+    env = dict(os.environ, XDG_RUNTIME_DIR=runtime_dir, WFCTL_NO_DAEMON="1", WFCTL_CACHE="off")
+    wfctl = [sys.executable, "-m", "wfctl.main"]
+    command = args.command.split()
+
+    start = time.perf_counter()
+    for server in servers:
+        subprocess.run(wfctl + command, env=dict(env, WAYFIRE_SOCKET=server.socket_path),
+                       capture_output=True, check=True)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    subprocess.run(wfctl + ["--sockets", "wayfire-seat*.socket"] + command, env=env,
+                   capture_output=True, check=True)
+    fanout = time.perf_counter() - start
+
+    for server in servers:
+        server.stop()
+    os.rmdir(runtime_dir)
+
+    print(f"{args.instances} instances, '{args.command}', {args.latency_ms} ms per round-trip")
+    print(f"one wfctl per instance   {serial * 1000:9.1f} ms")
+    print(f"wfctl --sockets          {fanout * 1000:9.1f} ms  ({serial / fanout:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark restoring a layout view by view versus with `wfctl apply`.
+
+The sequential side does what a restore script of single commands does:
+read each view, then move, resize, minimize and set alpha one request at a
+time. apply_layout reads one snapshot and pipelines only the changes.
+
+    PYTHONPATH=. python benchmarks/bench_layout.py [--views 50] [--latency-ms 1]
+"""
+import argparse
+import asyncio
+import time
+
+from wayfire import WayfireSocket
+
+from wfctl.layout import apply_layout, save_layout
+from wfctl.mockserver import MockWayfireServer, MockWayfireState
+
+
+def scramble(state):
+    for view in state.views.values():
+        view["geometry"] = view["base-geometry"] = dict(view["geometry"], x=0, y=0)
+        view["minimized"] = view["id"] % 5 == 0
+        state.alpha[view["id"]] = 0.5
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wfctl layout restore benchmark")
+    parser.add_argument("--views", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    state = MockWayfireState(views=args.views)
+    server = MockWayfireServer(state, latency=args.latency_ms / 1000).start()
+    path = server.socket_path
+    layout = asyncio.run(save_layout(path))
+
+    scramble(state)
+    sock = WayfireSocket(path)
+    start = time.perf_counter()
+    for entry, view_id in zip(layout["views"], state.views):
+        geo = entry["geometry"]
+        sock.get_view(view_id)
+        sock.configure_view(view_id, geo["x"], geo["y"], geo["width"], geo["height"])
+        sock.set_view_minimized(view_id, entry["minimized"])
+        sock.set_view_alpha(view_id, entry["alpha"])
+    sequential = time.perf_counter() - start
+    sock.close()
+
+    scramble(state)
+    start = time.perf_counter()
+    report = asyncio.run(apply_layout(layout, path))
+    applied = time.perf_counter() - start
+    assert not report.get("errors") and not report["unmatched"], report
+
+    start = time.perf_counter()
+    noop = asyncio.run(apply_layout(layout, path))
+    unchanged = time.perf_counter() - start
+    server.stop()
+
+    print(f"{args.views} views, {args.latency_ms} ms per round-trip")
+    print(f"per-view requests       {sequential * 1000:8.2f} ms")
+    print(f"apply (all changed)     {applied * 1000:8.2f} ms  {report['requests']} requests  ({sequential / applied:.1f}x)")
+    print(f"apply (nothing to do)   {unchanged * 1000:8.2f} ms  {noop['requests']} requests")
+
+
+if __name__ == "__main__":
+    main()
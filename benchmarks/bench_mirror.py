@@ -0,0 +1,72 @@
+"""
+Compare state queries answered by the event-driven mirror with IPC round-trips,
+and measure how fast the mirror applies an event storm.
+
+    PYTHONPATH=. python benchmarks/bench_mirror.py [--views 1000] [-n 200]
+"""
+import argparse
+import threading
+import time
+
+from wayfire import WayfireSocket
+
+from wfctl.mirror import StateMirror
+from wfctl.search import ViewIndex, search
+from wfctl.mockserver import MockWayfireServer, MockWayfireState
+
+
+def per_call(func, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wfctl state mirror benchmark")
+    parser.add_argument("--views", type=int, default=1000)
+    parser.add_argument("-n", type=int, default=200, help="queries per measurement")
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    with MockWayfireServer(MockWayfireState(views=args.views)) as server:
+        path = server.socket_path
+        sock = WayfireSocket(path)
+        mirror = StateMirror()
+        applied = threading.Semaphore(0)
+        threading.Thread(
+            target=mirror.run,
+            args=(lambda: WayfireSocket(path),),
+            kwargs={"on_event": lambda event: applied.release()},
+            daemon=True,
+        ).start()
+        mirror.ready.wait()
+
+        print(f"{args.views} views")
+        # The daemon keeps one search index per mirror version.
+        views = mirror.list_views()
+        index = ViewIndex(views)
+        queries = {
+            "get focused view": (sock.get_focused_view, mirror.get_focused_view),
+            "list views": (sock.list_views, mirror.list_views),
+            "search app-id": (
+                lambda: [v for v in sock.list_views() if v["app-id"] == "kitty"],
+                lambda: search(views, "app-id=kitty", index),
+            ),
+        }
+        for name, (ipc, local) in queries.items():
+            n = max(1, args.n // 10) if name != "get focused view" else args.n
+            ipc_time, mirror_time = per_call(ipc, n), per_call(local, args.n)
+            print(f"{name:<18} ipc {ipc_time * 1e6:10.1f} us   mirror {mirror_time * 1e6:8.2f} us")
+
+        start = time.perf_counter()
+        sock.send_json({"method": "mock/emit-events", "data": {"count": args.events}})
+        for _ in range(args.events):
+            applied.acquire()
+        rate = args.events / (time.perf_counter() - start)
+        print(f"{'apply events':<18} {rate:10.0f} events/s (read + decode + apply)")
+        sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark encoding a large `list views` result in each output format.
+
+Compares the old json.dumps(indent=4) string with the streaming encoders,
+and a --fields projection, reporting time and peak memory while writing
+to /dev/null.
+
+    PYTHONPATH=. python benchmarks/bench_output.py [--views 10000]
+"""
+import argparse
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+
+from wfctl.mockserver import MockWayfireState
+from wfctl.output import FORMATS, emit, using
+
+
+def measure(func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    # Tracing slows encoding down a lot, so memory is measured on a second run.
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wfctl output encoder benchmark")
+    parser.add_argument("--views", type=int, default=10000)
+    args = parser.parse_args()
+
+    views = list(MockWayfireState(views=args.views).views.values())
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = [("json.dumps(indent=4)", measure(lambda: print(json.dumps(views, indent=4))))]
+        for fmt in FORMATS:
+            if fmt != "table":
+                results.append((f"--format {fmt}", measure(lambda: emit(views, fmt))))
+        with using("compact", "id,app-id,geometry"):
+            results.append(("--fields id,app-id,geometry", measure(lambda: emit(views))))
+
+    print(f"{args.views} views")
+    for name, (elapsed, peak) in results:
+        print(f"{name:<30} {elapsed * 1000:9.2f} ms  peak {peak / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
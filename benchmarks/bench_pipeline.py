@@ -0,0 +1,52 @@
+"""
+Benchmark rearranging many views sequentially versus pipelined.
+
+The bundled mock server delays every reply by a fixed amount, so the cost
+of each blocking round-trip shows up.
+
+    PYTHONPATH=. python benchmarks/bench_pipeline.py [--views 50] [--latency-ms 1]
+"""
+import argparse
+import asyncio
+import time
+
+from wayfire import WayfireSocket
+
+from wfctl.aio import configure_views
+from wfctl.mockserver import MockWayfireServer, MockWayfireState
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wfctl pipelined IPC benchmark")
+    parser.add_argument("--views", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    state = MockWayfireState(views=args.views)
+    views = state.views
+    server = MockWayfireServer(state, latency=args.latency_ms / 1000).start()
+    path = server.socket_path
+
+    sock = WayfireSocket(path)
+    start = time.perf_counter()
+    for view_id in views:
+        geo = sock.get_view(view_id)["base-geometry"]
+        sock.configure_view(view_id, view_id * 10, view_id * 10, geo["width"], geo["height"])
+    sequential = time.perf_counter() - start
+    sock.close()
+
+    changes = [(view_id, view_id * 20, view_id * 20, None, None) for view_id in views]
+    start = time.perf_counter()
+    errors = asyncio.run(configure_views(changes, path))
+    pipelined = time.perf_counter() - start
+    assert not errors, errors
+    assert all(views[i]["base-geometry"]["x"] == i * 20 for i in views)
+    server.stop()
+
+    print(f"{args.views} views, {args.latency_ms} ms per round-trip")
+    print(f"sequential move view    {sequential * 1000:8.2f} ms")
+    print(f"pipelined move views    {pipelined * 1000:8.2f} ms  ({sequential / pipelined:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
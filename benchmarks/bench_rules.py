@@ -0,0 +1,85 @@
+"""
+Benchmark matching events against a rules file: the compiled dispatch table
+versus testing every rule in turn, as one watcher script per rule does.
+
+Both sides see the same synthetic stream of view events and produce the same
+matches; actions are counted, not run.
+
+    PYTHONPATH=. python benchmarks/bench_rules.py [--rules 50] [--events 200000]
+"""
+import argparse
+import random
+import time
+
+from wfctl.rules import RuleSet, compile_rule
+
+EVENT_TYPES = ["view-mapped", "view-title-changed", "view-geometry-changed", "view-focused", "view-unmapped"]
+
+
+def make_rules(count):
+    rules = []
+    for i in range(count):
+        data = {"event": EVENT_TYPES[i % 2], "app-id": f"app{i}", "actions": "set view alpha {id} 0.9"}
+        if i % 5 == 0:
+            data["match"] = 'title~"Private"'
+        rules.append(compile_rule(i + 1, data))
+    return rules
+
+
+def make_events(count, apps):
+    rng = random.Random(1)
+    return [
+        {
+            "event": rng.choice(EVENT_TYPES),
+            "view": {"id": i, "app-id": f"app{rng.randrange(apps)}", "title": rng.choice(["Private", "Home"])},
+        }
+        for i in range(count)
+    ]
+
+
+def linear(rules, events):
+    matched = 0
+    for event in events:
+        view = event["view"]
+        for rule in rules:
+            if (event["event"] in rule.events and view["app-id"] in rule.app_ids
+                    and (rule.match is None or rule.match(view))):
+                matched += 1
+    return matched
+
+
+def table(ruleset, events):
+    matched = 0
+    for event in events:
+        for _ in ruleset.triggered(event):
+            matched += 1
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wfctl rules matching benchmark")
+    parser.add_argument("--rules", type=int, default=50)
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    rules = make_rules(args.rules)
+    ruleset = RuleSet(rules)
+    # Twice as many app-ids as rules, so half the views are not covered by any rule.
+    events = make_events(args.events, args.rules * 2)
+
+    start = time.perf_counter()
+    expected = linear(rules, events)
+    scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matched = table(ruleset, events)
+    compiled = time.perf_counter() - start
+    assert matched == expected, (matched, expected)
+
+    print(f"{args.rules} rules, {args.events} events, {matched} matches")
+    print(f"every rule per event   {args.events / scan:12.0f} events/s")
+    print(f"dispatch table         {args.events / compiled:12.0f} events/s  ({scan / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark view search: the former recursive find_dicts_with_value scan versus
+compiled queries over a ViewIndex built once per snapshot.
+
+    PYTHONPATH=. python benchmarks/bench_search.py [--views 10000] [-n 50]
+"""
+import argparse
+import time
+
+from wfctl.mockserver import MockWayfireState
+from wfctl.search import ViewIndex, search
+
+
+def find_dicts_with_value(dict_list, value):
+    """The recursive substring scan search views and list views used before."""
+    def contains_value(d, value):
+        for k, v in d.items():
+            if isinstance(v, dict):
+                if contains_value(v, value):
+                    return True
+            elif value in str(v):
+                return True
+        return False
+
+    return [d for d in dict_list if contains_value(d, value)]
+
+
+QUERIES = [
+    "app-id=kitty",
+    "app-id=kitty or app-id=foot",
+    "pid>5000 not app-id=slack",
+    'title~"^gimp window 9"',
+    "geometry.width>=800 minimized=false app-id=mpv",
+]
+
+
+def per_call(func, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wfctl view search benchmark")
+    parser.add_argument("--views", type=int, default=10000)
+    parser.add_argument("-n", type=int, default=50)
+    args = parser.parse_args()
+
+    views = list(MockWayfireState(views=args.views).views.values())
+    one_off = per_call(lambda: search(views, "app-id=kitty"), args.n)
+    start = time.perf_counter()
+    index = ViewIndex(views)
+    index.all_fields()
+    build = time.perf_counter() - start
+
+    print(f"{args.views} views, full index built in {build * 1000:.1f} ms")
+    print(f"{'one-off (fresh index): app-id=kitty':<48} {one_off * 1000:9.3f} ms")
+    scan = per_call(lambda: find_dicts_with_value(views, "kitty"), max(1, args.n // 10))
+    print(f"{'recursive scan: kitty':<48} {scan * 1000:9.3f} ms")
+    print(f"{'indexed: kitty':<48} {per_call(lambda: search(views, 'kitty', index), args.n) * 1000:9.3f} ms")
+    for query in QUERIES:
+        elapsed = per_call(lambda: search(views, query, index), args.n)
+        print(f"{'indexed: ' + query:<48} {elapsed * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
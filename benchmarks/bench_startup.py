@@ -0,0 +1,65 @@
+"""
+Measure wfctl import cost with ``python -X importtime`` and guard against
+heavy modules creeping back into the CLI startup path.
+
+    PYTHONPATH=. python benchmarks/bench_startup.py [--max-ms 60]
+
+Exits with status 1 if a deferred module is imported at startup or if an
+entry point exceeds --max-ms of cumulative import time.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Modules that must only be imported once the command that needs them runs.
+DEFERRED = ("wayfire", "tabulate", "argparse", "inspect", "asyncio", "tempfile", "subprocess")
+
+# Entry points imported on every invocation before dispatch.
+ENTRY_POINTS = ("wfctl.main", "wfctl.ipc")
+
+
+def import_times(module):
+    """Return {module: cumulative microseconds} for a fresh interpreter importing module."""
+    env = dict(os.environ, WAYFIRE_SOCKET="/nonexistent")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wfctl startup import benchmark")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="fail if an entry point takes longer than this to import")
+    args = parser.parse_args()
+
+    failed = False
+    for entry in ENTRY_POINTS:
+        times = import_times(entry)
+        total_ms = times.get(entry, 0) / 1000
+        print(f"{entry:<12} {total_ms:8.2f} ms cumulative import time")
+
+        leaked = sorted(
+            name for name in times
+            if name.split(".")[0] in DEFERRED
+        )
+        if leaked:
+            failed = True
+            print(f"  regression: imported at startup: {', '.join(leaked)}")
+        if args.max_ms is not None and total_ms > args.max_ms:
+            failed = True
+            print(f"  regression: exceeds budget of {args.max_ms} ms")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
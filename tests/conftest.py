@@ -0,0 +1,23 @@
+import pytest
+
+from wfctl.mockserver import MockWayfireServer, MockWayfireState
+
+
+@pytest.fixture
+def state():
+    return MockWayfireState(views=4)
+
+
+@pytest.fixture
+def server(state):
+    with MockWayfireServer(state) as server:
+        yield server
+
+
+@pytest.fixture
+def connected(server):
+    """Point the shared connection and snapshot cache at the mock server."""
+    from wfctl.connection import use_socket
+
+    with use_socket(server.socket_path):
+        yield server
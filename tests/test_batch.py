@@ -0,0 +1,59 @@
+import io
+import json
+
+import pytest
+
+from wfctl.batch import batch_main, run_batch
+
+
+def batch(lines, stop_on_error=False):
+    out = io.StringIO()
+    status = run_batch(lines, out, stop_on_error)
+    return status, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+@pytest.mark.parametrize("lines, status, records", [
+    (["list views --fields id"], 0,
+     [{"line": 1, "ok": True, "result": [{"id": 1}, {"id": 2}, {"id": 3}, {"id": 4}]}]),
+    (["# comment", "", "wfctl get focused view --fields id,app-id"], 0,
+     [{"line": 3, "ok": True, "result": {"id": 1, "app-id": "firefox"}}]),
+    (["get view info 99", "get focused view --fields id"], 1,
+     [{"line": 1, "ok": False, "error": "no such view"}, {"line": 2, "ok": True, "result": {"id": 1}}]),
+    (["bogus command"], 1, [{"line": 1, "ok": False, "error": "Unknown command 'bogus command'"}]),
+    (["list views --fields"], 1, [{"line": 1, "ok": False, "error": "--fields requires a value"}]),
+    (["close view 2", "get view info 2", "list views --fields id"], 1, [
+        {"line": 1, "ok": True, "result": None},
+        {"line": 2, "ok": False, "error": "no such view"},
+        {"line": 3, "ok": True, "result": [{"id": 1}, {"id": 3}, {"id": 4}]},
+    ]),
+])
+def test_records_and_status(connected, lines, status, records):
+    result = batch(lines)
+    assert result[0] == status
+    assert [{key: record[key] for key in expected} for record, expected in zip(result[1], records)] == records
+    assert len(result[1]) == len(records)
+
+
+def test_stop_on_error(connected):
+    status, records = batch(["get view info 99", "list views"], stop_on_error=True)
+    assert status == 1
+    assert [record["line"] for record in records] == [1]
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["--batch"], "Error: --batch requires a file name or '-' for stdin."),
+    (["--batch", "/nonexistent/commands.txt"], "Error: [Errno 2] No such file or directory: '/nonexistent/commands.txt'"),
+])
+def test_main_reports_unreadable_input(capsys, argv, message):
+    assert batch_main(argv) == 1
+    assert capsys.readouterr().out.strip() == message
+
+
+@pytest.mark.parametrize("text, status", [
+    ("get focused view\n# close view 1\n", 0),
+    ("get focused view\nclose view 99\n", 1),
+])
+def test_main_status(connected, tmp_path, text, status):
+    path = tmp_path / "commands.txt"
+    path.write_text(text)
+    assert batch_main(["--batch", str(path), "--stop-on-error"]) == status
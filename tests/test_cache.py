@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+
+import wfctl.cache
+from wfctl.cache import DEFAULT_TTLS, SnapshotCache, create_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(wfctl.cache, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+class Fetch:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [self.calls]
+
+
+@pytest.mark.parametrize("resource, age, fetches", [
+    ("views", 0.0, 1),
+    ("views", 0.49, 1),
+    ("views", 0.5, 2),
+    ("focused_view", 0.3, 2),
+    ("outputs", 4.9, 1),
+    ("inputs", 10.0, 2),
+    ("unknown", 0.0, 2),
+])
+def test_ttl(clock, resource, age, fetches):
+    cache, fetch = SnapshotCache(), Fetch()
+    assert cache.get(resource, fetch) == [1]
+    clock.value += age
+    assert cache.get(resource, fetch) == [fetches]
+    assert fetch.calls == fetches
+
+
+def test_ttls_can_be_overridden(clock):
+    cache, fetch = SnapshotCache(ttls={"views": 0}), Fetch()
+    cache.get("views", fetch)
+    cache.get("views", fetch)
+    cache.get("outputs", fetch)
+    cache.get("outputs", fetch)
+    assert fetch.calls == 3
+
+
+@pytest.mark.parametrize("event, dropped", [
+    ("view-focused", {"views", "focused_view"}),
+    ("view-geometry-changed", {"views", "focused_view"}),
+    ("view-mapped", {"views", "focused_view"}),
+    ("wset-workspace-changed", {"focused_output", "outputs"}),
+    ("output-gain-focus", {"focused_output"}),
+    ("output-removed", {"outputs", "focused_output", "views"}),
+    ("input-device-added", {"inputs"}),
+    ("plugin-activation-state-changed", set()),
+    ("", set()),
+])
+def test_events_invalidate_what_they_change(clock, event, dropped):
+    cache, fetch = SnapshotCache(), Fetch()
+    for resource in DEFAULT_TTLS:
+        cache.get(resource, fetch)
+    cache.invalidate_for_event({"event": event})
+    refetched = set()
+    for resource in DEFAULT_TTLS:
+        calls = fetch.calls
+        cache.get(resource, fetch)
+        if fetch.calls != calls:
+            refetched.add(resource)
+    assert refetched == dropped
+
+
+def test_invalidate(clock):
+    cache, fetch = SnapshotCache(), Fetch()
+    cache.get("views", fetch)
+    cache.get("outputs", fetch)
+    cache.invalidate("views")
+    assert cache.get("views", fetch) == [3]
+    assert cache.get("outputs", fetch) == [2]
+    cache.invalidate()
+    assert cache.get("outputs", fetch) == [4]
+
+
+def test_disk_snapshots_are_shared(clock, tmp_path):
+    first, second, fetch = SnapshotCache(directory=str(tmp_path)), SnapshotCache(directory=str(tmp_path)), Fetch()
+    first.get("outputs", fetch)
+    assert second.get("outputs", fetch) == [1]
+    clock.value += DEFAULT_TTLS["outputs"]
+    assert second.get("outputs", fetch) == [2]
+    second.invalidate("outputs")
+    assert not (tmp_path / "outputs.json").exists()
+    assert SnapshotCache(directory=str(tmp_path)).get("outputs", fetch) == [3]
+
+
+@pytest.mark.parametrize("mode, directory, views_ttl", [
+    (None, None, DEFAULT_TTLS["views"]),
+    ("memory", None, DEFAULT_TTLS["views"]),
+    ("off", None, 0),
+    ("disk", "wfctl-cache-wayfire-1.socket", DEFAULT_TTLS["views"]),
+])
+def test_create_cache_modes(monkeypatch, tmp_path, mode, directory, views_ttl):
+    if mode is None:
+        monkeypatch.delenv("WFCTL_CACHE", raising=False)
+    else:
+        monkeypatch.setenv("WFCTL_CACHE", mode)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    cache = create_cache("/run/user/1000/wayfire-1.socket")
+    assert cache.directory == (directory and str(tmp_path / directory))
+    assert cache.ttls["views"] == views_ttl
@@ -0,0 +1,70 @@
+import pytest
+from wayfire import WayfireSocket
+
+from wfctl.config import ConfigTransaction
+
+
+@pytest.fixture
+def sock(server):
+    sock = WayfireSocket(server.socket_path)
+    methods = sock.methods = []
+    send_json = sock.send_json
+
+    def record(message):
+        methods.append(message["method"])
+        return send_json(message)
+
+    sock.send_json = record
+    yield sock
+    sock.close()
+
+
+def writes(sock):
+    return sock.methods.count("wayfire/set-config-options")
+
+
+@pytest.mark.parametrize("changes, written", [
+    (lambda config: config.enable_plugins("expo", "cube"), {}),
+    (lambda config: config.enable_plugins("zoom", "zoom", "invert"), {"core/plugins": "alpha animate autostart command cube decoration expo grid ipc ipc-rules move place resize scale switcher vswitch wm-actions wobbly zoom invert"}),
+    (lambda config: config.disable_plugins("wobbly", "cube", "nothing"), {"core/plugins": "alpha animate autostart command decoration expo grid ipc ipc-rules move place resize scale switcher vswitch wm-actions"}),
+    (lambda config: (config.enable_plugins("zoom"), config.disable_plugins("zoom")), {}),
+    (lambda config: config.update({"core/vwidth": "4", "core/vheight": "3"}), {"core/vwidth": "4"}),
+    (lambda config: (config.enable_plugins("zoom"), config.set("input/xkb_layout", "de"), config.disable_plugins("zoom")),
+     {"input/xkb_layout": "de"}),
+])
+def test_changes_are_written_once(sock, state, changes, written):
+    with ConfigTransaction(sock) as config:
+        changes(config)
+    assert writes(sock) == (1 if written else 0)
+    assert config.commit() == {}
+    for option, value in written.items():
+        assert state.options[option] == value
+
+
+def test_options_are_read_once(sock):
+    config = ConfigTransaction(sock)
+    config.enable_plugins("zoom")
+    config.disable_plugins("cube")
+    assert config.plugin_status(["zoom", "cube", "expo", "exp"]) == {"zoom": True, "cube": False, "expo": True, "exp": False}
+    assert sock.methods.count("wayfire/get-config-option") == 1
+
+
+def test_failure_inside_the_block_writes_nothing(sock, state):
+    before = dict(state.options)
+    with pytest.raises(RuntimeError):
+        with ConfigTransaction(sock) as config:
+            config.enable_plugins("zoom")
+            config.set("core/vwidth", "5")
+            raise RuntimeError("abort")
+    assert writes(sock) == 0
+    assert state.options == before
+
+
+def test_invalid_option_names_are_rejected_before_writing(sock, state):
+    before = dict(state.options)
+    with pytest.raises(ValueError, match="section/option"):
+        with ConfigTransaction(sock) as config:
+            config.set("core/vwidth", "5")
+            config.set("vheight", "5")
+    assert writes(sock) == 0
+    assert state.options == before
@@ -0,0 +1,68 @@
+import pytest
+
+from wfctl.dispatch import CommandTrie, lookup, takes_arguments
+from wfctl.ipc import command_map, execute_command
+
+NAMES = ["move view", "move view to workspace", "move views", "get focused view", "get focused output", "get view"]
+
+
+@pytest.fixture
+def trie():
+    trie = CommandTrie()
+    for name in NAMES:
+        trie.register(name, lambda command, name=name: name)
+    return trie
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("move view 1 20 30", "move view"),
+    ("move view to workspace 2", "move view to workspace"),
+    ("move view to 3", "move view"),
+    ("move views 1:2:3 4:5:6", "move views"),
+    ("move   view    1 2 3", "move view"),
+    ("get focused view", "get focused view"),
+    ("get view 42", "get view"),
+    ("get focused", None),
+    ("get focused window", None),
+    ("move", None),
+    ("view move 1", None),
+    ("", None),
+])
+def test_longest_registered_prefix_wins(trie, command, expected):
+    found = trie.match(command)
+    assert (found[0] if found else None) == expected
+
+
+def test_names(trie):
+    assert trie.names() == sorted(NAMES)
+
+
+class Handlers:
+    def bound(self):
+        pass
+
+    def bound_with_command(self, command):
+        pass
+
+
+@pytest.mark.parametrize("func, expected", [
+    (lambda: None, False),
+    (lambda command: None, True),
+    (lambda *args: None, True),
+    (Handlers().bound, False),
+    (Handlers().bound_with_command, True),
+    (print, True),
+])
+def test_takes_arguments(func, expected):
+    assert takes_arguments(func) is expected
+
+
+@pytest.mark.parametrize("name", sorted(command_map))
+def test_every_builtin_resolves_to_itself(name):
+    assert lookup(f"{name} argument")[0] == name
+
+
+@pytest.mark.parametrize("command", ["frobnicate", "list", "move to workspace 2", "get focused window"])
+def test_unknown_commands_are_reported(capsys, command):
+    execute_command(command)
+    assert capsys.readouterr().out == f"Error: Unknown command '{command}'\n"
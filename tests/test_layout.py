@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from wfctl.layout import apply_layout, save_layout
+
+
+def save(server):
+    return asyncio.run(save_layout(server.socket_path))
+
+
+def apply(server, layout, dry_run=True):
+    return asyncio.run(apply_layout(layout, server.socket_path, dry_run=dry_run))
+
+
+def configured_ids(report):
+    return [request["data"]["id"] for request in report["requests"]
+            if request["method"] == "window-rules/configure-view"]
+
+
+def test_save_matches_on_app_id_and_disambiguates_duplicates(server, state):
+    state.add_view("kitty", "Chat :)")
+    matches = [(entry["match"], entry.get("index"), entry.get("title")) for entry in save(server)["views"]]
+    assert matches == [
+        ("app-id=firefox", None, None),
+        ("app-id=kitty", 1, "kitty window 2"),
+        ("app-id=foot", None, None),
+        ("app-id=code", None, None),
+        ("app-id=kitty", 2, "Chat :)"),
+    ]
+
+
+def test_round_trip(server, state):
+    state.add_view("kitty", "Chat :)")
+    layout = save(server)
+    assert apply(server, layout) == {"matched": 5, "unmatched": [], "requests": []}
+
+    state.views[3]["base-geometry"] = dict(state.views[3]["base-geometry"], x=1, y=2)
+    assert apply(server, layout, dry_run=False)["requests"] == 1
+    assert state.views[3]["base-geometry"]["x"] == layout["views"][2]["geometry"]["x"]
+    assert apply(server, layout)["requests"] == []
+
+
+@pytest.mark.parametrize("change, matched, unmatched, configured", [
+    ("moved", 4, [], [2]),
+    ("missing", 3, ["app-id=foot"], []),
+    ("extra", 4, [], []),
+    ("retitled", 4, [], []),
+])
+def test_plan(server, state, change, matched, unmatched, configured):
+    layout = save(server)
+    if change == "moved":
+        state.views[2]["base-geometry"] = dict(state.views[2]["base-geometry"], width=123)
+    elif change == "missing":
+        del state.views[3]
+    elif change == "extra":
+        state.add_view("mpv")
+    elif change == "retitled":
+        state.views[1]["title"] = "something else"
+    report = apply(server, layout)
+    assert (report["matched"], report["unmatched"], configured_ids(report)) == (matched, unmatched, configured)
+
+
+def test_title_picks_among_duplicates(server, state):
+    state.add_view("kitty", "Chat :)")
+    layout = save(server)
+    # The window restored first now carries the second one's title.
+    state.views[2]["title"], state.views[5]["title"] = "Chat :)", "kitty window 2"
+    state.views[5]["base-geometry"] = dict(state.views[5]["base-geometry"], x=7)
+    # Entries are planned in order: the first kitty entry now applies to view 5.
+    assert configured_ids(apply(server, layout)) == [5, 2]
+
+
+def test_invalid_entry_does_not_stop_the_others(server, state):
+    state.views[1]["base-geometry"] = dict(state.views[1]["base-geometry"], x=5)
+    layout = {"views": [
+        {"match": "title='unterminated"},
+        {"match": "app-id=firefox", "geometry": {"x": 0}},
+    ]}
+    report = apply(server, layout)
+    assert report["invalid"] == [{"match": "title='unterminated", "error": "No closing quotation"}]
+    assert configured_ids(report) == [1]
@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+from wayfire import WayfireSocket
+
+from wfctl.mirror import StateMirror
+from wfctl.mockserver import MockWayfireServer, MockWayfireState
+
+
+def snapshot(views):
+    return {view["id"]: (view["output-id"], view["title"], view["geometry"]) for view in views}
+
+
+def drain(events):
+    """Read every event queued on a watching socket so far."""
+    events.send_json({"method": "list-methods", "data": {}})
+    queued = list(events.pending_events)
+    events.pending_events.clear()
+    return queued
+
+
+def assert_matches(mirror, sock):
+    assert snapshot(mirror.list_views()) == snapshot(sock.list_views())
+    assert {output["id"]: output["workspace"] for output in mirror.list_outputs()} == {
+        output["id"]: output["workspace"] for output in sock.list_outputs()
+    }
+    focused = sock.get_focused_view()
+    assert mirror.focused_view_id == (focused["id"] if focused else None)
+
+
+GEOMETRY = {"x": 10, "y": 20, "width": 300, "height": 200}
+
+SEQUENCES = {
+    "switch": [("vswitch/set-workspace", {"x": 1, "y": 1})],
+    "switch twice": [("vswitch/set-workspace", {"x": 2, "y": 0}), ("vswitch/set-workspace", {"x": 0, "y": 2})],
+    "switch with view": [("vswitch/set-workspace", {"x": 1, "y": 0, "view-id": 2})],
+    "configure then switch": [
+        ("window-rules/configure-view", {"id": 3, "geometry": GEOMETRY}),
+        ("vswitch/set-workspace", {"x": 1, "y": 0}),
+    ],
+    "map, focus and close": [
+        ("mock/map-view", {"app-id": "mpv"}),
+        ("window-rules/focus-view", {"id": 5}),
+        ("window-rules/close-view", {"id": 2}),
+    ],
+    "sticky": [("wm-actions/set-sticky", {"view_id": 4}), ("vswitch/set-workspace", {"x": 2, "y": 2})],
+}
+
+
+@pytest.mark.parametrize("steps", SEQUENCES.values(), ids=SEQUENCES.keys())
+def test_events_keep_mirror_current(server, steps):
+    sock, events = WayfireSocket(server.socket_path), WayfireSocket(server.socket_path)
+    events.watch()
+    mirror = StateMirror()
+    assert mirror.seed_watched(events)
+    for method, data in steps:
+        assert "error" not in sock.send_json({"method": method, "data": data})
+    for event in drain(events):
+        mirror.apply(event)
+    assert_matches(mirror, sock)
+
+
+@pytest.mark.parametrize("steps", SEQUENCES.values(), ids=SEQUENCES.keys())
+def test_events_racing_the_seed_are_not_applied_twice(server, steps):
+    sock, events = WayfireSocket(server.socket_path), WayfireSocket(server.socket_path)
+    events.watch()
+    # These events are queued on the connection before the snapshot is requested.
+    for method, data in steps:
+        sock.send_json({"method": method, "data": data})
+    mirror = StateMirror()
+    mirror.seed_watched(events)
+    for event in drain(events):
+        mirror.apply(event)
+    assert_matches(mirror, sock)
+
+
+def test_removed_output_takes_its_views():
+    with MockWayfireServer(MockWayfireState(views=4, outputs=2)) as server:
+        sock, events = WayfireSocket(server.socket_path), WayfireSocket(server.socket_path)
+        events.watch()
+        mirror = StateMirror()
+        mirror.seed_watched(events)
+        assert mirror.by_output[2]
+
+        def unplug():
+            state = server.state
+            output = state.outputs.pop(2)
+            for view_id in [v["id"] for v in state.views.values() if v["output-id"] == 2]:
+                del state.views[view_id]
+            server.emit("output-removed", output=output)
+            done.set()
+
+        done = threading.Event()
+        server.call(unplug)
+        done.wait(1)
+        for event in drain(events):
+            mirror.apply(event)
+        assert_matches(mirror, sock)
+        assert 2 not in mirror.by_output
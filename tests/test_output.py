@@ -0,0 +1,95 @@
+import io
+import json
+
+import pytest
+
+from wfctl.mockserver import MockWayfireState
+from wfctl.output import ENCODERS, compile_fields, emit, pop_output_options, using
+
+VIEWS = list(MockWayfireState(views=3).views.values())
+
+DOCUMENTS = [
+    VIEWS,
+    VIEWS[0],
+    [],
+    {},
+    None,
+    [1, "two", None, True],
+    [{"nested": [{"a": []}, {}]}, {"title": "naïve \"quoted\"\ttab"}],
+    {"outer": {"inner": [1, [2, [3]]]}},
+]
+
+
+def encode(fmt, data):
+    out = io.StringIO()
+    ENCODERS[fmt](data, out)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("data", DOCUMENTS)
+def test_json_matches_json_dumps(data):
+    assert encode("json", data) == json.dumps(data, indent=4) + "\n"
+
+
+@pytest.mark.parametrize("data", DOCUMENTS)
+def test_compact_matches_json_dumps(data):
+    assert encode("compact", data) == json.dumps(data, separators=(",", ":")) + "\n"
+
+
+@pytest.mark.parametrize("data", DOCUMENTS)
+def test_ndjson_is_one_record_per_line(data):
+    records = data if isinstance(data, list) else [data]
+    assert [json.loads(line) for line in encode("ndjson", data).splitlines()] == records
+
+
+def test_tsv_columns_follow_the_first_record():
+    data = [{"id": 1, "geometry": {"x": 0}, "ok": True}, {"id": 2, "geometry": {"x": 5}, "extra": "dropped"}]
+    assert encode("tsv", data) == "id\tgeometry.x\tok\n1\t0\ttrue\n2\t5\t\n"
+
+
+@pytest.mark.parametrize("fields, expected", [
+    ("id", {"id": 1}),
+    ("id,app-id", {"id": 1, "app-id": "firefox"}),
+    ("geometry.x,geometry.y", {"geometry": {"x": 37, "y": 23}}),
+    ("geometry,geometry.x", {"geometry": VIEWS[0]["geometry"]}),
+    ("geometry.x,geometry", {"geometry": VIEWS[0]["geometry"]}),
+    ("missing,id", {"id": 1}),
+    ("id.x", {}),
+    (" id , pid ", {"id": 1, "pid": 1001}),
+])
+def test_fields_projection(fields, expected):
+    assert compile_fields(fields)(VIEWS[0]) == expected
+
+
+def test_fields_projection_of_lists():
+    project = compile_fields("id,nested.a")
+    assert project([{"id": 1, "nested": [{"a": 1, "b": 2}, 3]}, "scalar"]) == [{"id": 1, "nested": [{"a": 1}, 3]}, "scalar"]
+
+
+@pytest.mark.parametrize("argv, expected", [
+    (["list", "views"], (["list", "views"], None, None)),
+    (["--format", "tsv", "list", "views"], (["list", "views"], "tsv", None)),
+    (["list", "views", "--format=ndjson", "--fields=id,title"], (["list", "views"], "ndjson", "id,title")),
+    (["list", "--fields", "id", "views"], (["list", "views"], None, "id")),
+])
+def test_pop_output_options(argv, expected):
+    assert pop_output_options(argv) == expected
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["list", "views", "--format"], "--format requires a value"),
+    (["--format", "yaml"], "Unknown format 'yaml'"),
+    (["--fields", "id,,title"], "Invalid field ''"),
+    (["--fields=geometry."], "Invalid field 'geometry.'"),
+])
+def test_pop_output_options_rejects(argv, message):
+    with pytest.raises(ValueError, match=message):
+        pop_output_options(argv)
+
+
+def test_emit_projects_before_encoding(capsys):
+    with using("compact", "id,title"):
+        emit(VIEWS[:2])
+    assert capsys.readouterr().out == json.dumps(
+        [{"id": view["id"], "title": view["title"]} for view in VIEWS[:2]], separators=(",", ":")
+    ) + "\n"
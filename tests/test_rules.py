@@ -0,0 +1,93 @@
+import io
+import json
+
+import pytest
+
+from wfctl.record import replay_main
+from wfctl.search import search
+
+TITLES = ["Chat :)", "two  spaces", "it's \"quoted\"", "a (b", "(c) d)", "$HOME `x`"]
+
+
+def replay_rules(tmp_path, rules, events, speed="--max"):
+    """Replay (time, event) pairs into the rules consumer; return the printed commands and stats."""
+    rules_file = tmp_path / "rules.toml"
+    rules_file.write_text(rules)
+    recording = tmp_path / "events.ndjson"
+    recording.write_text("".join(json.dumps({"t": t, "e": event}) + "\n" for t, event in events))
+    out = io.StringIO()
+    args = [str(recording), "--into", "rules", "--rules", str(rules_file)]
+    replay_main(args + (["--max"] if speed == "--max" else ["--speed", speed]), out)
+    return out.getvalue().splitlines()
+
+
+def mapped(view_id, title, app_id="kitty"):
+    return {"event": "view-mapped", "view": {"id": view_id, "app-id": app_id, "title": title}}
+
+
+@pytest.mark.parametrize("title", TITLES)
+def test_title_stays_one_query_value(tmp_path, title):
+    commands = replay_rules(tmp_path, '[[rule]]\nactions = "search views title={title}"\n', [(0, mapped(1, title))])
+    query = commands[0][len("search views "):]
+    views = [{"id": 1, "title": title}, {"id": 2, "title": title + "x"}]
+    assert [view["id"] for view in search(views, query)] == [1]
+
+
+def test_fields_and_dispatch(tmp_path):
+    rules = """
+[[rule]]
+app-id = "kitty"
+actions = ["set view alpha {id} 0.8", "move view to workspace 2 {id}"]
+
+[[rule]]
+app-id = ["firefox", "librewolf"]
+match = 'title~"Private"'
+actions = "maximize view {id}"
+
+[[rule]]
+event = "view-focused"
+actions = "get view {id} {event}"
+"""
+    events = [
+        (0, mapped(1, "shell")),
+        (0, mapped(2, "Private Browsing", "firefox")),
+        (0, mapped(3, "Home", "firefox")),
+        (0, {"event": "view-focused", "view": {"id": 3, "app-id": "firefox", "title": "Home"}}),
+    ]
+    assert replay_rules(tmp_path, rules, events) == [
+        "set view alpha 1 0.8",
+        "move view to workspace 2 1",
+        "maximize view 2",
+        "get view 3 view-focused",
+    ]
+
+
+def test_cooldown_suppresses_self_retrigger(tmp_path, capsys):
+    rules = '[[rule]]\nevent = "view-geometry-changed"\ncooldown = 0.05\nactions = "move view {id} 0 0"\n'
+    moved = {"event": "view-geometry-changed", "view": {"id": 1, "app-id": "kitty", "title": "t"}}
+    other = {"event": "view-geometry-changed", "view": {"id": 2, "app-id": "kitty", "title": "t"}}
+    # At --speed 10: the echo of the first move arrives after 1 ms, a genuine move after 100 ms.
+    events = [(0, moved), (0.01, moved), (0.01, other), (1.0, moved)]
+    assert replay_rules(tmp_path, rules, events, speed="10") == [
+        "move view 1 0 0", "move view 2 0 0", "move view 1 0 0",
+    ]
+    stats = json.loads(capsys.readouterr().err)
+    assert (stats["matched"], stats["suppressed"]) == (3, 1)
+
+
+def test_zero_cooldown_fires_every_time(tmp_path):
+    rules = '[[rule]]\nevent = "view-geometry-changed"\ncooldown = 0\nactions = "move view {id} 0 0"\n'
+    moved = {"event": "view-geometry-changed", "view": {"id": 1, "app-id": "kitty", "title": "t"}}
+    assert len(replay_rules(tmp_path, rules, [(0, moved)] * 3)) == 3
+
+
+@pytest.mark.parametrize("rules, error", [
+    ('[[rule]]\nactions = "x"\nfoo = 1\n', "rule 1: unknown key 'foo'"),
+    ('[[rule]]\nevent = "view-mapped"\n', "rule 1: no actions"),
+    ('[[rule]]\nactions = "x"\ncooldown = "1"\n', "rule 1: 'cooldown' must be a number of seconds"),
+    ('[[rule]]\nactions = "x"\nmatch = "title=\'a"\n', "rule 1: No closing quotation"),
+    ('[[rule]]\nactions = "x {"\n', "rule 1: bad action template"),
+])
+def test_invalid_rules(tmp_path, rules, error):
+    with pytest.raises(ValueError, match=error.replace("(", r"\(")):
+        replay_rules(tmp_path, rules, [])
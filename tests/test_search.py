@@ -0,0 +1,103 @@
+import pytest
+
+from wfctl.search import QueryError, ViewIndex, compile_query, search
+
+VIEWS = [
+    {"id": 1, "app-id": "firefox", "title": "Inbox - Mail", "pid": 100, "minimized": False,
+     "geometry": {"x": 0, "y": 0, "width": 1280, "height": 720}},
+    {"id": 2, "app-id": "kitty", "title": "vim notes.txt", "pid": 200, "minimized": True,
+     "geometry": {"x": 100, "y": 50, "width": 800, "height": 600}},
+    {"id": 3, "app-id": "foot", "title": "(a) shell", "pid": 300, "minimized": False,
+     "geometry": {"x": 1920, "y": 0, "width": 640, "height": 480}},
+    {"id": 4, "app-id": "firefox", "title": "Private Browsing", "pid": 400, "minimized": False,
+     "geometry": {"x": 0, "y": 0, "width": 1920, "height": 1080}},
+    {"id": 5, "app-id": "discord", "title": "Chat :)", "pid": 500, "minimized": False,
+     "geometry": {"x": 0, "y": 0, "width": 400, "height": 300}},
+]
+
+
+def ids(query):
+    return [view["id"] for view in search(VIEWS, query)]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("app-id=firefox", [1, 4]),
+    ("app-id!=firefox", [2, 3, 5]),
+    ("title~^Inbox", [1]),
+    ("title!~^Inbox", [2, 3, 4, 5]),
+    ("pid<200", [1]),
+    ("pid<=200", [1, 2]),
+    ("pid>300", [4, 5]),
+    ("pid>=300", [3, 4, 5]),
+    ("geometry.width>=1280", [1, 4]),
+    ("minimized=true", [2]),
+    ("pid=200", [2]),
+    ("app-id=nothing", []),
+])
+def test_operators(query, expected):
+    assert ids(query) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("app-id=firefox minimized=false", [1, 4]),
+    ("app-id=kitty or app-id=foot", [2, 3]),
+    ("not app-id=firefox", [2, 3, 5]),
+    ("app-id=firefox not title~Private", [1]),
+    ("not app-id=firefox not app-id=kitty", [3, 5]),
+    ("(app-id=kitty or app-id=foot) minimized=false", [3]),
+    ("not (app-id=kitty or app-id=foot)", [1, 4, 5]),
+    ("kitty", [2]),
+])
+def test_combinations(query, expected):
+    assert ids(query) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ('title="Inbox - Mail"', [1]),
+    ("title='vim notes.txt'", [2]),
+    ('title~"^Private Browsing$"', [4]),
+    ('title~"\\(a\\)"', [3]),
+    ("title~(Mail|notes)", [1, 2]),
+    ("app-id=discord title='Chat :)'", [5]),
+    ("(app-id=discord title='Chat :)')", [5]),
+    ('title="a)"', []),
+    ('title="(a) shell"', [3]),
+    ('"or"', [5]),
+])
+def test_quoting(query, expected):
+    assert ids(query) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    'title="unterminated',
+    "title~(",
+    "pid>many",
+    "(app-id=kitty",
+    "app-id=kitty)",
+    "app-id=kitty or",
+    "not",
+])
+def test_malformed(query):
+    with pytest.raises(QueryError):
+        search(VIEWS, query)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("flag=true", [1]),
+    ("flag=1", [2]),
+    ("flag=0", [3]),
+    ("flag=false", [4]),
+    ("flag>0", [2]),
+])
+def test_booleans_and_integers_are_distinct(query, expected):
+    views = [{"id": 1, "flag": True}, {"id": 2, "flag": 1}, {"id": 3, "flag": 0}, {"id": 4, "flag": False}]
+    assert [view["id"] for view in search(views, query)] == expected
+
+
+def test_index_is_reused_across_queries():
+    index = ViewIndex(VIEWS)
+    assert search(None, "not app-id=firefox", index) == [VIEWS[1], VIEWS[2], VIEWS[4]]
+    # A negated query must not change what later queries see.
+    assert search(None, "app-id=firefox", index) == [VIEWS[0], VIEWS[3]]
+    assert compile_query("app-id=kitty") is compile_query("app-id=kitty")
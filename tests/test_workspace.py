@@ -0,0 +1,31 @@
+import pytest
+
+from wfctl.api import Client
+from wfctl.mockserver import MockWayfireServer, MockWayfireState
+
+
+@pytest.fixture
+def two_outputs():
+    state = MockWayfireState(views=4, outputs=2)
+    # The focused output sits on another workspace than the view's output.
+    state.outputs[1]["workspace"].update(x=1, y=1)
+    with MockWayfireServer(state) as server, Client(server.socket_path) as client:
+        yield state, client
+
+
+@pytest.mark.parametrize("number, dx, dy", [(1, 0, 0), (2, 1920, 0), (9, 3840, 2160)])
+def test_move_uses_the_views_own_output(two_outputs, number, dx, dy):
+    state, client = two_outputs
+    view = state.views[2]
+    before = dict(view["geometry"])
+    client.move_view_to_workspace(number, view_id=2)
+    assert view["output-id"] == 2
+    assert (view["geometry"]["x"], view["geometry"]["y"]) == (before["x"] + dx, before["y"] + dy)
+    assert state.outputs[1]["workspace"]["x"] == 1
+
+
+def test_follow_switches_the_views_output(two_outputs):
+    state, client = two_outputs
+    client.move_view_to_workspace(2, view_id=2, follow=True)
+    assert (state.outputs[2]["workspace"]["x"], state.outputs[2]["workspace"]["y"]) == (1, 0)
+    assert (state.outputs[1]["workspace"]["x"], state.outputs[1]["workspace"]["y"]) == (1, 1)
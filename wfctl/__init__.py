@@ -0,0 +1,16 @@
+"""
+wayfire command line tool, and the Python API it is built on (see wfctl.api).
+
+The API names are imported on first use, so running the CLI pays nothing for them.
+"""
+
+_API = ("Client", "View", "Output", "Workspace", "InputDevice", "Geometry")
+
+__all__ = list(_API)
+
+
+def __getattr__(name):
+    if name in _API:
+        from wfctl import api
+        return getattr(api, name)
+    raise AttributeError(f"module 'wfctl' has no attribute {name!r}")
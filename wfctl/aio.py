@@ -0,0 +1,180 @@
+import asyncio
+import json
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from wayfire.core.template import get_msg_template, geometry_to_json
+
+
+class AsyncWayfireSocket:
+    """
+    asyncio client for the Wayfire IPC socket that pipelines requests.
+
+    Requests are written without waiting for earlier replies. Wayfire answers
+    requests on a connection in order, so replies are matched to a FIFO of
+    pending futures; events received in between go to the events queue.
+
+    :param timeout: Seconds to wait for replies, None to block; defaults to $WFCTL_TIMEOUT
+    """
+
+    def __init__(self, socket_name: Optional[str] = None, timeout: Optional[float] = -1) -> None:
+        from wfctl.connection import request_timeout, socket_path
+
+        if socket_name is None:
+            socket_name = socket_path()
+        self.socket_name = socket_name
+        if self.socket_name is None:
+            raise Exception("Failed to find a suitable Wayfire socket!")
+        self.events: asyncio.Queue = asyncio.Queue()
+        self._pending: deque = deque()
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self.timeout = request_timeout() if timeout == -1 else timeout
+
+    async def connect(self) -> "AsyncWayfireSocket":
+        self._reader, self._writer = await asyncio.open_unix_connection(self.socket_name)
+        self._read_task = asyncio.get_running_loop().create_task(self._read_loop())
+        return self
+
+    async def close(self) -> None:
+        if self._read_task is not None:
+            self._read_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+
+    async def __aenter__(self) -> "AsyncWayfireSocket":
+        return await self.connect()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                header = await self._reader.readexactly(4)
+                body = await self._reader.readexactly(int.from_bytes(header, byteorder="little"))
+                response = json.loads(body)
+                if isinstance(response, dict) and "event" in response:
+                    self.events.put_nowait(response)
+                    continue
+                future = self._pending.popleft()
+                if future.done():
+                    continue
+                if isinstance(response, dict) and "error" in response:
+                    future.set_exception(Exception(response["error"]))
+                else:
+                    future.set_result(response)
+        except Exception as e:
+            while self._pending:
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Wayfire socket closed: {e!r}"))
+
+    def _send(self, msg: Dict[str, Any]) -> asyncio.Future:
+        """Queue a request on the transport and return the future of its reply."""
+        if "method" not in msg:
+            raise Exception("Malformed json request: missing method!")
+        data = json.dumps(msg).encode("utf8")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        self._writer.write(len(data).to_bytes(4, byteorder="little") + data)
+        return future
+
+    async def _replies(self, awaitable):
+        """Await a write and its replies, raising TimeoutError like the blocking socket does."""
+        try:
+            return await asyncio.wait_for(awaitable, self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"timed out after {self.timeout:g}s waiting for Wayfire") from None
+
+    async def send_json(self, msg: Dict[str, Any]) -> Any:
+        future = self._send(msg)
+
+        async def reply():
+            await self._writer.drain()
+            return await future
+        return await self._replies(reply())
+
+    async def pipeline(self, messages: Iterable[Dict[str, Any]]) -> List[Any]:
+        """
+        Send all messages back to back and wait for every reply.
+
+        :param messages: Requests to send, in order
+        :return: Replies in request order; failed requests yield their exception
+        :raises TimeoutError: If the replies take longer than the timeout in total
+        """
+        futures = [self._send(msg) for msg in messages]
+
+        async def replies():
+            await self._writer.drain()
+            return await asyncio.gather(*futures, return_exceptions=True)
+        return await self._replies(replies())
+
+    async def get_view(self, view_id: int) -> Dict[str, Any]:
+        return (await self.send_json(view_info_message(view_id)))["info"]
+
+    async def list_views(self) -> List[Dict[str, Any]]:
+        return await self.send_json(get_msg_template("window-rules/list-views")) or []
+
+    async def configure_view(self, view_id: int, x: int, y: int, w: int, h: int) -> Any:
+        return await self.send_json(configure_view_message(view_id, x, y, w, h))
+
+
+def view_info_message(view_id: int) -> Dict[str, Any]:
+    message = get_msg_template("window-rules/view-info")
+    message["data"]["id"] = view_id
+    return message
+
+
+def configure_view_message(view_id: int, x: int, y: int, w: int, h: int, output_id: Optional[int] = None) -> Dict[str, Any]:
+    message = get_msg_template("window-rules/configure-view")
+    message["data"]["id"] = view_id
+    message["data"]["geometry"] = geometry_to_json(x, y, w, h)
+    if output_id is not None:
+        message["data"]["output_id"] = output_id
+    return message
+
+
+async def configure_views(
+    changes: List[Tuple[int, Optional[int], Optional[int], Optional[int], Optional[int]]],
+    socket_name: Optional[str] = None,
+) -> Dict[int, Exception]:
+    """
+    Configure many views in two pipelined round-trips.
+
+    The first round fetches the current base geometry of every view, the
+    second sends all configure-view requests. Fields given as None keep their
+    current value.
+
+    :param changes: Tuples of (view id, x, y, width, height)
+    :param socket_name: Wayfire socket path, defaults to $WAYFIRE_SOCKET
+    :return: Mapping of view id to the error it failed with
+    """
+    errors: Dict[int, Exception] = {}
+    async with AsyncWayfireSocket(socket_name) as sock:
+        infos = await sock.pipeline(view_info_message(change[0]) for change in changes)
+
+        messages = []
+        for (view_id, x, y, w, h), info in zip(changes, infos):
+            if isinstance(info, Exception):
+                errors[view_id] = info
+                continue
+            try:
+                geo = info["info"]["base-geometry"]
+            except (KeyError, TypeError) as e:
+                errors[view_id] = Exception(f"unexpected view-info reply, missing {e}")
+                continue
+            messages.append((view_id, configure_view_message(
+                view_id,
+                geo["x"] if x is None else x,
+                geo["y"] if y is None else y,
+                geo["width"] if w is None else w,
+                geo["height"] if h is None else h,
+            )))
+
+        results = await sock.pipeline(message for _, message in messages)
+        for (view_id, _), result in zip(messages, results):
+            if isinstance(result, Exception):
+                errors[view_id] = result
+    return errors
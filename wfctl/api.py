@@ -0,0 +1,480 @@
+"""
+Python API to the compositor, the same one the CLI commands are built on.
+
+    from wfctl import Client
+
+    client = Client()
+    for view in client.views("app-id=kitty"):
+        client.move_view(view.id, 0, 0)
+    print(client.workspace().number)
+
+Results are small __slots__ objects holding the dict Wayfire sent, read
+through properties, and lists of them only wrap an item when it is
+accessed. Nothing is copied or re-encoded, and the dict stays available as
+``raw`` for callers that want all of it.
+"""
+from typing import Any, Dict, Generic, Iterator, List, NamedTuple, Optional, Sequence, Type, TypeVar, Union, overload
+
+from wfctl.cache import current_cache
+from wfctl.connection import ConnectionManager, _Lazy, sock as shared_sock
+from wfctl.mirror import active as active_mirror
+from wfctl.search import ViewIndex, search
+from wfctl.workspace import Grid, move_view_message, set_workspace_message
+
+# Wayfire's tiled-edges bits for a view tiled to all four edges.
+TILED_EDGES_ALL = 15
+
+
+class Geometry(NamedTuple):
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @classmethod
+    def from_dict(cls, geometry: Dict[str, int]) -> "Geometry":
+        return cls(geometry["x"], geometry["y"], geometry["width"], geometry["height"])
+
+
+class Record:
+    """Read-only view of a dict sent by Wayfire; item access reaches the raw keys."""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: Dict[str, Any]) -> None:
+        self.raw = raw
+
+    def __getitem__(self, key: str) -> Any:
+        return self.raw[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.raw.get(key, default)
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and other.raw == self.raw
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={self.raw.get('id')!r}, name={self._name()!r})"
+
+    def _name(self) -> Any:
+        return self.raw.get("name")
+
+
+class View(Record):
+    __slots__ = ()
+
+    @property
+    def id(self) -> int:
+        return self.raw["id"]
+
+    @property
+    def app_id(self) -> Optional[str]:
+        return self.raw.get("app-id")
+
+    @property
+    def title(self) -> Optional[str]:
+        return self.raw.get("title")
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.raw.get("pid")
+
+    @property
+    def type(self) -> Optional[str]:
+        return self.raw.get("type")
+
+    @property
+    def role(self) -> Optional[str]:
+        return self.raw.get("role")
+
+    @property
+    def output_id(self) -> Optional[int]:
+        return self.raw.get("output-id")
+
+    @property
+    def output_name(self) -> Optional[str]:
+        return self.raw.get("output-name")
+
+    @property
+    def geometry(self) -> Geometry:
+        return Geometry.from_dict(self.raw["geometry"])
+
+    @property
+    def base_geometry(self) -> Geometry:
+        """Geometry without decorations, falling back to geometry."""
+        return Geometry.from_dict(self.raw.get("base-geometry") or self.raw["geometry"])
+
+    @property
+    def focused(self) -> bool:
+        return bool(self.raw.get("activated"))
+
+    @property
+    def mapped(self) -> bool:
+        return bool(self.raw.get("mapped"))
+
+    @property
+    def minimized(self) -> bool:
+        return bool(self.raw.get("minimized"))
+
+    @property
+    def fullscreen(self) -> bool:
+        return bool(self.raw.get("fullscreen"))
+
+    @property
+    def maximized(self) -> bool:
+        return self.raw.get("tiled-edges") == TILED_EDGES_ALL
+
+    @property
+    def sticky(self) -> bool:
+        return bool(self.raw.get("sticky"))
+
+    def _name(self) -> Any:
+        return self.raw.get("app-id")
+
+
+class Workspace(Grid):
+    """Current workspace of an output, with the grid it sits in."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return f"Workspace(number={self.number}, x={self.x}, y={self.y}, grid={self.columns}x{self.rows})"
+
+
+class Output(Record):
+    __slots__ = ()
+
+    @property
+    def id(self) -> int:
+        return self.raw["id"]
+
+    @property
+    def name(self) -> str:
+        return self.raw["name"]
+
+    @property
+    def geometry(self) -> Geometry:
+        return Geometry.from_dict(self.raw["geometry"])
+
+    @property
+    def workarea(self) -> Geometry:
+        return Geometry.from_dict(self.raw.get("workarea") or self.raw["geometry"])
+
+    @property
+    def workspace(self) -> Workspace:
+        return Workspace(self.raw)
+
+
+class InputDevice(Record):
+    __slots__ = ()
+
+    @property
+    def id(self) -> int:
+        return self.raw["id"]
+
+    @property
+    def name(self) -> str:
+        return self.raw["name"]
+
+    @property
+    def type(self) -> str:
+        return self.raw["type"]
+
+    @property
+    def vendor(self) -> Optional[int]:
+        return self.raw.get("vendor")
+
+    @property
+    def product(self) -> Optional[int]:
+        return self.raw.get("product")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.raw.get("enabled"))
+
+
+R = TypeVar("R", bound=Record)
+
+
+class RecordList(Sequence, Generic[R]):
+    """List of raw dicts seen as records, wrapping each item only when it is accessed."""
+
+    __slots__ = ("raw", "_type")
+
+    def __init__(self, raw: List[Dict[str, Any]], type_: Type[R]) -> None:
+        self.raw = raw
+        self._type = type_
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    @overload
+    def __getitem__(self, i: int) -> R: ...
+    @overload
+    def __getitem__(self, i: slice) -> "RecordList[R]": ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[R, "RecordList[R]"]:
+        if isinstance(i, slice):
+            return RecordList(self.raw[i], self._type)
+        return self._type(self.raw[i])
+
+    def __iter__(self) -> Iterator[R]:
+        return map(self._type, self.raw)
+
+    def __repr__(self) -> str:
+        return f"<{len(self.raw)} {self._type.__name__} records>"
+
+
+def _record(type_: Type[R], raw: Optional[Dict[str, Any]]) -> Optional[R]:
+    return type_(raw) if raw else None
+
+
+class Client:
+    """
+    Queries and actions on one Wayfire instance.
+
+    The default client shares this process's connection, and its reads are
+    answered by the daemon's state mirror when one runs, else by the
+    snapshot cache. A client for an explicit socket talks to it directly.
+
+    Actions raise the errors Wayfire reports, as exceptions.
+
+    :param socket_name: Socket path, defaults to $WAYFIRE_SOCKET and the shared connection
+    """
+
+    def __init__(self, socket_name: Optional[str] = None) -> None:
+        if socket_name is None:
+            self._manager = None
+            self.sock = shared_sock
+        else:
+            self._manager = ConnectionManager(socket_name)
+            self.sock = _Lazy(self._manager.request, self._manager)
+        self._index: tuple = (None, None)
+
+    def close(self) -> None:
+        """Close a client's own connection; the shared one is left open."""
+        if self._manager is not None:
+            self._manager.drop()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # Reading state
+
+    def _state(self, resource: str, method: str) -> Any:
+        if self._manager is not None:
+            return getattr(self.sock, method)()
+        mirror = active_mirror()
+        if mirror and hasattr(mirror, method):
+            return getattr(mirror, method)()
+        return current_cache().get(resource, getattr(self.sock, method))
+
+    def _changed(self) -> None:
+        if self._manager is None:
+            current_cache().invalidate()
+
+    def view_index(self, views: List[Dict[str, Any]]) -> ViewIndex:
+        """Search index for a views snapshot, rebuilt only when the snapshot changes."""
+        mirror = active_mirror() if self._manager is None else None
+        # Read once: threads serving other compositors may swap the index concurrently.
+        index = self._index
+        if mirror:
+            # The mirror identifies its state by version, cached snapshots by the list itself.
+            snapshot = ("mirror", mirror.version)
+            fresh = index[0] == snapshot
+        else:
+            snapshot = views
+            fresh = index[0] is views
+        if not fresh:
+            index = self._index = (snapshot, ViewIndex(views))
+        return index[1]
+
+    def views(self, query: Optional[str] = None) -> RecordList[View]:
+        """
+        All views, or those matching a search query (see wfctl.search).
+
+        :raises wfctl.search.QueryError: For a malformed query
+        """
+        views = self._state("views", "list_views")
+        if query:
+            views = search(views, query, self.view_index(views))
+        return RecordList(views, View)
+
+    def view(self, view_id: int) -> Optional[View]:
+        """A view by id, always read from the compositor."""
+        return _record(View, self.sock.get_view(view_id))
+
+    def focused_view(self) -> Optional[View]:
+        return _record(View, self._state("focused_view", "get_focused_view"))
+
+    def outputs(self) -> RecordList[Output]:
+        return RecordList(self._state("outputs", "list_outputs"), Output)
+
+    def focused_output(self) -> Optional[Output]:
+        return _record(Output, self._state("focused_output", "get_focused_output"))
+
+    def workspace(self) -> Workspace:
+        """Current workspace of the focused output."""
+        return Workspace(self._state("focused_output", "get_focused_output"))
+
+    def inputs(self) -> RecordList[InputDevice]:
+        return RecordList(self._state("inputs", "list_input_devices"), InputDevice)
+
+    def input_device(self, name_or_id_or_type: str) -> Optional[InputDevice]:
+        """First input device whose name, id or type matches."""
+        for device in self._state("inputs", "list_input_devices"):
+            if name_or_id_or_type in (device["name"], str(device["id"]), device["type"]):
+                return InputDevice(device)
+        return None
+
+    def option(self, name: str) -> Any:
+        """Value of a config option, section/option."""
+        return self.sock.get_option_value(name)
+
+    def config(self):
+        """A ConfigTransaction on this client's connection."""
+        from wfctl.config import ConfigTransaction
+        return ConfigTransaction(self.sock)
+
+    # Workspaces
+
+    def switch_workspace(self, x: int, y: int, view_id: Optional[int] = None,
+                         workspace: Optional[Workspace] = None) -> None:
+        """Switch an output (default: focused) to workspace (x, y), taking view_id along if given."""
+        workspace = workspace or self.workspace()
+        if (x, y) != (workspace.x, workspace.y) or view_id is not None:
+            self.sock.send_json(set_workspace_message(workspace, x, y, view_id))
+            self._changed()
+
+    def set_workspace(self, number: int) -> None:
+        """
+        Switch the focused output to a workspace, numbered row by row from 1.
+
+        :raises ValueError: If the grid has no such workspace
+        """
+        workspace = self.workspace()
+        self.switch_workspace(*workspace.coordinates(number), workspace=workspace)
+
+    def next_workspace(self, steps: int = 1) -> None:
+        """Switch steps workspaces on in numbering order, wrapping around; negative goes back."""
+        workspace = self.workspace()
+        self.switch_workspace(*workspace.offset(steps), workspace=workspace)
+
+    def workspace_towards(self, direction: str) -> bool:
+        """
+        Switch to the adjacent workspace left, right, up or down.
+
+        :return: False at the edge of the grid, where nothing happens
+        """
+        workspace = self.workspace()
+        target = workspace.neighbour(direction)
+        if target is None:
+            return False
+        self.switch_workspace(*target, workspace=workspace)
+        return True
+
+    def move_view_to_workspace(self, number: int, view_id: Optional[int] = None, follow: bool = False) -> None:
+        """
+        Move a view (default: focused) to a workspace of the output it is on.
+
+        :param follow: Switch that output to the workspace along with the view
+        :raises ValueError: If there is no such workspace or no focused view
+        """
+        # An explicit view is read on its own rather than picked out of the full list.
+        view = self.focused_view() if view_id is None else self.view(view_id)
+        if view is None:
+            raise ValueError("No such view.")
+        output_id = view.raw.get("output-id")
+        output = next((o for o in self._state("outputs", "list_outputs") if o["id"] == output_id), None)
+        if output is None:
+            raise ValueError(f"View {view.id} is on no known output.")
+        workspace = Workspace(output)
+        x, y = workspace.coordinates(number)
+        if follow:
+            # vswitch takes the view along in the same request.
+            self.switch_workspace(x, y, view.id, workspace)
+        else:
+            self.sock.send_json(move_view_message(workspace, view.raw, x, y))
+            self._changed()
+
+    # Views
+
+    def configure_view(self, view_id: int, x: Optional[int] = None, y: Optional[int] = None,
+                       width: Optional[int] = None, height: Optional[int] = None,
+                       output_id: Optional[int] = None) -> None:
+        """Set a view's geometry; values left out keep the view's current base geometry."""
+        if None in (x, y, width, height):
+            current = self.sock.get_view(view_id)["base-geometry"]
+            x = current["x"] if x is None else x
+            y = current["y"] if y is None else y
+            width = current["width"] if width is None else width
+            height = current["height"] if height is None else height
+        self.sock.configure_view(view_id, x, y, width, height, output_id)
+        self._changed()
+
+    def move_view(self, view_id: int, x: int, y: int) -> None:
+        self.configure_view(view_id, x, y)
+
+    def resize_view(self, view_id: int, width: int, height: int) -> None:
+        self.configure_view(view_id, width=width, height=height)
+
+    def close_view(self, view_id: int) -> None:
+        self.sock.close_view(view_id)
+        self._changed()
+
+    def _set_flag(self, method: str, view_id: int, state: bool) -> None:
+        from wayfire.core.template import get_msg_template
+
+        message = get_msg_template(method)
+        message["data"]["view_id"] = view_id
+        message["data"]["state"] = state
+        self.sock.send_json(message)
+        self._changed()
+
+    def minimize_view(self, view_id: int, state: bool = True) -> None:
+        self._set_flag("wm-actions/set-minimized", view_id, state)
+
+    def fullscreen_view(self, view_id: int, state: bool = True) -> None:
+        self._set_flag("wm-actions/set-fullscreen", view_id, state)
+
+    def maximize_view(self, view_id: int) -> None:
+        """Tile a view to the whole workarea with the grid plugin."""
+        self.sock.assign_slot(view_id, "slot_c")
+        self._changed()
+
+    def set_view_alpha(self, view_id: int, alpha: float) -> None:
+        self.sock.set_view_alpha(view_id, alpha)
+
+    # Input devices and options
+
+    def configure_device(self, name_or_id_or_type: str, enabled: bool) -> Optional[InputDevice]:
+        """
+        Enable or disable an input device by name, id or type.
+
+        :return: The device, or None if nothing matched
+        """
+        device = self.input_device(name_or_id_or_type)
+        if device is not None:
+            self.sock.configure_input_device(device.id, enabled)
+            self._changed()
+        return device
+
+    def set_options(self, options: Dict[str, Any]) -> None:
+        """Set section/option values in one write, so the compositor reloads its config once."""
+        self.sock.set_option_values(options)
+
+
+_client: Optional[Client] = None
+
+
+def default_client() -> Client:
+    """The client on the shared connection, used by the CLI commands."""
+    global _client
+    if _client is None:
+        _client = Client()
+    return _client
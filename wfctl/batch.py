@@ -0,0 +1,86 @@
+import json
+import sys
+from typing import Any, Dict, Iterable, Iterator, TextIO
+
+
+def read_commands(lines: Iterable[str]) -> Iterator[tuple]:
+    """Yield (line number, command) pairs, skipping blank lines and # comments."""
+    for number, line in enumerate(lines, start=1):
+        command = line.strip()
+        # Allow pasting lines straight from existing shell scripts.
+        if command.startswith("wfctl "):
+            command = command[len("wfctl "):].strip()
+        if command and not command.startswith("#"):
+            yield number, command
+
+
+def parse_output(output: str) -> Any:
+    """Decode handler output as JSON when possible, otherwise keep the text."""
+    output = output.strip()
+    if not output:
+        return None
+    try:
+        return json.loads(output)
+    except ValueError:
+        return output
+
+
+def run_batch(lines: Iterable[str], out: TextIO = sys.stdout, stop_on_error: bool = False) -> int:
+    """
+    Run newline-separated commands over the shared compositor connection.
+
+    One JSON object is written per command with its line number, the command,
+    whether it succeeded and either its result or its error message.
+
+    :param lines: Iterable of command lines
+    :param out: Stream the JSON results are written to
+    :param stop_on_error: Stop after the first failing command
+    :return: 0 if every command succeeded, 1 otherwise
+    """
+    from wfctl.connection import manager
+    from wfctl.ipc import capture_command
+    from wfctl.output import pop_output_options, using
+
+    manager.keep_alive()
+
+    status = 0
+    for number, command in read_commands(lines):
+        try:
+            argv, _, fields = pop_output_options(command.split())
+        except ValueError as e:
+            output, code = f"Error: {e}", 1
+        else:
+            # Results are embedded in the record, so always capture a single compact document.
+            with using("compact", fields):
+                output, code = capture_command(" ".join(argv))
+        record: Dict[str, Any] = {"line": number, "command": command, "ok": code == 0}
+        if code == 0:
+            record["result"] = parse_output(output)
+        else:
+            status = 1
+            record["error"] = output.strip().removeprefix("Error:").strip()
+        out.write(json.dumps(record, separators=(",", ":")) + "\n")
+        if code != 0 and stop_on_error:
+            break
+    out.flush()
+    return status
+
+
+def batch_main(argv: list) -> int:
+    """Entry point for `wfctl --batch FILE [--stop-on-error]`; FILE may be '-' for stdin."""
+    args = [arg for arg in argv if arg != "--stop-on-error"]
+    stop_on_error = len(args) != len(argv)
+    try:
+        path = args[args.index("--batch") + 1]
+    except IndexError:
+        print("Error: --batch requires a file name or '-' for stdin.")
+        return 1
+
+    if path == "-":
+        return run_batch(sys.stdin, stop_on_error=stop_on_error)
+    try:
+        with open(path) as f:
+            return run_batch(f, stop_on_error=stop_on_error)
+    except OSError as e:
+        print(f"Error: {e}")
+        return 1
@@ -0,0 +1,166 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+# Seconds a snapshot of each resource stays valid without an invalidating event.
+DEFAULT_TTLS = {
+    "views": 0.5,
+    "focused_view": 0.25,
+    "focused_output": 0.5,
+    "outputs": 5.0,
+    "inputs": 10.0,
+}
+
+VIEW_RESOURCES = ("views", "focused_view")
+
+# Compositor events and the snapshots they make stale.
+EVENT_INVALIDATES = {
+    "view-focused": VIEW_RESOURCES,
+    "wset-workspace-changed": ("focused_output", "outputs"),
+    "workspace-activated": ("focused_output", "outputs"),
+    "output-gain-focus": ("focused_output",),
+    "output-added": ("outputs", "focused_output", "views"),
+    "output-removed": ("outputs", "focused_output", "views"),
+    "output-layout-changed": ("outputs", "focused_output"),
+    "input-device-added": ("inputs",),
+    "input-device-removed": ("inputs",),
+}
+
+
+def resources_for_event(event: str) -> Iterable[str]:
+    """Return the resources a compositor event invalidates."""
+    if event in EVENT_INVALIDATES:
+        return EVENT_INVALIDATES[event]
+    if event.startswith("view-"):
+        # view-mapped, view-unmapped, view-geometry-changed, view-title-changed, ...
+        return VIEW_RESOURCES
+    return ()
+
+
+class SnapshotCache:
+    """
+    Short-lived snapshots of compositor state with per-resource TTLs.
+
+    Snapshots are kept in memory, which pays off in batch and daemon mode, and
+    optionally mirrored to JSON files so successive CLI calls can share them.
+
+    :param ttls: Resource name to TTL in seconds, merged over DEFAULT_TTLS
+    :param directory: Directory for on-disk snapshots, or None for memory only
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, directory: Optional[str] = None) -> None:
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.directory = directory
+        self._entries: Dict[str, tuple] = {}
+
+    def _path(self, resource: str) -> str:
+        return os.path.join(self.directory, f"{resource}.json")
+
+    def get(self, resource: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Return a fresh snapshot of resource, calling fetch only when it is stale.
+
+        :param resource: Resource name, e.g. "views"
+        :param fetch: Callable that queries the compositor
+        """
+        ttl = self.ttls.get(resource, 0)
+        now = time.time()
+        entry = self._entries.get(resource)
+        if entry is not None and now - entry[0] < ttl:
+            return entry[1]
+
+        if self.directory is not None:
+            entry = self._read(resource)
+            if entry is not None and now - entry[0] < ttl:
+                self._entries[resource] = entry
+                return entry[1]
+
+        value = fetch()
+        self._entries[resource] = (now, value)
+        if self.directory is not None:
+            self._write(resource, now, value)
+        return value
+
+    def invalidate(self, *resources: str) -> None:
+        """Drop the given snapshots, or all of them when none are named."""
+        for resource in resources or tuple(self.ttls):
+            self._entries.pop(resource, None)
+            if self.directory is not None:
+                try:
+                    os.unlink(self._path(resource))
+                except FileNotFoundError:
+                    pass
+
+    def invalidate_for_event(self, event: Dict[str, Any]) -> None:
+        """Drop the snapshots a compositor event makes stale."""
+        resources = tuple(resources_for_event(event.get("event", "")))
+        if resources:
+            self.invalidate(*resources)
+
+    def _read(self, resource: str) -> Optional[tuple]:
+        try:
+            with open(self._path(resource)) as f:
+                data = json.load(f)
+            return data["time"], data["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, resource: str, now: float, value: Any) -> None:
+        path = self._path(resource)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump({"time": now, "value": value}, f, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+
+def cache_directory(socket_name: Optional[str] = None) -> str:
+    """Per-compositor snapshot directory under $XDG_RUNTIME_DIR."""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR") or "/tmp"
+    wayfire_socket = os.path.basename(socket_name or os.getenv("WAYFIRE_SOCKET") or "wayfire")
+    return os.path.join(runtime_dir, f"wfctl-cache-{wayfire_socket}")
+
+
+def create_cache(socket_name: Optional[str] = None) -> SnapshotCache:
+    """
+    Build the cache selected by $WFCTL_CACHE.
+
+    "memory" (default) keeps snapshots in this process, "disk" also shares
+    them between CLI calls through $XDG_RUNTIME_DIR, "off" disables caching.
+
+    :param socket_name: Compositor the snapshots are of, defaults to $WAYFIRE_SOCKET
+    """
+    mode = os.getenv("WFCTL_CACHE", "memory")
+    if mode == "off":
+        return SnapshotCache(ttls={name: 0 for name in DEFAULT_TTLS})
+    if mode == "disk":
+        return SnapshotCache(directory=cache_directory(socket_name))
+    return SnapshotCache()
+
+
+cache = create_cache()
+
+# Per-thread cache for another compositor, see wfctl.connection.use_socket.
+_local = threading.local()
+
+
+def current_cache() -> SnapshotCache:
+    """The cache of the compositor this thread talks to."""
+    return getattr(_local, "cache", None) or cache
+
+
+@contextlib.contextmanager
+def use_cache(snapshots: SnapshotCache) -> Iterator[SnapshotCache]:
+    """Make snapshots this thread's cache within the block."""
+    previous = getattr(_local, "cache", None)
+    _local.cache = snapshots
+    try:
+        yield snapshots
+    finally:
+        _local.cache = previous
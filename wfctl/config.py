@@ -0,0 +1,112 @@
+"""
+Batched access to Wayfire config options.
+
+A ConfigTransaction reads each option at most once and buffers every change,
+including edits of the core/plugins list, until commit() writes them all in
+a single set-config-options request.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+PLUGINS_OPTION = "core/plugins"
+
+
+class ConfigTransaction:
+    """
+    Read-once, write-once view of Wayfire options.
+
+    Usable as a context manager that commits on success:
+
+        with ConfigTransaction(sock) as config:
+            config.enable_plugins("expo", "cube")
+            config.set("core/vwidth", 4)
+
+    :param sock: WayfireSocket used for reads and the final write
+    """
+
+    def __init__(self, sock) -> None:
+        self.sock = sock
+        self._read: Dict[str, Any] = {}
+        self.changes: Dict[str, Any] = {}
+
+    def __enter__(self) -> "ConfigTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+
+    def get(self, option: str) -> Any:
+        """Current value of an option, including changes made in this transaction."""
+        if option in self.changes:
+            return self.changes[option]
+        if option not in self._read:
+            self._read[option] = self.sock.get_option_value(option)["value"]
+        return self._read[option]
+
+    def set(self, option: str, value: Any) -> None:
+        if "/" not in option:
+            raise ValueError(f"Option '{option}' must be of the form section/option")
+        self.changes[option] = value
+
+    def update(self, options: Dict[str, Any]) -> None:
+        for option, value in options.items():
+            self.set(option, value)
+
+    def plugins(self) -> List[str]:
+        return self.get(PLUGINS_OPTION).split()
+
+    def plugin_status(self, names: Iterable[str]) -> Dict[str, bool]:
+        """Whether each plugin is in the plugin list, matching whole names only."""
+        enabled = set(self.plugins())
+        return {name: name in enabled for name in names}
+
+    def enable_plugins(self, *names: str) -> None:
+        plugins = self.plugins()
+        plugins.extend(name for name in dict.fromkeys(names) if name not in plugins)
+        self.set(PLUGINS_OPTION, " ".join(plugins))
+
+    def disable_plugins(self, *names: str) -> None:
+        remove = set(names)
+        self.set(PLUGINS_OPTION, " ".join(name for name in self.plugins() if name not in remove))
+
+    def commit(self) -> Dict[str, Any]:
+        """
+        Write all buffered changes in one request, skipping values that are unchanged.
+
+        :return: The options that were written
+        """
+        written = {
+            option: value for option, value in self.changes.items()
+            if self._read.get(option) != value
+        }
+        if written:
+            self.sock.set_option_values(written)
+        self._read.update(written)
+        self.changes.clear()
+        return written
+
+
+def option_message(option: str) -> Dict[str, Any]:
+    from wayfire.core.template import get_msg_template
+
+    message = get_msg_template("wayfire/get-config-option")
+    message["data"]["option"] = option
+    return message
+
+
+async def read_options(options: List[str], socket_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Read many options in one pipelined round-trip.
+
+    :raises Exception: If any option does not exist
+    """
+    from wfctl.aio import AsyncWayfireSocket
+
+    async with AsyncWayfireSocket(socket_name) as sock:
+        replies = await sock.pipeline(option_message(option) for option in options)
+    values = {}
+    for option, reply in zip(options, replies):
+        if isinstance(reply, Exception):
+            raise Exception(f"{option}: {reply}")
+        values[option] = reply["value"]
+    return values
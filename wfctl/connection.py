@@ -0,0 +1,251 @@
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Iterator, List, Optional
+
+# Seconds a request may wait for its reply before the connection is dropped.
+DEFAULT_TIMEOUT = 5.0
+
+# Idle seconds after which a long-running process pings before reusing its connection.
+HEALTH_CHECK_INTERVAL = 30.0
+
+# Connection attempts in long-running modes, about 20 seconds of backoff in total.
+PERSISTENT_ATTEMPTS = 10
+
+
+def request_timeout() -> Optional[float]:
+    """Reply timeout from $WFCTL_TIMEOUT in seconds; 0 waits forever."""
+    value = os.getenv("WFCTL_TIMEOUT")
+    if not value:
+        return DEFAULT_TIMEOUT
+    try:
+        return float(value) or None
+    except ValueError:
+        return DEFAULT_TIMEOUT
+
+
+def backoff(base: float = 0.1, limit: float = 5.0) -> Iterator[float]:
+    """Exponentially growing delays, capped at limit."""
+    delay = base
+    while True:
+        yield delay
+        delay = min(delay * 2, limit)
+
+
+def is_connection_error(e: BaseException) -> bool:
+    """Whether e means the connection is broken or out of sync, rather than a failed request."""
+    # The wayfire module reports a closed socket with a bare Exception.
+    return (
+        isinstance(e, (OSError, json.JSONDecodeError))
+        or str(e) == "Failed to read anything from the socket!"
+    )
+
+
+class ConnectionManager:
+    """
+    Connections to the Wayfire IPC socket.
+
+    One request/response connection is shared by command handlers, while
+    every event watch gets its own connection, so a slow event consumer
+    never holds up replies to commands.
+
+    :param socket_name: Socket path, defaults to $WAYFIRE_SOCKET
+    :param attempts: Connection attempts before giving up, None to retry forever
+    """
+
+    def __init__(self, socket_name: Optional[str] = None, attempts: Optional[int] = 1) -> None:
+        self.socket_name = socket_name
+        self.attempts = attempts
+        # Set by long-running modes, where the compositor may restart under us.
+        self.health_check_interval: Optional[float] = None
+        self._socket = None
+        self._utils = None
+        self._last_used = 0.0
+
+    def keep_alive(self) -> None:
+        """Ride out compositor restarts: retry connecting and ping idle connections."""
+        self.attempts = PERSISTENT_ATTEMPTS
+        self.health_check_interval = HEALTH_CHECK_INTERVAL
+
+    def connect(self, timeout: Optional[float] = None, attempts: Optional[int] = -1):
+        """
+        Open a new WayfireSocket, retrying with exponential backoff.
+
+        :param timeout: Reply timeout for the socket, None to block
+        :param attempts: Overrides the manager's attempts
+        """
+        from wayfire import WayfireSocket
+
+        attempts = self.attempts if attempts == -1 else attempts
+        delays = backoff()
+        tried = 0
+        while True:
+            tried += 1
+            try:
+                sock = WayfireSocket(self.socket_name)
+                sock.client.settimeout(timeout)
+                return sock
+            except OSError:
+                if attempts is not None and tried >= attempts:
+                    raise
+                time.sleep(next(delays))
+
+    def request(self):
+        """The shared request connection, connecting or reconnecting as needed."""
+        now = time.monotonic()
+        if (
+            self._socket is not None
+            and self.health_check_interval is not None
+            and now - self._last_used > self.health_check_interval
+            and not self.healthy()
+        ):
+            self.drop()
+        if self._socket is None:
+            self._socket = self.connect(request_timeout())
+        self._last_used = now
+        return self._socket
+
+    def utils(self):
+        """WayfireUtils bound to the request connection."""
+        sock = self.request()
+        if self._utils is None:
+            from wayfire.extra.ipc_utils import WayfireUtils
+            self._utils = WayfireUtils(sock)
+        return self._utils
+
+    def healthy(self) -> bool:
+        """Ping the request connection with a cheap request."""
+        if self._socket is None:
+            return False
+        try:
+            self._socket.send_json({"method": "list-methods", "data": {}})
+            return True
+        except Exception:
+            return False
+
+    def drop(self) -> None:
+        """Close the request connection; the next request reconnects."""
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = None
+        self._utils = None
+
+    def watch(self, events: Optional[List[str]] = None, tick: Optional[float] = None) -> Iterator[Optional[dict]]:
+        """
+        Yield events from a dedicated connection, forever.
+
+        When the connection fails, it is reopened with backoff and the same
+        events are subscribed to again, so consumers survive compositor
+        restarts. Events emitted while disconnected are lost.
+
+        :param events: Event types to subscribe to, None for all
+        :param tick: See wfctl.monitor.socket_events
+        """
+        from wfctl.monitor import socket_events
+
+        while True:
+            sock = self.connect(None, attempts=None)
+            try:
+                sock.watch(events)
+                yield from socket_events(sock, tick)
+            except Exception as e:
+                if not is_connection_error(e):
+                    raise
+                print(f"Error: event connection lost: {e}; reconnecting", file=sys.stderr)
+            finally:
+                sock.close()
+
+
+manager = ConnectionManager()
+
+# Per-thread binding to another compositor, see use_socket.
+_local = threading.local()
+
+
+def current_manager() -> ConnectionManager:
+    """The manager this thread's requests go through: one bound by use_socket, else the shared one."""
+    return getattr(_local, "manager", None) or manager
+
+
+def socket_path() -> Optional[str]:
+    """Socket of the compositor this thread talks to."""
+    return current_manager().socket_name or os.getenv("WAYFIRE_SOCKET")
+
+
+@contextlib.contextmanager
+def use_socket(socket_name: str) -> Iterator[ConnectionManager]:
+    """
+    Point this thread's shared handles at another compositor.
+
+    Within the block, sock, utils, the snapshot cache and new pipelined
+    connections all use socket_name, so command handlers can run against
+    several compositors from concurrent threads. The connection opened for
+    the block is closed when it ends.
+    """
+    from wfctl.cache import use_cache, create_cache
+
+    previous = getattr(_local, "manager", None)
+    bound = _local.manager = ConnectionManager(socket_name)
+    try:
+        with use_cache(create_cache(socket_name)):
+            yield bound
+    finally:
+        bound.drop()
+        _local.manager = previous
+
+
+def get_socket():
+    """Return the shared WayfireSocket, connecting on first use."""
+    return current_manager().request()
+
+
+def get_utils():
+    """Return the shared WayfireUtils bound to the shared socket."""
+    return current_manager().utils()
+
+
+def reset() -> None:
+    """Close the shared connection; the next use reconnects to $WAYFIRE_SOCKET."""
+    from wfctl.cache import current_cache
+    current_cache().invalidate()
+    current_manager().drop()
+
+
+class _Lazy:
+    """
+    Proxy that resolves its target only when an attribute is first used.
+
+    A call that fails because the connection broke drops it, so the next
+    call reconnects instead of reusing a dead or out-of-sync socket.
+
+    :param owner: Manager whose connection the factory returns, defaults to the shared one
+    """
+
+    def __init__(self, factory, owner: Optional[ConnectionManager] = None) -> None:
+        self._factory = factory
+        self._owner = owner
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._factory(), name)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            try:
+                return value(*args, **kwargs)
+            except Exception as e:
+                if is_connection_error(e):
+                    (self._owner or current_manager()).drop()
+                raise
+        return call
+
+
+# Module level handles shared by every handler; nothing connects until used.
+sock = _Lazy(get_socket)
+utils = _Lazy(get_utils)
@@ -0,0 +1,184 @@
+import contextlib
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+# The daemon speaks the same framing as the Wayfire IPC itself: a 4 byte
+# little-endian length header followed by a JSON document.
+HEADER_SIZE = 4
+
+# Commands that block for a long time run in the calling process, since the
+# daemon serves one client at a time.
+LOCAL_COMMANDS = ("wait", "record", "replay", "rules")
+
+# Commands taking file paths, by the number of words in their name. Their
+# paths are made absolute before forwarding, since the daemon has its own
+# working directory.
+PATH_COMMANDS = {"apply": 1, "save layout": 2, "restore options": 2}
+
+
+def daemon_socket_path() -> str:
+    """Return the Unix socket path the daemon listens on."""
+    path = os.getenv("WFCTL_DAEMON_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR") or "/tmp"
+    # One daemon per compositor, so nested or multiple sessions never share one.
+    wayfire_socket = os.path.basename(os.getenv("WAYFIRE_SOCKET") or "wayfire")
+    return os.path.join(runtime_dir, f"wfctl-{wayfire_socket}.sock")
+
+
+def send_message(conn: socket.socket, msg: Dict[str, Any]) -> None:
+    """Send a length-prefixed JSON message."""
+    data = json.dumps(msg).encode("utf8")
+    conn.sendall(len(data).to_bytes(HEADER_SIZE, byteorder="little") + data)
+
+
+def read_exact(conn: socket.socket, n: int) -> bytes:
+    """Read exactly n bytes from the connection."""
+    chunks = []
+    while n > 0:
+        chunk = conn.recv(n)
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_message(conn: socket.socket) -> Dict[str, Any]:
+    """Read a length-prefixed JSON message."""
+    size = int.from_bytes(read_exact(conn, HEADER_SIZE), byteorder="little")
+    return json.loads(read_exact(conn, size))
+
+
+def absolute_paths(argv: List[str]) -> List[str]:
+    """
+    Return a command line with the file arguments of PATH_COMMANDS made absolute.
+
+    :param argv: Command words and their own flags, without output options
+    """
+    for name, words in PATH_COMMANDS.items():
+        if argv[:words] == name.split():
+            return argv[:words] + [
+                arg if arg.startswith("-") else os.path.abspath(arg) for arg in argv[words:]
+            ]
+    return argv
+
+
+def forward(argv: List[str]) -> Optional[int]:
+    """
+    Forward a command line to a running daemon and print its output.
+
+    :param argv: Command line arguments, without the program name
+    :return: Exit status of the command, 1 if the daemon accepted the connection
+        but gave no answer, or None if no daemon is reachable
+    """
+    if os.getenv("WFCTL_NO_DAEMON") or (argv and argv[0] in LOCAL_COMMANDS):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(daemon_socket_path())
+    except OSError:
+        client.close()
+        return None
+
+    with client:
+        try:
+            send_message(client, {"argv": argv})
+            response = read_message(client)
+        except (OSError, ValueError) as e:
+            # The daemon may already have run the command, so it is not retried here.
+            print(f"Error: wfctl daemon failed to answer: {e}")
+            return 1
+
+    sys.stdout.write(response.get("output", ""))
+    sys.stdout.flush()
+    return response.get("status", 0)
+
+
+def run_command(argv: List[str]) -> Dict[str, Any]:
+    """Run a command line in this process and capture what it prints."""
+    from wfctl.ipc import capture_command
+    from wfctl.output import pop_output_options, using
+
+    try:
+        argv, fmt, fields = pop_output_options(argv)
+    except ValueError as e:
+        return {"output": f"Error: {e}\n", "status": 1}
+    with using(fmt, fields):
+        output, status = capture_command(" ".join(argv))
+    return {"output": output, "status": status}
+
+
+def mirror_events() -> None:
+    """Keep a state mirror and the snapshot cache current from compositor events."""
+    import time
+    from wfctl.cache import cache
+    from wfctl.connection import backoff, is_connection_error, manager
+    from wfctl import mirror
+
+    state = mirror.StateMirror()
+    mirror.activate(state)
+    delays = backoff()
+    while True:
+        try:
+            # Events and seeding use their own connections so they never race forwarded commands.
+            state.run(lambda: manager.connect(None, attempts=None), on_event=cache.invalidate_for_event)
+        except Exception as e:
+            if not is_connection_error(e):
+                # Queries fall back to the snapshot cache and its TTLs.
+                print(f"Error: event watch stopped: {e}", file=sys.stderr)
+                return
+            print(f"Error: event connection lost: {e}; reconnecting", file=sys.stderr)
+        if state.ready.is_set():
+            # The connection was up; start the next outage with short delays again.
+            state.ready.clear()
+            delays = backoff()
+        cache.invalidate()
+        time.sleep(next(delays))
+
+
+def serve(path: Optional[str] = None) -> None:
+    """Keep one compositor connection warm and serve commands on a Unix socket."""
+    from wfctl.connection import get_socket, manager
+    import wfctl.ipc  # noqa: F401
+
+    manager.keep_alive()
+    # Connect up front so the first forwarded command is already warm.
+    get_socket()
+    threading.Thread(target=mirror_events, daemon=True).start()
+
+    path = path or daemon_socket_path()
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o600)
+    server.listen(16)
+
+    def shutdown(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, shutdown)
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    request = read_message(conn)
+                    send_message(conn, run_command(request.get("argv", [])))
+                except (OSError, ValueError) as e:
+                    print(f"Error: {e}", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
@@ -0,0 +1,109 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Entry point group third-party packages use to contribute commands.
+ENTRY_POINT_GROUP = "wfctl.commands"
+
+# code.co_flags bit set when a function accepts *args.
+_CO_VARARGS = 0x04
+
+# Key under which a trie node stores the command that ends at that node.
+_END = None
+
+
+def takes_arguments(func: Callable) -> bool:
+    """Check once, at registration time, whether a handler accepts the command string."""
+    code = getattr(func, "__code__", None)
+    if code is not None:
+        # Plain functions, lambdas and bound methods: no need to pay for inspect.
+        bound = 1 if getattr(func, "__self__", None) is not None else 0
+        return code.co_argcount - bound > 0 or bool(code.co_flags & _CO_VARARGS)
+    import inspect
+    return len(inspect.signature(func).parameters) > 0
+
+
+class CommandTrie:
+    """Token-prefix trie mapping command words to handlers, matched longest first."""
+
+    def __init__(self) -> None:
+        self._root: Dict[Any, Any] = {}
+
+    def register(self, name: str, handler: Callable) -> None:
+        """Register handler under the space separated command name."""
+        node = self._root
+        for token in name.split():
+            node = node.setdefault(token, {})
+        node[_END] = (name, handler, takes_arguments(handler))
+
+    def match(self, command: str) -> Optional[Tuple[str, Callable, bool]]:
+        """
+        Find the longest registered command that prefixes the given command line.
+
+        :param command: Full command line, e.g. "get view 42"
+        :return: Tuple of (command name, handler, takes arguments) or None
+        """
+        node = self._root
+        found = None
+        for token in command.split():
+            node = node.get(token)
+            if node is None:
+                break
+            found = node.get(_END, found)
+        return found
+
+    def names(self) -> list:
+        """Return every registered command name."""
+        names = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for key, value in node.items():
+                if key is _END:
+                    names.append(value[0])
+                else:
+                    stack.append(value)
+        return sorted(names)
+
+
+commands = CommandTrie()
+_plugins_loaded = False
+
+
+def register_command(name: str, handler: Optional[Callable] = None):
+    """
+    Register a command handler; usable directly or as a decorator.
+
+    Handlers either take no arguments or take the full command string.
+
+    :param name: Space separated command words, e.g. "list views"
+    :param handler: Handler function
+    """
+    if handler is None:
+        def decorator(func: Callable) -> Callable:
+            commands.register(name, func)
+            return func
+        return decorator
+    commands.register(name, handler)
+    return handler
+
+
+def load_plugins() -> None:
+    """Load commands contributed through the wfctl.commands entry point group."""
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    from importlib.metadata import entry_points
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            entry_point.load()()
+        except Exception as e:
+            print(f"Error: failed to load plugin '{entry_point.name}': {e}")
+
+
+def lookup(command: str) -> Optional[Tuple[str, Callable, bool]]:
+    """Resolve a command line, loading plugin commands only when no builtin matches."""
+    found = commands.match(command)
+    if found is None and not _plugins_loaded:
+        load_plugins()
+        found = commands.match(command)
+    return found
@@ -0,0 +1,173 @@
+"""
+Run one command against many Wayfire instances at once.
+
+    wfctl --sockets /run/user/1000/wayfire-seat1.socket,/run/user/1000/wayfire-seat2.socket list outputs
+    wfctl --sockets 'wayfire-*.socket' set option core/vwidth=3
+
+Names without a slash are looked up in $XDG_RUNTIME_DIR, and shell-style
+patterns match every socket there. Each instance is served by its own
+thread with its own connection and snapshot cache, and what the command
+prints is captured per thread. The results are merged into one record per
+instance, tagged with its socket and timing, and the totals go to stderr.
+"""
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+# Upper bound on instances served concurrently.
+MAX_WORKERS = 32
+
+
+def pop_sockets(argv: List[str]) -> Tuple[List[str], Optional[str]]:
+    """
+    Remove --sockets SPEC or --sockets=SPEC from a command line.
+
+    :return: Tuple of (remaining arguments, SPEC or None)
+    :raises ValueError: If --sockets has no value
+    """
+    rest = []
+    spec = None
+    args = iter(argv)
+    for arg in args:
+        if arg == "--sockets":
+            spec = next(args, None)
+            if spec is None:
+                raise ValueError("--sockets requires socket paths or a pattern")
+        elif arg.startswith("--sockets="):
+            spec = arg[len("--sockets="):]
+        else:
+            rest.append(arg)
+    return rest, spec
+
+
+def expand_sockets(spec: str) -> List[str]:
+    """Socket paths for comma separated paths, names and patterns, without duplicates."""
+    import glob
+
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR") or "/tmp"
+    paths: List[str] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "/" not in part:
+            part = os.path.join(runtime_dir, part)
+        matches = sorted(glob.glob(part)) if any(c in part for c in "*?[") else [part]
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+class ThreadStdout:
+    """Stand-in for sys.stdout sending each capturing thread's writes to its own buffer."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self._local = threading.local()
+
+    def _target(self) -> TextIO:
+        buffer = getattr(self._local, "buffer", None)
+        return self.stream if buffer is None else buffer
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+    @contextlib.contextmanager
+    def redirect(self, buffer: io.StringIO):
+        """Capture this thread's output in buffer, like contextlib.redirect_stdout for one thread."""
+        previous = getattr(self._local, "buffer", None)
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = previous
+
+
+def run_on(socket_name: str, command: str, stdout: ThreadStdout) -> Dict[str, Any]:
+    """Run command against one instance and describe the outcome."""
+    from wfctl.batch import parse_output
+    from wfctl.connection import use_socket
+    from wfctl.ipc import capture_command
+
+    start = time.perf_counter()
+    with use_socket(socket_name):
+        output, code = capture_command(command, stdout.redirect)
+    record: Dict[str, Any] = {
+        "socket": socket_name,
+        "ok": code == 0,
+        "ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+    if code == 0:
+        record["result"] = parse_output(output)
+    else:
+        record["error"] = output.strip().removeprefix("Error:").strip()
+    return record
+
+
+def run_fleet(sockets: List[str], command: str, fields: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Run command against every socket concurrently.
+
+    :param fields: --fields projection applied to each instance's result
+    :return: One record per socket, in the order given
+    """
+    from wfctl.output import using
+
+    stdout = ThreadStdout(sys.stdout)
+    sys.stdout = stdout
+    try:
+        # Results are embedded in the records, so each is captured as one compact document.
+        with using("compact", fields):
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(sockets))) as pool:
+                return list(pool.map(lambda socket_name: run_on(socket_name, command, stdout), sockets))
+    finally:
+        sys.stdout = stdout.stream
+
+
+def fleet_main(argv: List[str], fmt: str, fields: Optional[str] = None) -> int:
+    """Entry point for `wfctl --sockets SPEC COMMAND`; returns 1 if any instance failed."""
+    from wfctl.ipc import lookup
+    from wfctl.output import emit, using
+
+    try:
+        argv, spec = pop_sockets(argv)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    sockets = expand_sockets(spec or "")
+    if not sockets:
+        print(f"Error: No Wayfire sockets match '{spec}'.")
+        return 1
+    command = " ".join(argv)
+    if not command:
+        print("Error: No command provided.")
+        return 1
+    # Resolved once up front, which also loads plugin commands before threads start.
+    if not lookup(command):
+        print(f"Error: Unknown command '{command}'")
+        return 1
+
+    start = time.perf_counter()
+    records = run_fleet(sockets, command, fields)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    with using(fmt):
+        emit(records)
+    failed = sum(not record["ok"] for record in records)
+    slowest = max(records, key=lambda record: record["ms"])
+    print(
+        f"{len(records)} instances, {len(records) - failed} ok, {failed} failed in {elapsed:.1f} ms"
+        f" (slowest {slowest['ms']:.1f} ms, {slowest['socket']})",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
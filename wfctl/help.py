@@ -1,21 +1,42 @@
 import argparse
+from wfctl.output import FORMATS
 
 def usage():
     parser = argparse.ArgumentParser(description="A command-line tool for interacting with Wayfire.")
     
+    parser.add_argument("--format", choices=FORMATS,
+                        help="Output format for results; indented json on a terminal, compact otherwise.")
+    parser.add_argument("--fields", metavar="a,b.c",
+                        help="Only output these comma separated, dotted keys of each result, e.g. id,app-id,geometry.x.")
+    parser.add_argument("--sockets", metavar="PATHS",
+                        help="Run the command on several Wayfire instances concurrently: comma separated socket paths, or names and patterns in $XDG_RUNTIME_DIR such as 'wayfire-*.socket'.")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep a warm compositor connection and serve commands on $WFCTL_DAEMON_SOCKET; other wfctl calls use it while it runs, unless $WFCTL_NO_DAEMON is set.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Run newline-separated commands from FILE (- for stdin) on one connection, printing one JSON result per line; exits with status 1 if any command failed.")
+    parser.add_argument("--stop-on-error", action="store_true",
+                        help="With --batch, stop at the first command that fails.")
+    parser.add_argument("--profile", nargs="?", const="text", metavar="MODE",
+                        help="Time startup, imports, dispatch, each IPC method, JSON decoding and output; MODE is text (default, on stderr), json, or a file to write a Chrome trace to. Pass it as --profile=MODE.")
+
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Define all commands and their descriptions
     subparsers.add_parser("list views", help="List all views currently available.")
+    search_views_parser = subparsers.add_parser("search views", help="Search views, e.g. wfctl search views 'app-id=kitty or title~^Inbox'.")
+    search_views_parser.add_argument("query", help="Terms like field=value, field~regex or field>number combined with and/or/not.")
     subparsers.add_parser("list outputs", help="List all outputs connected to the system.")
     
     switch_workspace_parser = subparsers.add_parser("set workspace", help="Switch to a specific workspace.")
-    switch_workspace_parser.add_argument("workspace_number", type=int, help="The workspace number to switch to.")
+    switch_workspace_parser.add_argument("workspace_number", type=int, help="The workspace number to switch to, counted row by row from 1 at the top left.")
     
     subparsers.add_parser("get focused output", help="Get the currently focused output.")
     subparsers.add_parser("get focused view", help="Get the currently focused view.")
     subparsers.add_parser("get focused workspace", help="Get the currently focused workspace.")
-    subparsers.add_parser("next workspace", help="Switch to the next workspace.")
+    subparsers.add_parser("next workspace", help="Switch to the next workspace, wrapping around.")
+    subparsers.add_parser("prev workspace", help="Switch to the previous workspace, wrapping around.")
+    workspace_parser = subparsers.add_parser("workspace", help="Switch to the adjacent workspace.")
+    workspace_parser.add_argument("direction", choices=["left", "right", "up", "down"], help="Direction to switch in.")
     subparsers.add_parser("fullscreen view", help="Set fullscreen the view from the given id.")
     
     get_view_info_parser = subparsers.add_parser("get view info", help="Get information about a specific view using a given {view_id}.")
@@ -29,7 +50,24 @@ def usage():
     move_view_parser.add_argument("view_id", type=int, help="The ID of the view to move.")
     move_view_parser.add_argument("x", type=int, help="The new x-coordinate of the view.")
     move_view_parser.add_argument("y", type=int, help="The new y-coordinate of the view.")
+
+    move_views_parser = subparsers.add_parser("move views", help="Move many views in one pipelined round-trip, wfctl move views {view_id}:x:y {view_id}:x:y ...")
+    move_views_parser.add_argument("moves", nargs="+", metavar="view_id:x:y", help="A view ID and its new x and y coordinates.")
+
+    resize_views_parser = subparsers.add_parser("resize views", help="Resize many views in one pipelined round-trip, wfctl resize views {view_id}:width:height ...")
+    resize_views_parser.add_argument("sizes", nargs="+", metavar="view_id:width:height", help="A view ID and its new width and height.")
+
+    move_to_workspace_parser = subparsers.add_parser("move view to workspace", help="Move a view to a workspace, wfctl move view to workspace N [VIEW_ID] [--follow].")
+    move_to_workspace_parser.add_argument("workspace_number", type=int, help="The workspace to move the view to.")
+    move_to_workspace_parser.add_argument("view_id", type=int, nargs="?", help="The ID of the view to move, defaults to the focused view.")
+    move_to_workspace_parser.add_argument("--follow", action="store_true", help="Switch to the workspace along with the view.")
     
+    save_layout_parser = subparsers.add_parser("save layout", help="Save the state of every view as a JSON layout, wfctl save layout [FILE].")
+    save_layout_parser.add_argument("file", nargs="?", help="File to write, defaults to standard output.")
+
+    apply_parser = subparsers.add_parser("apply", help="Restore a layout, sending only the changes, wfctl apply layout.json [--dry-run].")
+    apply_parser.add_argument("file", help="Layout written by save layout.")
+
     close_view_parser = subparsers.add_parser("close view", help="Close a view using a given {view_id}.")
     close_view_parser.add_argument("view_id", type=int, help="The ID of the view to close.")
 
@@ -44,7 +82,33 @@ def usage():
     set_view_alpha_parser.add_argument("view_id", type=int, help="The ID of the view to set alpha.")
     set_view_alpha_parser.add_argument("alpha", type=float, help="Float number...")
 
-    subparsers.add_parser("-m", help="watch wayfire IPC events")
+    wait_parser = subparsers.add_parser("wait", help="Block until a state is reached, e.g. wfctl wait view-mapped app-id=foo --timeout 5.")
+    wait_parser.add_argument("condition", help="view-mapped, view-unmapped, focus, workspace or any event name, followed by a view query or workspace number.")
+    wait_parser.add_argument("--timeout", type=float, help="Give up after this many seconds, exiting with status 2.")
+
+    record_parser = subparsers.add_parser("record", help="Append compositor events with their times to a file, wfctl record events.ndjson.")
+    record_parser.add_argument("file", help="File to append to, or - for standard output.")
+    record_parser.add_argument("--events", help="Comma separated event types, all by default.")
+    record_parser.add_argument("--duration", type=float, help="Stop after this many seconds.")
+
+    replay_parser = subparsers.add_parser("replay", help="Feed recorded events to a consumer without a compositor and report throughput.")
+    replay_parser.add_argument("file", help="Recording, or - for standard input.")
+    replay_parser.add_argument("--speed", type=float, help="Replay N times faster than recorded.")
+    replay_parser.add_argument("--max", action="store_true", help="Replay as fast as possible.")
+    replay_parser.add_argument("--into", choices=["monitor", "mirror", "cache", "rules", "null"], help="Consumer to feed, monitor by default.")
+    replay_parser.add_argument("--rules", help="Rules file whose commands to print, with --into rules.")
+
+    rules_parser = subparsers.add_parser("rules", help="Run commands when events match rules from a TOML file, wfctl rules rules.toml.")
+    rules_parser.add_argument("file", help="TOML file of [[rule]] tables with event, app-id, match, actions and cooldown.")
+    rules_parser.add_argument("--dry-run", action="store_true", help="Print the commands instead of running them.")
+    rules_parser.add_argument("--stats", action="store_true", help="Report event, match, action and error counts on stderr at exit.")
+
+    monitor_parser = subparsers.add_parser("-m", help="Watch Wayfire IPC events, printing one JSON object per line.")
+    monitor_parser.add_argument("--events", help="Comma separated event types, e.g. view-mapped,view-focused.")
+    monitor_parser.add_argument("--view-id", help="Comma separated view ids whose events to print.")
+    monitor_parser.add_argument("--app-id", help="Comma separated app-ids whose events to print.")
+    monitor_parser.add_argument("--coalesce", type=float, metavar="MS", help="Merge geometry and title events per view within this many milliseconds.")
+    monitor_parser.add_argument("--stats", action="store_true", help="Report received, emitted, dropped and coalesced counts on stderr at exit.")
 
     subparsers.add_parser("list inputs", help="Lists all input devices currently available in the Wayfire environment")
     
@@ -52,14 +116,17 @@ def usage():
     
     subparsers.add_parser("get option", help="Get wayfire config value from a given option, wfctl get option section/option")
     
-    subparsers.add_parser("set option", help="Set wayfire config value from the given options, wfctl set options section_1/option_1:value_1 section_2/option_2:value_2")
+    subparsers.add_parser("set option", help="Set wayfire config values in a single write, wfctl set option section_1/option_1=value_1 section_2/option_2=value_2")
+    subparsers.add_parser("dump options", help="Read many config options at once, wfctl dump options section_1/option_1 section_2/option_2")
+    subparsers.add_parser("restore options", help="Write options saved by dump options in a single write, wfctl restore options FILE")
     
     subparsers.add_parser("get keyboard", help="Retrieve the current keyboard layout, variant, model and options.")
     
     subparsers.add_parser("set keyboard", help="Set the keyboard layout, variant, model and options.")
     
-    subparsers.add_parser("enable plugin", help="Enable a plugin from a given name.")
-    subparsers.add_parser("disable plugin", help="Disable a plugin from a given name.")
+    subparsers.add_parser("enable plugin", help="Enable plugins from the given names.")
+    subparsers.add_parser("disable plugin", help="Disable plugins from the given names.")
+    subparsers.add_parser("status plugin", help="Tell whether the plugins with the given names are enabled.")
 
     
     args = parser.parse_args()
@@ -1,24 +1,21 @@
-import configparser
+import contextlib
+import io
 import json
-import sys
-import inspect
-from typing import Optional, List, Dict, Any
-from wayfire import WayfireSocket
-from wayfire.extra.ipc_utils import WayfireUtils
-from wfctl.utils import (
-    find_dicts_with_value,
-    workspace_to_coordinates, find_device_id,
-    enable_plugin, disable_plugin,
-    status_plugin
-)
-
-# Initialize WayfireSocket and WayfireUtils
-sock = WayfireSocket()
-utils = WayfireUtils(sock)
-
-# Initialize configparser and load configuration
-config = configparser.ConfigParser()
-config.read('wayfire_config.ini')
+from typing import Optional, List, Dict, Any, Tuple
+from wfctl.cache import current_cache
+from wfctl.dispatch import register_command, lookup
+from wfctl.mirror import active as active_mirror
+from wfctl.output import emit
+from wfctl.search import QueryError
+
+def client():
+    """
+    The shared Client; handlers parse the command line, call it and render what it returns.
+
+    wfctl.api is imported on first use so that startup does not load the wayfire package.
+    """
+    from wfctl.api import default_client
+    return default_client()
 
 def extract_from_dict(data: Dict[str, Any], command: str, max_len: int) -> Optional[Any]:
     """Extract value from dictionary based on command."""
@@ -27,105 +24,131 @@ def extract_from_dict(data: Dict[str, Any], command: str, max_len: int) -> Optio
         return data.get(key[-1], "Key not found")
     return None
 
-def handle_list_views() -> None:
+def handle_list_views(command: str) -> None:
     """Handle the 'list views' command."""
-    views = sock.list_views()
-    parts = sys.argv[1:]
+    parts = command.split()
     if len(parts) > 2:
         value = parts[-1]
         if value.isdigit():
             print("Error: Integer value is not allowed for filtering.")
         else:
-            result = find_dicts_with_value(views, value)
+            try:
+                result = client().views(" ".join(parts[2:]))
+            except QueryError as e:
+                print(f"Error: {e}")
+                return
             if result:
-                views = result
-                focused_id = sock.get_focused_view()["id"]
-                views = [view for view in views if view["id"] != focused_id]
+                focused_view = client().focused_view()
+                focused_id = focused_view.id if focused_view else None
+                emit([view for view in result.raw if view["id"] != focused_id])
+                return
 
-    formatted_output = json.dumps(views, indent=4)
-    print(formatted_output)
+    emit(client().views().raw)
 
 def handle_list_outputs() -> None:
     """Handle the 'list outputs' command."""
-    s = sock.list_outputs()
-    formatted_output = json.dumps(s, indent=4)
-    print(formatted_output)
+    emit(client().outputs().raw)
 
 def handle_search_views(command: str) -> None:
     """Handle the 'search views' command."""
-    
-    def is_numeric(value: str) -> bool:
-        """Check if a string represents a numeric value (including negative numbers)."""
-        if value.startswith('-'):
-            return value[1:].isdigit() and len(value) > 1  # Ensure that there's at least one digit after '-'
-        return value.isdigit()
-
-    def exclude_focused_view(views: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
-        """Exclude the focused view from the list of views."""
-        if views is None:
-            return []
-        focused_view = sock.get_focused_view()
-        return [view for view in views if view != focused_view]
-
-    def format_find_views_output(value: Any, key: Optional[str] = None) -> str:
-        """Format the output from utils.find_views and filter out the focused view."""
-        # Convert value to integer if it is numeric
-        if is_numeric(value) or "-" in value:
-            value = int(value)
-
-        views = utils.find_views(value, key)
-        views = exclude_focused_view(views)
-        return json.dumps(views, indent=4) if views else json.dumps([])
+    parts = command.split()[2:]
+    if not parts:
+        print("Error: Invalid command format.")
+        return
 
-    parts = command.split()
-    if len(parts) == 3:
-        value = parts[2]
-        key = None
-        print(format_find_views_output(value, key))  # Pass only value
-    elif len(parts) == 4:
-        value = parts[2]
-        key = parts[3]
-        print(format_find_views_output(value, key))  # Pass value and key
+    # Legacy form: 'search views VALUE KEY' matches one field exactly.
+    if len(parts) == 2 and not any(op in "".join(parts) for op in "=~<>") and "or" not in parts and "not" not in parts:
+        query = f"{parts[1]}={parts[0]}"
     else:
-        print("Error: Invalid command format.")
+        query = " ".join(parts)
+
+    try:
+        result = client().views(query)
+    except QueryError as e:
+        print(f"Error: {e}")
+        return
+    focused_view = client().focused_view()
+    focused_id = focused_view.id if focused_view else None
+    emit([view for view in result.raw if view["id"] != focused_id])
 
 def handle_set_workspace(command: str) -> None:
     """Handle the 'set workspace' command."""
     try:
-        workspace_number = int(sys.argv[1:][-1])
-        x, y  = utils._total_workspaces()[workspace_number]
-        sock.set_workspace(x, y)
+        workspace_number = int(command.split()[-1])
+    except ValueError:
+        print("Error: Invalid workspace number.")
+        return
+    try:
+        client().set_workspace(workspace_number)
     except Exception as e:
         print(f"Error: {e}")
 
 def handle_get_focused_output(command: str) -> None:
     """Handle the 'get focused output' command."""
-    s = sock.get_focused_output()
+    output = client().focused_output()
+    if output is None:
+        print("Error: no focused output")
+        return
+    s = output.raw
     key = extract_from_dict(s, command, 3)
     if key:
         print(key)
     else:
-        formatted_output = json.dumps(s, indent=4)
-        print(formatted_output)
+        emit(s)
 
 def handle_get_focused_view(command: str) -> None:
     """Handle the 'get focused view' command."""
-    s = sock.get_focused_view()
+    view = client().focused_view()
+    if view is None:
+        print("Error: no focused view")
+        return
+    s = view.raw
     key = extract_from_dict(s, command, 3)
     if key:
         print(key)
     else:
-        formatted_output = json.dumps(s, indent=4)
-        print(formatted_output)
+        emit(s)
 
 def handle_get_focused_workspace() -> None:
     """Handle the 'get focused workspace' command."""
-    s = utils.get_active_workspace_number()
-    print(s)
+    print(client().workspace().number)
+
+def handle_next_workspace(command: str) -> None:
+    """Handle the 'next workspace' and 'prev workspace' commands, wrapping around the grid."""
+    try:
+        client().next_workspace(-1 if command.startswith("prev") else 1)
+    except Exception as e:
+        print(f"Error: {e}")
 
-def handle_next_workspace() -> None:
-    """Handle the 'next workspace' command."""
-    utils.go_next_workspace()
+def handle_workspace_direction(command: str) -> None:
+    """Handle the 'workspace left|right|up|down' commands; nothing happens at the grid edge."""
+    from wfctl.workspace import DIRECTIONS
+    parts = command.split()
+    if len(parts) != 2 or parts[1] not in DIRECTIONS:
+        print("Error: Usage: wfctl workspace left|right|up|down")
+        return
+    try:
+        client().workspace_towards(parts[1])
+    except Exception as e:
+        print(f"Error: {e}")
+
+def handle_move_view_to_workspace(command: str) -> None:
+    """Handle the 'move view to workspace' command, wfctl move view to workspace N [VIEW_ID] [--follow]."""
+    parts = command.split()[4:]
+    follow = "--follow" in parts
+    parts = [part for part in parts if part != "--follow"]
+    try:
+        if not 1 <= len(parts) <= 2:
+            raise ValueError
+        workspace_number = int(parts[0])
+        view_id = int(parts[1]) if len(parts) == 2 else None
+    except ValueError:
+        print("Error: Usage: wfctl move view to workspace N [VIEW_ID] [--follow]")
+        return
+    try:
+        client().move_view_to_workspace(workspace_number, view_id, follow)
+    except Exception as e:
+        print(f"Error: {e}")
 
 def handle_fullscreen_view(command: str) -> None:
     """Handle the 'fullscreen view' command."""
@@ -133,7 +156,7 @@ def handle_fullscreen_view(command: str) -> None:
         parts = command.split()
         id = int(parts[2])
         state = parts[-1] == "true"
-        sock.set_view_fullscreen(id, state)
+        client().fullscreen_view(id, state)
     except ValueError:
         print("Error: Invalid view ID or state.")
     except Exception as e:
@@ -143,13 +166,12 @@ def handle_get_view(command: str) -> None:
     """Handle the 'get view' command."""
     try:
         id = int(command.split()[-1])
-        s = sock.get_view(id)
+        s = client().view(id).raw
         key = extract_from_dict(s, command, 3)
         if key:
             print(key)
         else:
-            formatted_output = json.dumps(s, indent=4)
-            print(formatted_output)
+            emit(s)
     except ValueError:
         print("Error: Invalid view ID.")
     except Exception as e:
@@ -162,8 +184,7 @@ def handle_resize_view(command: str) -> None:
         id = int(parts[2])
         width = int(parts[3])
         height = int(parts[4])
-        geo = sock.get_view(id)["base-geometry"]
-        sock.configure_view(id, geo["x"], geo["y"], width, height)
+        client().resize_view(id, width, height)
     except ValueError:
         print("Error: Invalid view ID, width, or height.")
     except Exception as e:
@@ -176,18 +197,83 @@ def handle_move_view(command: str) -> None:
         id = int(parts[2])
         x = int(parts[3])
         y = int(parts[4])
-        geo = sock.get_view(id)["base-geometry"]
-        sock.configure_view(id, x, y, geo["width"], geo["height"])
+        client().move_view(id, x, y)
     except ValueError:
         print("Error: Invalid view ID, x, or y.")
     except Exception as e:
         print(f"Error: {e}")
 
+def parse_view_specs(command: str, skip: int) -> List[Tuple[int, int, int]]:
+    """Parse ID:A:B arguments following the command words."""
+    specs = []
+    for spec in command.split()[skip:]:
+        view_id, a, b = spec.split(":")
+        specs.append((int(view_id), int(a), int(b)))
+    return specs
+
+def handle_bulk_configure(command: str, action: str) -> None:
+    """Handle the 'move views' and 'resize views' commands with pipelined IPC."""
+    import asyncio
+    from wfctl.aio import configure_views
+    try:
+        specs = parse_view_specs(command, 2)
+    except ValueError:
+        print("Error: Expected arguments of the form ID:A:B.")
+        return
+    if action == "move":
+        changes = [(id, a, b, None, None) for id, a, b in specs]
+    else:
+        changes = [(id, None, None, a, b) for id, a, b in specs]
+    try:
+        errors = asyncio.run(configure_views(changes))
+    except Exception as e:
+        print(f"Error: {e}")
+        return
+    for view_id, error in errors.items():
+        print(f"Error: view {view_id}: {error}")
+
+def handle_apply_layout(command: str) -> None:
+    """Handle the 'apply' command, wfctl apply layout.json [--dry-run]."""
+    import asyncio
+    from wfctl.layout import apply_layout
+    parts = command.split()[1:]
+    dry_run = "--dry-run" in parts
+    paths = [part for part in parts if part != "--dry-run"]
+    if len(paths) != 1:
+        print("Error: Usage: wfctl apply FILE [--dry-run]")
+        return
+    try:
+        with open(paths[0]) as f:
+            layout = json.load(f)
+        report = asyncio.run(apply_layout(layout, dry_run=dry_run))
+    except Exception as e:
+        print(f"Error: {e}")
+        return
+    for error in report.pop("errors", ()):
+        print(f"Error: {error}")
+    emit(report)
+
+def handle_save_layout(command: str) -> None:
+    """Handle the 'save layout' command, wfctl save layout [FILE]."""
+    import asyncio
+    from wfctl.layout import save_layout
+    parts = command.split()[2:]
+    try:
+        layout = asyncio.run(save_layout())
+        if parts:
+            with open(parts[0], "w") as f:
+                json.dump(layout, f, indent=4)
+                f.write("\n")
+        else:
+            emit(layout)
+    except Exception as e:
+        print(f"Error: {e}")
+
 def handle_close_view(command: str) -> None:
     """Handle the 'close view' command."""
     try:
         id = int(command.split()[-1])
-        sock.close_view(id)
+        client().close_view(id)
     except ValueError:
         print("Error: Invalid view ID.")
     except Exception as e:
@@ -199,7 +285,7 @@ def handle_minimize_view(command: str) -> None:
         parts = command.split()
         id = int(parts[2])
         status = parts[3] == "true"
-        sock.set_view_minimized(id, status)
+        client().minimize_view(id, status)
     except ValueError:
         print("Error: Invalid view ID or status.")
     except Exception as e:
@@ -209,7 +295,7 @@ def handle_maximize_view(command: str) -> None:
     """Handle the 'maximize view' command."""
     try:
         id = int(command.split()[-1])
-        utils.set_view_maximized(id )
+        client().maximize_view(id)
     except ValueError:
         print("Error: Invalid view ID.")
     except Exception as e:
@@ -221,7 +307,7 @@ def handle_set_view_alpha(command: str) -> None:
         parts = command.split()
         id = int(parts[3])
         alpha = float(parts[-1])
-        sock.set_view_alpha(id, alpha)
+        client().set_view_alpha(id, alpha)
     except ValueError:
         print("Error: Invalid view ID or alpha value.")
     except Exception as e:
@@ -229,9 +315,7 @@ def handle_set_view_alpha(command: str) -> None:
 
 def handle_list_inputs() -> None:
     """Handle the 'list inputs' command."""
-    s = sock.list_input_devices()
-    formatted_output = json.dumps(s, indent=4)
-    print(formatted_output)
+    emit(client().inputs().raw)
 
 def handle_configure_device(command: str) -> None:
     """Handle the 'configure device' command."""
@@ -240,44 +324,133 @@ def handle_configure_device(command: str) -> None:
         status = parts[-1]
         device_id = parts[2]
         status = status == "enable"
-        device_id = find_device_id(device_id)
-        if device_id:
-            sock.configure_input_device(device_id, status)
+        client().configure_device(device_id, status)
     except Exception as e:
         print(f"Error: {e}")
 
 def handle_get_option(command: str) -> None:
     """Handle the 'get option' command."""
     option = command.split()[-1]
-    value = sock.get_option_value(option)
-    print(value)
+    emit(client().option(option))
+
+def parse_option_assignments(args: List[str]) -> Dict[str, str]:
+    """Parse section/option=value arguments."""
+    options = {}
+    for arg in args:
+        option, sep, value = arg.partition("=")
+        if not sep or "/" not in option:
+            raise ValueError(f"Invalid format for option '{arg}'")
+        options[option] = value
+    return options
 
 def handle_set_option(command: str) -> None:
-    """Handle the 'set option' command."""
-    options = command.split()[2:]
-    all_options = {}
-    for option in options:
-        try:
-            opt, val = option.split("=")
-            all_options[opt] = val
-        except ValueError:
-            print(f"Error: Invalid format for option '{option}'")
-            return
-
-    for option, value in all_options.items():
-        sock.set_option_values(option)
+    """Handle the 'set option' command, wfctl set option section/option=value ..."""
+    try:
+        options = parse_option_assignments(command.split()[2:])
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if not options:
+        print("Error: Usage: wfctl set option section/option=value ...")
+        return
+    try:
+        # One write for all options, so the compositor reloads its config once.
+        client().set_options(options)
+    except Exception as e:
+        print(f"Error: {e}")
+        return
+    for option, value in options.items():
         print(f"Option {option} set to {value}")
 
+def handle_dump_options(command: str) -> None:
+    """Handle the 'dump options' command, wfctl dump options section/option ..."""
+    import asyncio
+    from wfctl.config import read_options
+    options = command.split()[2:]
+    if not options:
+        print("Error: Usage: wfctl dump options section/option ...")
+        return
+    try:
+        emit(asyncio.run(read_options(options)))
+    except Exception as e:
+        print(f"Error: {e}")
+
+def handle_restore_options(command: str) -> None:
+    """Handle the 'restore options' command, wfctl restore options FILE."""
+    parts = command.split()[2:]
+    if len(parts) != 1:
+        print("Error: Usage: wfctl restore options FILE")
+        return
+    try:
+        with open(parts[0]) as f:
+            options = json.load(f)
+        if not isinstance(options, dict):
+            raise ValueError("expected a JSON object of option values")
+        config = client().config()
+        config.update(options)
+        config.commit()
+    except Exception as e:
+        print(f"Error: {e}")
+
 def handle_plugin_action(command: str, action: str) -> None:
-    """Handle plugin-related actions (enable, disable, status)."""
-    plugin_name = command.split()[-1]
+    """Handle plugin-related actions (enable, disable, status) for one or more plugins."""
+    plugin_names = command.split()[2:]
+    if not plugin_names:
+        print(f"Error: Usage: wfctl {action} plugin NAME ...")
+        return
+    try:
+        with client().config() as config:
+            if action == 'enable':
+                config.enable_plugins(*plugin_names)
+            elif action == 'disable':
+                config.disable_plugins(*plugin_names)
+            elif action == 'status':
+                status = config.plugin_status(plugin_names)
+                if len(plugin_names) == 1:
+                    print("plugin enabled" if status[plugin_names[0]] else "plugin disabled")
+                else:
+                    emit(status)
+    except Exception as e:
+        print(f"Error: {e}")
+
+def handle_wait(command: str) -> None:
+    """
+    Handle the 'wait' command, wfctl wait view-mapped app-id=foo --timeout 5.
+
+    Exits with status 2 on a timeout; other errors give the usual status 1.
+    """
+    from wfctl.wait import TIMEOUT_STATUS, WaitTimeout, parse_wait, wait_for
     try:
-        if action == 'enable':
-            enable_plugin(plugin_name)
-        elif action == 'disable':
-            disable_plugin(plugin_name)
-        elif action == 'status':
-            print(status_plugin(plugin_name))
+        condition, timeout = parse_wait(command.split()[1:])
+        emit(wait_for(condition, timeout))
+    except WaitTimeout as e:
+        print(f"Error: {e}")
+        raise SystemExit(TIMEOUT_STATUS)
+    except Exception as e:
+        print(f"Error: {e}")
+
+def handle_record(command: str) -> None:
+    """Handle the 'record' command, wfctl record events.ndjson [--events a,b] [--duration SECONDS]."""
+    from wfctl.record import record_main
+    try:
+        record_main(command.split()[1:])
+    except Exception as e:
+        print(f"Error: {e}")
+
+def handle_replay(command: str) -> None:
+    """Handle the 'replay' command, wfctl replay events.ndjson [--speed N|--max] [--into CONSUMER]."""
+    import sys
+    from wfctl.record import replay_main
+    try:
+        replay_main(command.split()[1:], sys.stdout)
+    except Exception as e:
+        print(f"Error: {e}")
+
+def handle_rules(command: str) -> None:
+    """Handle the 'rules' command, wfctl rules rules.toml [--dry-run] [--stats]."""
+    from wfctl.rules import rules_main
+    try:
+        rules_main(command.split()[1:])
     except Exception as e:
         print(f"Error: {e}")
 
@@ -291,10 +464,17 @@ command_map = {
     "get focused view": handle_get_focused_view,
     "get focused workspace": handle_get_focused_workspace,
     "next workspace": handle_next_workspace,
+    "prev workspace": handle_next_workspace,
+    "workspace": handle_workspace_direction,
     "fullscreen view": handle_fullscreen_view,
     "get view": handle_get_view,
     "resize view": handle_resize_view,
     "move view": handle_move_view,
+    "move view to workspace": handle_move_view_to_workspace,
+    "move views": lambda command: handle_bulk_configure(command, 'move'),
+    "resize views": lambda command: handle_bulk_configure(command, 'resize'),
+    "apply": handle_apply_layout,
+    "save layout": handle_save_layout,
     "close view": handle_close_view,
     "minimize view": handle_minimize_view,
     "maximize view": handle_maximize_view,
@@ -303,27 +483,101 @@ command_map = {
     "configure device": handle_configure_device,
     "get option": handle_get_option,
     "set option": handle_set_option,
+    "dump options": handle_dump_options,
+    "restore options": handle_restore_options,
     "enable plugin": lambda command: handle_plugin_action(command, 'enable'),
     "disable plugin": lambda command: handle_plugin_action(command, 'disable'),
     "status plugin": lambda command: handle_plugin_action(command, 'status'),
+    "wait": handle_wait,
+    "record": handle_record,
+    "replay": handle_replay,
+    "rules": handle_rules,
 }
 
-def has_arguments(func):
-    """Check if a function has any arguments."""
-    signature = inspect.signature(func)
-    return len(signature.parameters) > 0
+for name, handler in command_map.items():
+    register_command(name, handler)
+
+# Commands that only read state; anything else may change it.
+READ_ONLY_PREFIXES = ("get ", "list ", "search ", "status ", "save ", "dump ", "wait ", "record ", "replay ", "rules ")
 
 def execute_command(command: str) -> None:
     """Execute a command based on user input."""
-    cmd = [cmd for cmd in command_map if cmd in command]
-    if cmd:
-        command = cmd[0]
-        exec_function = command_map[command]
-        if has_arguments(exec_function):
-            exec_function(command)
-        else:
-            exec_function()
+    found = lookup(command)
+    if found:
+        name, exec_function, takes_arguments = found
+        try:
+            if takes_arguments:
+                exec_function(command)
+            else:
+                exec_function()
+        finally:
+            if not name.startswith(READ_ONLY_PREFIXES):
+                current_cache().invalidate()
+                mirror = active_mirror()
+                if mirror:
+                    # Read-your-writes: let the mirror see this command's events.
+                    mirror.sync()
     else:
         print(f"Error: Unknown command '{command}'")
 
+def capture_command(command: str, redirect=contextlib.redirect_stdout) -> Tuple[str, int]:
+    """
+    Execute a command and capture what it prints.
 
+    Handlers report failures by printing an "Error:" line rather than raising,
+    so that convention is turned into a non-zero status here.
+
+    :param command: Command string, e.g. "move view 42 0 0"
+    :param redirect: Context manager sending stdout to a buffer, e.g. a thread-local one
+    :return: Tuple of (captured output, exit status)
+    """
+    buffer = io.StringIO()
+    status = 0
+    try:
+        with redirect(buffer):
+            execute_command(command)
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else 1
+    except Exception as e:
+        buffer.write(f"Error: {e}\n")
+        status = 1
+    output = buffer.getvalue()
+    if status == 0 and output.startswith("Error:"):
+        status = 1
+    return output, status
+
+class _StatusWriter:
+    """Pass writes through to a stream, remembering whether the output starts with "Error:"."""
+
+    def __init__(self, stream) -> None:
+        self.stream = stream
+        self.head = ""
+
+    def write(self, text: str) -> int:
+        if len(self.head) < len("Error:"):
+            self.head += text[:len("Error:") - len(self.head)]
+        return self.stream.write(text)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+    @property
+    def failed(self) -> bool:
+        return self.head == "Error:"
+
+def run_command(command: str) -> int:
+    """
+    Execute a command printing straight to stdout, so long outputs and
+    streams are not held back.
+
+    :return: Exit status, by the same convention as capture_command and the daemon
+    """
+    import sys
+
+    writer = _StatusWriter(sys.stdout)
+    sys.stdout = writer
+    try:
+        execute_command(command)
+    finally:
+        sys.stdout = writer.stream
+    return 1 if writer.failed else 0
@@ -0,0 +1,254 @@
+"""
+Declarative window layouts.
+
+A layout is a JSON document listing the desired state of views, each
+selected by a search query (see wfctl.search):
+
+    {"views": [
+        {"match": "app-id=kitty", "output": "DP-1",
+         "geometry": {"x": 0, "y": 0, "width": 960, "height": 1050},
+         "minimized": false, "fullscreen": false, "alpha": 0.9}
+    ]}
+
+Every key but "match" is optional. An entry applies to the first matching
+view no earlier entry claimed, or to all of them with "all": true. When
+several views match, "index": N prefers the Nth of them in list order and
+"title" prefers the one with exactly that title; neither is required to
+match, since titles and window order change between sessions. Saved
+layouts match on app-id and add index and title only for duplicate
+app-ids. An entry whose query is malformed is reported as invalid and the
+others are still applied.
+
+Applying diffs the layout against one snapshot of the compositor and sends
+only the requests that change something, pipelined on a single connection.
+"""
+import shlex
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from wayfire.core.template import get_msg_template
+
+from wfctl.aio import AsyncWayfireSocket, configure_view_message
+from wfctl.search import QueryError, ViewIndex, search
+
+GEOMETRY_KEYS = ("x", "y", "width", "height")
+
+
+def view_geometry(view: Dict[str, Any]) -> Dict[str, int]:
+    return view.get("base-geometry") or view["geometry"]
+
+
+def view_matcher(view: Dict[str, Any]) -> str:
+    """Query selecting a view by app-id."""
+    return f"app-id={shlex.quote(view.get('app-id') or '')}"
+
+
+def layout_entry(view: Dict[str, Any], alpha: Optional[float] = None,
+                 index: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Describe the current state of a view as a layout entry.
+
+    :param index: Position among views with the same app-id, from 1, when there are several
+    """
+    geo = view_geometry(view)
+    entry: Dict[str, Any] = {"match": view_matcher(view)}
+    if index is not None:
+        entry["index"] = index
+        entry["title"] = view.get("title") or ""
+    entry.update({
+        "output": view.get("output-name"),
+        "geometry": {key: geo[key] for key in GEOMETRY_KEYS},
+        "minimized": bool(view.get("minimized")),
+        "fullscreen": bool(view.get("fullscreen")),
+    })
+    if alpha is not None:
+        entry["alpha"] = alpha
+    return entry
+
+
+def layout_entries(layout: Any) -> List[Dict[str, Any]]:
+    """Validate a layout document and return its entries."""
+    entries = layout.get("views") if isinstance(layout, dict) else layout
+    if not isinstance(entries, list):
+        raise ValueError("a layout needs a \"views\" list")
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not isinstance(entry.get("match"), str):
+            raise ValueError(f"layout entry {i} needs a \"match\" query")
+        unknown = set(entry.get("geometry") or {}) - set(GEOMETRY_KEYS)
+        if unknown:
+            raise ValueError(f"layout entry {i} has unknown geometry keys: {', '.join(sorted(unknown))}")
+        index = entry.get("index")
+        if index is not None and (isinstance(index, bool) or not isinstance(index, int) or index < 1):
+            raise ValueError(f"layout entry {i} needs a positive \"index\"")
+        if not isinstance(entry.get("title", ""), str):
+            raise ValueError(f"layout entry {i} needs a string \"title\"")
+    return entries
+
+
+def _preferred(entry: Dict[str, Any], found: List[Dict[str, Any]], claimed: set) -> Optional[Dict[str, Any]]:
+    """The view an entry picks among its matches: by title, then index, then the first unclaimed."""
+    free = [view for view in found if view["id"] not in claimed]
+    if "title" in entry:
+        for view in free:
+            if view.get("title") == entry["title"]:
+                return view
+    index = entry.get("index")
+    if index is not None and index <= len(found) and found[index - 1]["id"] not in claimed:
+        return found[index - 1]
+    return free[0] if free else None
+
+
+def match_layout(entries: List[Dict[str, Any]], views: List[Dict[str, Any]]
+                 ) -> Tuple[List[tuple], List[str], List[Dict[str, str]]]:
+    """
+    Pair layout entries with views.
+
+    :return: Tuple of ([(entry, view), ...], queries that matched no view,
+        [{"match": query, "error": message}, ...] for malformed queries)
+    """
+    index = ViewIndex(views)
+    claimed: set = set()
+    pairs = []
+    unmatched = []
+    invalid = []
+    for entry in entries:
+        try:
+            found = search(views, entry["match"], index)
+        except QueryError as e:
+            invalid.append({"match": entry["match"], "error": str(e)})
+            continue
+        if entry.get("all"):
+            chosen = [view for view in found if view["id"] not in claimed]
+        else:
+            view = _preferred(entry, found, claimed)
+            chosen = [view] if view else []
+        if not chosen:
+            unmatched.append(entry["match"])
+            continue
+        for view in chosen:
+            claimed.add(view["id"])
+            pairs.append((entry, view))
+    return pairs, unmatched, invalid
+
+
+def _flag_message(method: str, view_id: int, state: bool) -> Dict[str, Any]:
+    message = get_msg_template(method)
+    message["data"]["view_id"] = view_id
+    message["data"]["state"] = state
+    return message
+
+
+def _alpha_message(method: str, view_id: int, alpha: Optional[float] = None) -> Dict[str, Any]:
+    message = get_msg_template(method)
+    message["data"]["view-id"] = view_id
+    if alpha is not None:
+        message["data"]["alpha"] = alpha
+    return message
+
+
+def plan_view(entry: Dict[str, Any], view: Dict[str, Any], outputs: Dict[str, int],
+              alpha: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Requests turning view into what entry describes, in the order to send them.
+
+    Flags are cleared before configuring, since Wayfire ignores geometry
+    changes of minimized or fullscreen views, and set afterwards.
+
+    :param outputs: Output name to id
+    :param alpha: Current alpha of the view, if the entry sets one
+    """
+    view_id = view["id"]
+    before: List[Dict[str, Any]] = []
+    after: List[Dict[str, Any]] = []
+    for flag in ("minimized", "fullscreen"):
+        if flag in entry and bool(entry[flag]) != bool(view.get(flag)):
+            message = _flag_message(f"wm-actions/set-{flag}", view_id, bool(entry[flag]))
+            (after if entry[flag] else before).append(message)
+
+    current = view_geometry(view)
+    geometry = dict({key: current[key] for key in GEOMETRY_KEYS}, **(entry.get("geometry") or {}))
+    output_id = outputs.get(entry["output"]) if entry.get("output") else None
+    if output_id == view.get("output-id"):
+        output_id = None
+    if output_id is not None or any(geometry[key] != current[key] for key in GEOMETRY_KEYS):
+        before.append(configure_view_message(
+            view_id, geometry["x"], geometry["y"], geometry["width"], geometry["height"], output_id,
+        ))
+
+    if "alpha" in entry and (alpha is None or abs(alpha - float(entry["alpha"])) > 1e-3):
+        after.append(_alpha_message("wf/alpha/set-view-alpha", view_id, float(entry["alpha"])))
+    return before + after
+
+
+async def read_alphas(sock: AsyncWayfireSocket, view_ids: List[int]) -> Dict[int, float]:
+    """Current alpha of views in one pipelined round; views without one are left out."""
+    replies = await sock.pipeline(_alpha_message("wf/alpha/get-view-alpha", view_id) for view_id in view_ids)
+    return {
+        view_id: reply["alpha"]
+        for view_id, reply in zip(view_ids, replies)
+        if isinstance(reply, dict) and "alpha" in reply
+    }
+
+
+async def save_layout(socket_name: Optional[str] = None) -> Dict[str, Any]:
+    """Capture the layout of all mapped toplevel views."""
+    async with AsyncWayfireSocket(socket_name) as sock:
+        views = [
+            view for view in await sock.list_views()
+            if view.get("role") == "toplevel" and view.get("mapped", True)
+        ]
+        alphas = await read_alphas(sock, [view["id"] for view in views])
+    # Views sharing an app-id are told apart by their position among each other.
+    counts = Counter(view.get("app-id") for view in views)
+    seen: Counter = Counter()
+    entries = []
+    for view in views:
+        app_id = view.get("app-id")
+        seen[app_id] += 1
+        entries.append(layout_entry(view, alphas.get(view["id"]), seen[app_id] if counts[app_id] > 1 else None))
+    return {"views": entries}
+
+
+async def apply_layout(layout: Any, socket_name: Optional[str] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Bring views to the state a layout describes.
+
+    One round reads views and outputs, a second reads alpha for entries that
+    set it, and a last one sends every change.
+
+    :param dry_run: Only report the requests that would be sent
+    :return: Report with the planned requests, unmatched and invalid queries and errors
+    """
+    entries = layout_entries(layout)
+    async with AsyncWayfireSocket(socket_name) as sock:
+        views, outputs = await sock.pipeline([
+            get_msg_template("window-rules/list-views"),
+            get_msg_template("window-rules/list-outputs"),
+        ])
+        for reply in (views, outputs):
+            if isinstance(reply, Exception):
+                raise reply
+        pairs, unmatched, invalid = match_layout(entries, views or [])
+        alphas = await read_alphas(sock, [view["id"] for entry, view in pairs if "alpha" in entry])
+
+        output_ids = {output["name"]: output["id"] for output in outputs or []}
+        requests = []
+        for entry, view in pairs:
+            requests.extend(plan_view(entry, view, output_ids, alphas.get(view["id"])))
+
+        errors = []
+        if not dry_run and requests:
+            for request, reply in zip(requests, await sock.pipeline(requests)):
+                if isinstance(reply, Exception):
+                    errors.append(f"{request['method']} {request['data']}: {reply}")
+
+    report: Dict[str, Any] = {
+        "matched": len(pairs),
+        "unmatched": unmatched,
+        "requests": requests if dry_run else len(requests),
+    }
+    if invalid:
+        report["invalid"] = invalid
+    if errors:
+        report["errors"] = errors
+    return report
@@ -1,20 +1,56 @@
+import os
 import sys
-from wfctl.ipc import execute_command
-from wfctl.help import usage
-from wfctl.utils import watch_events
+from wfctl.daemon import absolute_paths, forward
+
+def usage() -> None:
+    """Print usage; argparse is only imported when help is actually shown."""
+    from wfctl.help import usage as print_usage
+    print_usage()
 
 def main() -> None:
     """Main function to handle command-line arguments and execute commands."""
+    global forward
+    if os.getenv("WFCTL_TRACE") or any(arg.startswith("--profile") for arg in sys.argv):
+        from wfctl.profile import enable, pop_profile
+        sys.argv[1:], mode = pop_profile(sys.argv[1:])
+        if mode:
+            forward = enable(mode).wrap(forward, "forward to daemon", "ipc")
+
+    if "--daemon" in sys.argv:
+        from wfctl.daemon import serve
+        serve()
+        return
+
     if len(sys.argv) < 2 or "-h" in sys.argv:
         usage()
         sys.exit(1)
 
-    if "-m" in sys.argv:
-        watch_events()
+    from wfctl.output import default_format, pop_output_options
+    try:
+        argv, fmt, fields = pop_output_options(sys.argv[1:])
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    # Resolved here, where stdout is still the terminal, so the daemon and
+    # captured output pick the same format the caller would get.
+    fmt = fmt or default_format()
+
+    if any(arg.startswith("--sockets") for arg in argv):
+        from wfctl.fleet import fleet_main
+        sys.exit(fleet_main(argv, fmt, fields))
+
+    if "--batch" in sys.argv:
+        from wfctl.batch import batch_main
+        sys.exit(batch_main(sys.argv[1:]))
+
+    if "-m" in argv:
+        from wfctl.utils import watch_events
+        # Global options were taken out above and mean nothing to the event filters.
+        watch_events(argv)
         return
 
     # Extract command from arguments as a list
-    command = " ".join([arg for arg in sys.argv[1:]])
+    command = " ".join(argv)
 
     # Check if command is empty after processing
     if not command:
@@ -22,8 +58,23 @@ def main() -> None:
         usage()
         sys.exit(1)
 
-    execute_command(command)
+    # Fast path: let a running daemon execute the command on its warm connection
+    status = forward(absolute_paths(argv) + ["--format", fmt] + (["--fields", fields] if fields else []))
+    if status is not None:
+        sys.exit(status)
+
+    from wfctl.ipc import run_command
+    from wfctl.output import using
+    try:
+        with using(fmt, fields):
+            status = run_command(command)
+    except Exception as e:
+        from wfctl.connection import is_connection_error
+        if not is_connection_error(e):
+            raise
+        print(f"Error: Wayfire IPC connection failed: {e}")
+        sys.exit(1)
+    sys.exit(status)
 
 if __name__ == "__main__":
     main()
-
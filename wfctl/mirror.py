@@ -0,0 +1,268 @@
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# How often seeding on the event connection is retried while events keep racing it.
+SEED_ATTEMPTS = 5
+
+
+class StateMirror:
+    """
+    In-memory model of compositor state kept current by IPC events.
+
+    The mirror is seeded once from list-views/list-outputs and then applies
+    view, output and workspace events incrementally, so queries never touch
+    the IPC socket. Searches build their index from list_views(), keyed by
+    version. Mirrored dicts are replaced, never changed, once handed out.
+    """
+
+    def __init__(self) -> None:
+        self.views: Dict[int, Dict[str, Any]] = {}
+        self.outputs: Dict[int, Dict[str, Any]] = {}
+        self.focused_view_id: Optional[int] = None
+        self.focused_output_id: Optional[int] = None
+        # View ids by output, to shift the views a workspace switch moves.
+        self.by_output: Dict[int, Set[int]] = {}
+        # Output each view is currently filed under, for cheap removal.
+        self._outputs_of: Dict[int, int] = {}
+        # View a workspace switch carries along, announced just before the switch.
+        self._travelling: Optional[tuple] = None
+        # Bumped on every change so derived data (e.g. search indexes) can be reused.
+        self.version = 0
+        self.ready = threading.Event()
+        self.alive = False
+        self._lock = threading.RLock()
+        self._events_sock = None
+        self._sync_lock = threading.Lock()
+        self._synced = threading.Event()
+
+    # Loading and applying events
+
+    def seed(self, sock) -> None:
+        """Load the full state from the compositor, replacing what is mirrored."""
+        # Views last: seed_watched() relies on every other answer being older.
+        outputs = sock.list_outputs()
+        focused_output = sock.get_focused_output()
+        focused_view = sock.get_focused_view()
+        views = sock.list_views()
+        with self._lock:
+            self.views.clear()
+            self.by_output.clear()
+            self._outputs_of.clear()
+            self.outputs = {output["id"]: output for output in outputs}
+            for view in views:
+                self._put_view(view)
+            self.focused_view_id = focused_view["id"] if focused_view else None
+            self.focused_output_id = focused_output.get("id") if focused_output else None
+            self.version += 1
+        self.ready.set()
+
+    def seed_watched(self, events, attempts: int = SEED_ATTEMPTS) -> bool:
+        """
+        Seed over a connection that is already watching events.
+
+        Events that arrive while the snapshot is taken are queued on the
+        connection and predate the list-views answer. Plain view events only
+        repeat state the snapshot already holds, so they are dropped. Focus,
+        output and workspace events are deltas, or may have changed an earlier
+        answer; applying them would shift views twice, so the snapshot is taken
+        again instead.
+
+        :param events: WayfireSocket that has called watch()
+        :param attempts: Snapshots to take before accepting a raced one
+        :return: False if every snapshot was raced by a delta event
+        """
+        # Anything queued before the first request is covered by the snapshot too.
+        events.pending_events.clear()
+        for _ in range(attempts):
+            self.seed(events)
+            raced = any(_is_delta(event) for event in events.pending_events)
+            events.pending_events.clear()
+            if not raced:
+                return True
+        return False
+
+    def apply(self, event: Dict[str, Any]) -> bool:
+        """
+        Apply one compositor event.
+
+        :return: True if the mirrored state changed
+        """
+        name = event.get("event", "")
+        with self._lock:
+            if name == "view-unmapped":
+                view = event.get("view")
+                if not view or view["id"] not in self.views:
+                    return False
+                self._drop_view(view["id"])
+                if self.focused_view_id == view["id"]:
+                    self.focused_view_id = None
+            elif name == "view-focused":
+                view = event.get("view")
+                self.focused_view_id = view["id"] if view else None
+                if view:
+                    self._put_view(view)
+            elif name.startswith("view-"):
+                view = event.get("view")
+                if not view:
+                    return False
+                self._put_view(view)
+                if name == "view-workspace-changed":
+                    self._travelling = (view["id"], event.get("to"))
+            elif name == "wset-workspace-changed":
+                self._switch_workspace(event)
+            elif name == "output-added":
+                output = event["output"]
+                self.outputs[output["id"]] = output
+            elif name == "output-removed":
+                output_id = event["output"]["id"]
+                self.outputs.pop(output_id, None)
+                # Views moved to another output are reported again by their own events.
+                for view_id in list(self.by_output.pop(output_id, ())):
+                    del self._outputs_of[view_id]
+                    del self.views[view_id]
+                    if self.focused_view_id == view_id:
+                        self.focused_view_id = None
+                if self.focused_output_id == output_id:
+                    self.focused_output_id = None
+            elif name == "output-gain-focus":
+                self.focused_output_id = event["output"]["id"]
+            else:
+                return False
+            self.version += 1
+            return True
+
+    def _put_view(self, view: Dict[str, Any]) -> None:
+        view_id = view["id"]
+        if view_id in self.views:
+            self._unindex(view_id)
+        self.views[view_id] = view
+        output_id = self._outputs_of[view_id] = view.get("output-id")
+        self.by_output.setdefault(output_id, set()).add(view_id)
+
+    def _unindex(self, view_id: int) -> None:
+        self.by_output[self._outputs_of.pop(view_id)].discard(view_id)
+
+    def _drop_view(self, view_id: int) -> None:
+        self._unindex(view_id)
+        del self.views[view_id]
+
+    def _switch_workspace(self, event: Dict[str, Any]) -> None:
+        output = self.outputs.get(event.get("output"))
+        if output is None:
+            return
+        # Copies replace the mirrored dicts, since readers may hold the old ones.
+        if "output-data" in event:
+            output = dict(output, **event["output-data"])
+        else:
+            output = dict(output, workspace=dict(output["workspace"], **event["new-workspace"]))
+        self.outputs[output["id"]] = output
+        previous, new = event["previous-workspace"], event["new-workspace"]
+        dx = (previous["x"] - new["x"]) * output["geometry"]["width"]
+        dy = (previous["y"] - new["y"]) * output["geometry"]["height"]
+        travelling, self._travelling = self._travelling, None
+        # Wayfire moves every non-sticky view on the output without per-view events,
+        # except one switched along with, whose event already has its new geometry.
+        for view_id in list(self.by_output.get(output["id"], ())):
+            view = self.views[view_id]
+            if view.get("sticky") or travelling == (view_id, new):
+                continue
+            self._put_view(dict(view, **{
+                key: dict(view[key], x=view[key]["x"] + dx, y=view[key]["y"] + dy)
+                for key in ("geometry", "base-geometry", "bbox") if key in view
+            }))
+
+    # Queries
+
+    def list_views(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.views.values())
+
+    def get_view(self, view_id: int) -> Optional[Dict[str, Any]]:
+        return self.views.get(view_id)
+
+    def get_focused_view(self) -> Optional[Dict[str, Any]]:
+        return self.views.get(self.focused_view_id)
+
+    def list_outputs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.outputs.values())
+
+    def get_focused_output(self) -> Optional[Dict[str, Any]]:
+        return self.outputs.get(self.focused_output_id)
+
+    # Running
+
+    def run(self, connect: Callable[[], Any], on_event: Optional[Callable] = None) -> None:
+        """
+        Subscribe, seed and apply events until the connection fails.
+
+        The snapshot is taken on the event connection itself, see
+        seed_watched(), so every event read afterwards is newer than it.
+
+        :param connect: Returns a new WayfireSocket for the event stream
+        :param on_event: Called with every event after it is applied
+        """
+        events = connect()
+        self._events_sock = events
+        try:
+            events.watch()
+            self.seed_watched(events)
+        except BaseException:
+            events.close()
+            raise
+        self.alive = True
+        try:
+            while True:
+                event = events.read_next_event()
+                if "event" not in event:
+                    # Reply to the barrier request sent by sync().
+                    self._synced.set()
+                    continue
+                self.apply(event)
+                if on_event is not None:
+                    on_event(event)
+        finally:
+            self.alive = False
+            events.close()
+
+    def sync(self, timeout: float = 1.0) -> bool:
+        """
+        Wait until every event emitted before this call has been applied.
+
+        A cheap request is sent on the event connection; Wayfire answers it
+        after the events already queued there, so once its reply is read the
+        mirror reflects any change a command made before calling sync().
+
+        :return: False if the reply did not arrive within timeout
+        """
+        if not self.alive:
+            return False
+        with self._sync_lock:
+            self._synced.clear()
+            data = json.dumps({"method": "list-methods", "data": {}}).encode("utf8")
+            self._events_sock.client.sendall(len(data).to_bytes(4, byteorder="little") + data)
+            return self._synced.wait(timeout)
+
+
+def _is_delta(event: Dict[str, Any]) -> bool:
+    """True for events that cannot simply be replayed over a newer snapshot."""
+    name = event.get("event", "")
+    return not name.startswith("view-") or name == "view-focused"
+
+
+_active: Optional[StateMirror] = None
+
+
+def activate(mirror: Optional[StateMirror]) -> None:
+    """Make handlers answer queries from this mirror (None to stop)."""
+    global _active
+    _active = mirror
+
+
+def active() -> Optional[StateMirror]:
+    """Return the running mirror, if one is live and seeded."""
+    mirror = _active
+    if mirror is not None and mirror.alive:
+        return mirror
+    return None
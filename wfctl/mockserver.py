@@ -0,0 +1,514 @@
+"""
+Stand-in Wayfire IPC server with synthetic state, for tests and benchmarks.
+
+It speaks the Wayfire wire protocol (4 byte little-endian length followed by
+JSON) on a Unix socket and implements the methods wfctl uses. Mutating calls
+update the synthetic state and emit the same events Wayfire would to watching
+clients. Replies can be delayed to simulate a busy compositor.
+
+    python -m wfctl.mockserver --views 1000 --latency-ms 1 --socket /tmp/wf.sock
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+APP_IDS = ("firefox", "kitty", "foot", "code", "mpv", "thunar", "gimp", "slack")
+DEFAULT_PLUGINS = (
+    "alpha animate autostart command cube decoration expo grid ipc ipc-rules "
+    "move place resize scale switcher vswitch wm-actions wobbly"
+)
+
+
+class MockWayfireState:
+    """Synthetic compositor state: outputs, views, workspaces, inputs and options."""
+
+    def __init__(
+        self,
+        views: int = 10,
+        outputs: int = 1,
+        grid: tuple = (3, 3),
+        inputs: int = 4,
+        plugins: str = DEFAULT_PLUGINS,
+    ) -> None:
+        self.grid_width, self.grid_height = grid
+        self.outputs: Dict[int, Dict[str, Any]] = {}
+        for i in range(1, outputs + 1):
+            self.outputs[i] = {
+                "id": i,
+                "name": f"HEADLESS-{i}",
+                "geometry": {"x": (i - 1) * 1920, "y": 0, "width": 1920, "height": 1080},
+                "workarea": {"x": (i - 1) * 1920, "y": 0, "width": 1920, "height": 1050},
+                "wset-index": i,
+                "workspace": {
+                    "x": 0, "y": 0,
+                    "grid_width": self.grid_width, "grid_height": self.grid_height,
+                },
+            }
+        self.focused_output = 1
+
+        self.views: Dict[int, Dict[str, Any]] = {}
+        self.alpha: Dict[int, float] = {}
+        self.next_view_id = 1
+        for i in range(views):
+            self.add_view(APP_IDS[i % len(APP_IDS)])
+        self.focused_view: Optional[int] = 1 if views else None
+        if self.focused_view:
+            self.views[1]["activated"] = True
+
+        types = ("keyboard", "pointer", "touch", "tablet_tool")
+        self.inputs = [
+            {
+                "id": i,
+                "name": f"mock {types[i % len(types)]} {i}",
+                "vendor": 1000 + i,
+                "product": 2000 + i,
+                "type": types[i % len(types)],
+                "enabled": True,
+            }
+            for i in range(1, inputs + 1)
+        ]
+        self.options: Dict[str, Any] = {
+            "core/plugins": plugins,
+            "core/vwidth": str(self.grid_width),
+            "core/vheight": str(self.grid_height),
+            "input/xkb_layout": "us",
+        }
+
+    def add_view(self, app_id: str, title: Optional[str] = None) -> Dict[str, Any]:
+        """Create a mapped toplevel spread over outputs and workspaces."""
+        view_id = self.next_view_id
+        self.next_view_id += 1
+        output = self.outputs[(view_id - 1) % len(self.outputs) + 1]
+        out_geo = output["geometry"]
+        ws = (view_id - 1) // len(self.outputs) % (self.grid_width * self.grid_height)
+        ws_x, ws_y = ws % self.grid_width, ws // self.grid_width
+        current = output["workspace"]
+        # Like Wayfire, geometry is relative to the output's current workspace.
+        geometry = {
+            "x": (ws_x - current["x"]) * out_geo["width"] + (view_id * 37) % 800,
+            "y": (ws_y - current["y"]) * out_geo["height"] + (view_id * 23) % 400,
+            "width": 800,
+            "height": 600,
+        }
+        view = {
+            "id": view_id,
+            "pid": 1000 + view_id,
+            "title": title or f"{app_id} window {view_id}",
+            "app-id": app_id,
+            "base-geometry": dict(geometry),
+            "parent": -1,
+            "geometry": dict(geometry),
+            "bbox": dict(geometry),
+            "output-id": output["id"],
+            "output-name": output["name"],
+            "last-focus-timestamp": view_id,
+            "role": "toplevel",
+            "mapped": True,
+            "layer": "workspace",
+            "tiled-edges": 0,
+            "fullscreen": False,
+            "minimized": False,
+            "activated": False,
+            "sticky": False,
+            "wset-index": output["wset-index"],
+            "min-size": {"width": 0, "height": 0},
+            "max-size": {"width": 0, "height": 0},
+            "focusable": True,
+            "type": "toplevel",
+        }
+        self.views[view_id] = view
+        self.alpha[view_id] = 1.0
+        return view
+
+
+class MockWayfireServer:
+    """
+    Serve a MockWayfireState over a Unix socket from a background thread.
+
+    :param socket_path: Where to listen; a temporary path is used if omitted
+    :param latency: Seconds each reply is delayed, without blocking later requests
+    """
+
+    def __init__(
+        self,
+        state: Optional[MockWayfireState] = None,
+        socket_path: Optional[str] = None,
+        latency: float = 0.0,
+    ) -> None:
+        self.state = state or MockWayfireState()
+        self.socket_path = socket_path or os.path.join(tempfile.mkdtemp(), "wayfire-mock.sock")
+        self.latency = latency
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._server = None
+        # Outgoing queue and event filter (None means all events) per watching client.
+        self._watchers: Dict[asyncio.Queue, Optional[set]] = {}
+        # Outgoing queue of the client whose request is being dispatched.
+        self.client: Optional[asyncio.Queue] = None
+
+    def start(self) -> "MockWayfireServer":
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self.loop is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> "MockWayfireServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def call(self, func, *args) -> None:
+        """Run func(*args) on the server loop, e.g. to mutate state from a test."""
+        self.loop.call_soon_threadsafe(func, *args)
+
+    async def _shutdown(self) -> None:
+        self._server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _run(self, ready: threading.Event) -> None:
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._server = self.loop.run_until_complete(
+            asyncio.start_unix_server(self._handle_client, self.socket_path)
+        )
+        ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        outgoing: asyncio.Queue = asyncio.Queue()
+        sender = asyncio.ensure_future(self._send_loop(outgoing, writer))
+        try:
+            while True:
+                header = await reader.readexactly(4)
+                msg = json.loads(await reader.readexactly(int.from_bytes(header, "little")))
+                try:
+                    reply = self.dispatch(msg, outgoing)
+                except Exception as e:
+                    reply = {"error": str(e)}
+                self._queue(outgoing, reply, self.latency)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._watchers.pop(outgoing, None)
+            sender.cancel()
+            writer.close()
+
+    def _queue(self, outgoing: asyncio.Queue, msg: Any, delay: float = 0.0) -> None:
+        body = json.dumps(msg).encode("utf8")
+        outgoing.put_nowait((time.monotonic() + delay, len(body).to_bytes(4, "little") + body))
+
+    async def _send_loop(self, outgoing: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        # A single queue per client keeps replies and events in order while
+        # still letting later requests be read during an earlier reply's delay.
+        while True:
+            deadline, data = await outgoing.get()
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            writer.write(data)
+            if outgoing.empty():
+                await writer.drain()
+
+    def emit(self, event: str, **payload: Any) -> None:
+        """Send an event to every client watching it."""
+        msg = {"event": event, **payload}
+        for queue, events in self._watchers.items():
+            if events is None or event in events:
+                self._queue(queue, msg)
+
+    def dispatch(self, msg: Dict[str, Any], outgoing: asyncio.Queue) -> Any:
+        handler = METHODS.get(msg.get("method"))
+        if handler is None:
+            return {"error": "No such method found!"}
+        self.client = outgoing
+        return handler(self, msg.get("data", {}))
+
+    # Helpers shared by the method implementations below.
+
+    def view(self, data: Dict[str, Any], key: str = "id") -> Dict[str, Any]:
+        view_id = data.get(key, data.get("view_id", data.get("view-id")))
+        if view_id not in self.state.views:
+            raise Exception("no such view")
+        return self.state.views[view_id]
+
+    def output(self, output_id: int) -> Dict[str, Any]:
+        if output_id not in self.state.outputs:
+            raise Exception("output not found")
+        return self.state.outputs[output_id]
+
+
+def _ok(**extra: Any) -> Dict[str, Any]:
+    return {"result": "ok", **extra}
+
+
+def _watch(server, data):
+    events = data.get("events")
+    server._watchers[server.client] = set(events) if events else None
+    return _ok()
+
+
+def _list_views(server, data):
+    return list(server.state.views.values())
+
+
+def _view_info(server, data):
+    return _ok(info=server.view(data))
+
+
+def _focused_view(server, data):
+    state = server.state
+    return _ok(info=state.views.get(state.focused_view))
+
+
+def _focused_output(server, data):
+    return _ok(info=server.output(server.state.focused_output))
+
+
+def _list_outputs(server, data):
+    return list(server.state.outputs.values())
+
+
+def _output_info(server, data):
+    return server.output(data["id"])
+
+
+def _list_wsets(server, data):
+    return [
+        {"index": o["wset-index"], "name": f"wset-{o['wset-index']}", "output-id": o["id"],
+         "output-name": o["name"], "workspace": o["workspace"]}
+        for o in server.state.outputs.values()
+    ]
+
+
+def _configure_view(server, data):
+    view = server.view(data)
+    geometry = dict(data["geometry"])
+    if "output_id" in data:
+        output = server.output(data["output_id"])
+        view["output-id"], view["output-name"] = output["id"], output["name"]
+    view["geometry"] = view["base-geometry"] = view["bbox"] = geometry
+    server.emit("view-geometry-changed", view=view, **{"old-geometry": geometry})
+    return _ok()
+
+
+def _close_view(server, data):
+    view = server.view(data)
+    state = server.state
+    del state.views[view["id"]]
+    state.alpha.pop(view["id"], None)
+    view["mapped"] = False
+    if state.focused_view == view["id"]:
+        state.focused_view = next(iter(state.views), None)
+    server.emit("view-unmapped", view=view)
+    return _ok()
+
+
+def _focus_view(server, data):
+    state = server.state
+    view = server.view(data)
+    if state.focused_view in state.views:
+        state.views[state.focused_view]["activated"] = False
+    view["activated"] = True
+    view["last-focus-timestamp"] = time.monotonic_ns()
+    state.focused_view = view["id"]
+    server.emit("view-focused", view=view)
+    return _ok()
+
+
+def _set_workspace(server, data):
+    output = server.output(data.get("output-id", server.state.focused_output))
+    x, y = data["x"], data["y"]
+    if not (0 <= x < output["workspace"]["grid_width"] and 0 <= y < output["workspace"]["grid_height"]):
+        raise Exception("workspace coordinates are out of bounds")
+    moved = server.view(data, "view-id") if "view-id" in data else None
+    previous = {"x": output["workspace"]["x"], "y": output["workspace"]["y"]}
+    output["workspace"]["x"], output["workspace"]["y"] = x, y
+    geo = output["geometry"]
+    dx = (previous["x"] - x) * geo["width"]
+    dy = (previous["y"] - y) * geo["height"]
+    for view in server.state.views.values():
+        if view["output-id"] != output["id"] or view["sticky"]:
+            continue
+        if view is moved:
+            # The view travels with the switch and keeps its on-screen position.
+            view["geometry"]["x"] %= geo["width"]
+            view["geometry"]["y"] %= geo["height"]
+        else:
+            view["geometry"]["x"] += dx
+            view["geometry"]["y"] += dy
+        view["base-geometry"] = dict(view["geometry"])
+        view["bbox"] = dict(view["geometry"])
+    if moved is not None:
+        server.emit("view-workspace-changed", view=moved, to={"x": x, "y": y}, **{"from": previous})
+    server.emit(
+        "wset-workspace-changed",
+        **{"previous-workspace": previous, "new-workspace": {"x": x, "y": y},
+           "output": output["id"], "wset": output["wset-index"], "output-data": output},
+    )
+    return _ok()
+
+
+def _view_flag(flag, event):
+    def handler(server, data):
+        view = server.view(data, "view_id")
+        view[flag] = bool(data.get("state", True))
+        if event:
+            server.emit(event, view=view)
+        return _ok()
+    return handler
+
+
+def _grid_slot(slot):
+    def handler(server, data):
+        view = server.view(data, "view_id")
+        workarea = server.output(view["output-id"])["workarea"]
+        view["tiled-edges"] = 15 if slot == "slot_c" else 0
+        view["geometry"] = view["base-geometry"] = dict(workarea)
+        server.emit("view-tiled", view=view)
+        server.emit("view-geometry-changed", view=view)
+        return _ok()
+    return handler
+
+
+def _set_alpha(server, data):
+    view = server.view(data, "view-id")
+    server.state.alpha[view["id"]] = float(data["alpha"])
+    return _ok()
+
+
+def _get_alpha(server, data):
+    view = server.view(data, "view-id")
+    return _ok(alpha=server.state.alpha[view["id"]])
+
+
+def _list_devices(server, data):
+    return server.state.inputs
+
+
+def _configure_device(server, data):
+    for device in server.state.inputs:
+        if device["id"] == data["id"]:
+            device["enabled"] = bool(data["enabled"])
+            return _ok()
+    raise Exception("Unknown input device!")
+
+
+def _get_option(server, data):
+    option = data["option"]
+    if option not in server.state.options:
+        raise Exception("Option not found!")
+    value = server.state.options[option]
+    return _ok(value=value, default=value)
+
+
+def _set_options(server, data):
+    for option, value in data.items():
+        server.state.options[option] = value if isinstance(value, str) else json.dumps(value)
+    return _ok()
+
+
+def _configuration(server, data):
+    return {"api-version": 1, "plugin_path": "/usr/lib/wayfire", "plugin_xml_dir": "/usr/share/wayfire/metadata",
+            "xwayland-pid": -1, "xwayland-display": ""}
+
+
+def _list_methods(server, data):
+    return {"methods": sorted(METHODS)}
+
+
+def _mock_map_view(server, data):
+    """Map a new view, e.g. to exercise code waiting for a window."""
+    view = server.state.add_view(data.get("app-id", "mock"), data.get("title"))
+    server.emit("view-mapped", view=view)
+    return _ok(info=view)
+
+
+def _mock_emit_events(server, data):
+    """Emit a burst of geometry events for throughput measurements."""
+    views = list(server.state.views.values()) or [None]
+    event = data.get("event", "view-geometry-changed")
+    for i in range(int(data.get("count", 1000))):
+        server.emit(event, view=views[i % len(views)])
+    return _ok()
+
+
+METHODS = {
+    "list-methods": _list_methods,
+    "window-rules/events/watch": _watch,
+    "window-rules/list-views": _list_views,
+    "window-rules/view-info": _view_info,
+    "window-rules/get-focused-view": _focused_view,
+    "window-rules/get-focused-output": _focused_output,
+    "window-rules/list-outputs": _list_outputs,
+    "window-rules/output-info": _output_info,
+    "window-rules/list-wsets": _list_wsets,
+    "window-rules/configure-view": _configure_view,
+    "window-rules/close-view": _close_view,
+    "window-rules/focus-view": _focus_view,
+    "vswitch/set-workspace": _set_workspace,
+    "wm-actions/set-minimized": _view_flag("minimized", "view-minimized"),
+    "wm-actions/set-fullscreen": _view_flag("fullscreen", "view-fullscreen"),
+    "wm-actions/set-sticky": _view_flag("sticky", "view-sticky"),
+    "wm-actions/set-always-on-top": _view_flag("always-on-top", None),
+    "wm-actions/send-to-back": _view_flag("sent-to-back", None),
+    "grid/slot_c": _grid_slot("slot_c"),
+    "grid/restore": _grid_slot("restore"),
+    "wf/alpha/set-view-alpha": _set_alpha,
+    "wf/alpha/get-view-alpha": _get_alpha,
+    "input/list-devices": _list_devices,
+    "input/configure-device": _configure_device,
+    "wayfire/get-config-option": _get_option,
+    "wayfire/set-config-options": _set_options,
+    "wayfire/configuration": _configuration,
+    "mock/map-view": _mock_map_view,
+    "mock/emit-events": _mock_emit_events,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a mock Wayfire IPC server.")
+    parser.add_argument("--socket", help="socket path (default: a temporary file)")
+    parser.add_argument("--views", type=int, default=10)
+    parser.add_argument("--outputs", type=int, default=1)
+    parser.add_argument("--grid", default="3x3", help="workspace grid as WIDTHxHEIGHT")
+    parser.add_argument("--inputs", type=int, default=4)
+    parser.add_argument("--plugins", default=DEFAULT_PLUGINS)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    width, height = (int(n) for n in args.grid.split("x"))
+    state = MockWayfireState(args.views, args.outputs, (width, height), args.inputs, args.plugins)
+    server = MockWayfireServer(state, args.socket, args.latency_ms / 1000).start()
+    print(f"export WAYFIRE_SOCKET={server.socket_path}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import json
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+# Events that only report the latest state of a view and can be merged.
+COALESCIBLE = frozenset({
+    "view-geometry-changed",
+    "view-title-changed",
+    "view-workspace-changed",
+    "view-tiled",
+})
+
+# How long the output buffer may hold lines while the stream is idle.
+IDLE_FLUSH = 0.05
+
+# Lines buffered before a write is forced during a busy stream.
+MAX_BUFFERED = 256
+
+
+def socket_events(sock, tick: Optional[float] = None) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Yield events from a watching WayfireSocket.
+
+    With a tick, None is yielded whenever no event arrives for that many
+    seconds, which lets consumers flush buffers and coalesced events.
+    """
+    import select
+
+    while True:
+        if sock.pending_events:
+            yield sock.pending_events.pop(0)
+        elif tick is None:
+            yield sock.read_message()
+        else:
+            ready, _, _ = select.select([sock.client], [], [], tick)
+            yield sock.read_message() if ready else None
+
+
+class EventFilter:
+    """Match events by type, view id and view app-id; empty criteria match all."""
+
+    def __init__(self, events=None, view_ids=None, app_ids=None) -> None:
+        self.events = frozenset(events or ())
+        self.view_ids = frozenset(view_ids or ())
+        self.app_ids = frozenset(app_ids or ())
+
+    def __call__(self, event: Dict[str, Any]) -> bool:
+        if self.events and event.get("event") not in self.events:
+            return False
+        if self.view_ids or self.app_ids:
+            view = event.get("view")
+            if not view:
+                return False
+            if self.view_ids and view.get("id") not in self.view_ids:
+                return False
+            if self.app_ids and view.get("app-id") not in self.app_ids:
+                return False
+        return True
+
+
+class EventStream:
+    """
+    Filter, coalesce and write events as newline-delimited JSON.
+
+    :param out: Stream lines are written to
+    :param match: Predicate selecting the events to keep
+    :param coalesce: Window in seconds during which high-frequency events for
+        the same view are merged, keeping only the latest; 0 disables it
+    """
+
+    def __init__(self, out: TextIO, match=None, coalesce: float = 0.0) -> None:
+        self.out = out
+        self.match = match or (lambda event: True)
+        self.coalesce = coalesce
+        self.stats = {"received": 0, "emitted": 0, "dropped": 0, "coalesced": 0}
+        # (event type, view id) -> (deadline, latest event)
+        self._held: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        self._buffer.append(json.dumps(event, separators=(",", ":")))
+        self.stats["emitted"] += 1
+        if len(self._buffer) >= MAX_BUFFERED:
+            self.flush()
+
+    def _release(self, now: Optional[float] = None, view_id: Any = None) -> None:
+        """Emit held events that are due, or all held events for view_id."""
+        for key in list(self._held):
+            deadline, event = self._held[key]
+            if (view_id is not None and key[1] == view_id) or (now is not None and deadline <= now):
+                del self._held[key]
+                self._emit(event)
+            elif view_id is None:
+                # Held events are ordered by deadline.
+                break
+
+    def feed(self, event: Optional[Dict[str, Any]]) -> None:
+        """Process one event, or an idle tick when event is None."""
+        now = time.monotonic()
+        if event is not None:
+            self.stats["received"] += 1
+            if not self.match(event):
+                self.stats["dropped"] += 1
+            elif self.coalesce and event.get("event") in COALESCIBLE and event.get("view"):
+                key = (event["event"], event["view"].get("id"))
+                if key in self._held:
+                    self._held[key] = (self._held[key][0], event)
+                    self.stats["coalesced"] += 1
+                else:
+                    self._held[key] = (now + self.coalesce, event)
+            else:
+                view = event.get("view")
+                if self._held and view:
+                    # Keep per-view ordering, e.g. geometry before view-unmapped.
+                    self._release(view_id=view.get("id"))
+                self._emit(event)
+        if self._held:
+            self._release(now=now)
+        if self._buffer and (event is None or now - self._last_flush >= IDLE_FLUSH):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.out.write("\n".join(self._buffer) + "\n")
+            self._buffer.clear()
+        self.out.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Emit everything still held and flush."""
+        for _, event in self._held.values():
+            self._emit(event)
+        self._held.clear()
+        self.flush()
+
+    def run(self, events: Iterable[Optional[Dict[str, Any]]]) -> None:
+        try:
+            for event in events:
+                self.feed(event)
+        finally:
+            self.close()
+
+
+def parse_args(argv: List[str]):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="wfctl -m", description="Stream Wayfire events as JSON lines.")
+    parser.add_argument("--events", default="", help="comma separated event types, e.g. view-mapped,view-focused")
+    parser.add_argument("--view-id", default="", help="comma separated view ids")
+    parser.add_argument("--app-id", default="", help="comma separated app-ids")
+    parser.add_argument("--coalesce", type=float, default=0.0, metavar="MS",
+                        help="merge geometry/title events per view within this window")
+    parser.add_argument("--stats", action="store_true",
+                        help="report received/emitted/dropped/coalesced counts on stderr at exit")
+    return parser.parse_args([arg for arg in argv if arg != "-m"])
+
+
+def split(value: str) -> List[str]:
+    return [item for item in value.split(",") if item]
+
+
+def monitor_main(argv: List[str], out: TextIO = sys.stdout) -> None:
+    """Entry point for `wfctl -m`."""
+    import signal
+    from wfctl.connection import manager
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    args = parse_args(argv)
+    events = split(args.events)
+    stream = EventStream(
+        out,
+        EventFilter(events, [int(i) for i in split(args.view_id)], split(args.app_id)),
+        args.coalesce / 1000,
+    )
+    tick = min(IDLE_FLUSH, stream.coalesce) if stream.coalesce else IDLE_FLUSH
+    try:
+        # Subscribing to the requested types only lets the compositor skip the rest;
+        # the watch reconnects and subscribes again if the compositor restarts.
+        stream.run(manager.watch(events or None, tick))
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        # The reader went away; keep the interpreter from failing to flush at exit.
+        import os
+        os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())
+    finally:
+        if args.stats:
+            print(json.dumps(stream.stats), file=sys.stderr)
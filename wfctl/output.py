@@ -0,0 +1,267 @@
+"""
+Output encoders for command results.
+
+Results are written record by record, so a large `list views` reaches a
+pipe (jq, awk) as it is encoded instead of after one giant string is built.
+
+    json      indented JSON (default on a terminal)
+    compact   one JSON document without whitespace (default otherwise)
+    ndjson    one compact JSON document per record
+    tsv       tab separated columns with a header row
+    table     a tabulate grid (buffers all rows to size the columns)
+"""
+import contextlib
+import json
+import os
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+FORMATS = ("json", "ndjson", "compact", "table", "tsv")
+
+_COMPACT = json.JSONEncoder(separators=(",", ":"))
+_PRETTY = json.JSONEncoder(indent=4)
+
+# Format chosen with --format; None means pick one from the environment.
+_selected: Optional[str] = None
+
+# Projection chosen with --fields; None keeps whole records.
+_projection: Optional[Callable[[Any], Any]] = None
+
+
+def default_format(stream: Optional[TextIO] = None) -> str:
+    """$WFCTL_FORMAT, else indented JSON for a terminal and compact JSON otherwise."""
+    fmt = os.getenv("WFCTL_FORMAT")
+    if fmt in FORMATS:
+        return fmt
+    stream = stream or sys.stdout
+    try:
+        return "json" if stream.isatty() else "compact"
+    except (AttributeError, ValueError):
+        return "compact"
+
+
+def current_format() -> str:
+    return _selected or default_format()
+
+
+@contextlib.contextmanager
+def using(fmt: Optional[str], fields: Optional[str] = None):
+    """Select an output format and field projection for the duration of the block."""
+    global _selected, _projection
+    previous = _selected, _projection
+    _selected = fmt or previous[0]
+    _projection = compile_fields(fields) if fields else previous[1]
+    try:
+        yield
+    finally:
+        _selected, _projection = previous
+
+
+def pop_output_options(argv: List[str]) -> Tuple[List[str], Optional[str], Optional[str]]:
+    """
+    Remove `--format NAME` and `--fields a,b.c` (or their `=` forms) from a command line.
+
+    :return: Tuple of (remaining arguments, format or None, fields or None)
+    :raises ValueError: If an option is missing its value or the format is unknown
+    """
+    rest: List[str] = []
+    options: Dict[str, Optional[str]] = {"--format": None, "--fields": None}
+    args = iter(argv)
+    for arg in args:
+        name, sep, value = arg.partition("=")
+        if name not in options:
+            rest.append(arg)
+            continue
+        if not sep:
+            value = next(args, None)
+            if value is None:
+                raise ValueError(f"{name} requires a value")
+        options[name] = value
+    fmt, fields = options["--format"], options["--fields"]
+    if fmt is not None and fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(FORMATS)}")
+    if fields is not None:
+        compile_fields(fields)
+    return rest, fmt, fields
+
+
+@lru_cache(maxsize=32)
+def compile_fields(fields: str) -> Callable[[Any], Any]:
+    """
+    Compile a comma separated list of dotted paths into a projection.
+
+    The projection keeps only the requested keys of a record, or of each
+    record of a list, preserving nesting: "id,geometry.x" turns a view into
+    {"id": 1, "geometry": {"x": 0}}. Missing keys are left out.
+
+    :raises ValueError: If a path is empty or has an empty component
+    """
+    tree: Dict[str, Any] = {}
+    for path in fields.split(","):
+        keys = path.strip().split(".")
+        if not all(keys):
+            raise ValueError(f"Invalid field '{path}'")
+        node = tree
+        for key in keys[:-1]:
+            child = node.setdefault(key, {})
+            if child is None:
+                # A shorter path already selects the whole value.
+                break
+            node = child
+        else:
+            node[keys[-1]] = None
+    getters = _compile_tree(tree)
+
+    def project(data: Any) -> Any:
+        if isinstance(data, list):
+            return [getters(record) if isinstance(record, dict) else record for record in data]
+        return getters(data) if isinstance(data, dict) else data
+    return project
+
+
+def _compile_tree(tree: Dict[str, Any]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Build a function copying the keys of tree from a dict, recursing into subtrees."""
+    getters = tuple((key, None if sub is None else _compile_tree(sub)) for key, sub in tree.items())
+
+    def get(record: Dict[str, Any]) -> Dict[str, Any]:
+        result = {}
+        for key, sub in getters:
+            if key not in record:
+                continue
+            value = record[key]
+            if sub is None:
+                result[key] = value
+            elif isinstance(value, dict):
+                result[key] = sub(value)
+            elif isinstance(value, list):
+                result[key] = [sub(item) if isinstance(item, dict) else item for item in value]
+        return result
+    return get
+
+
+def flatten(data: Any, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (dotted key, scalar) pairs for a nested document, depth first.
+
+    Iterative, so deep documents neither recurse nor build intermediate dicts.
+    """
+    stack: List[Iterator[Tuple[str, Any]]] = [iter([(prefix, data)])]
+    while stack:
+        for key, value in stack[-1]:
+            if isinstance(value, (dict, list)) and value:
+                stack.append(_children(key, value))
+                break
+            yield key, value
+        else:
+            stack.pop()
+
+
+def _children(key: str, value: Any) -> Iterator[Tuple[str, Any]]:
+    items = value.items() if isinstance(value, dict) else enumerate(value)
+    for k, v in items:
+        yield (f"{key}.{k}" if key else str(k)), v
+
+
+def _records(data: Any) -> List[Any]:
+    return data if isinstance(data, list) else [data]
+
+
+def _write_json(data: Any, out: TextIO) -> None:
+    if isinstance(data, list) and data:
+        # Same text as json.dumps(data, indent=4), one record at a time.
+        out.write("[\n")
+        last = len(data) - 1
+        for i, record in enumerate(data):
+            out.write("    " + _PRETTY.encode(record).replace("\n", "\n    "))
+            out.write(",\n" if i < last else "\n")
+        out.write("]\n")
+    else:
+        out.write(_PRETTY.encode(data) + "\n")
+
+
+def _write_compact(data: Any, out: TextIO) -> None:
+    if isinstance(data, list):
+        out.write("[")
+        for i, record in enumerate(data):
+            if i:
+                out.write(",")
+            out.write(_COMPACT.encode(record))
+        out.write("]\n")
+    else:
+        out.write(_COMPACT.encode(data) + "\n")
+
+
+def _write_ndjson(data: Any, out: TextIO) -> None:
+    for record in _records(data):
+        out.write(_COMPACT.encode(record) + "\n")
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        # Only empty containers are left by flatten().
+        return _COMPACT.encode(value)
+    return str(value).replace("\t", " ").replace("\n", " ")
+
+
+def _write_tsv(data: Any, out: TextIO) -> None:
+    if isinstance(data, dict):
+        for key, value in flatten(data):
+            out.write(f"{key}\t{_cell(value)}\n")
+        return
+    columns: Optional[List[str]] = None
+    for record in _records(data):
+        if not isinstance(record, dict):
+            out.write(_cell(record) + "\n")
+            continue
+        row = dict(flatten(record))
+        if columns is None:
+            # Columns come from the first record; views and outputs share a shape.
+            columns = list(row)
+            out.write("\t".join(columns) + "\n")
+        out.write("\t".join(_cell(row.get(column)) for column in columns) + "\n")
+
+
+def _write_table(data: Any, out: TextIO) -> None:
+    try:
+        from tabulate import tabulate
+    except ImportError:
+        raise RuntimeError("--format table requires the tabulate package")
+    if isinstance(data, dict):
+        rows = [[key, value] for key, value in flatten(data)]
+        out.write(tabulate(rows, headers=["Key", "Value"], tablefmt="fancy_grid") + "\n")
+        return
+    records = [dict(flatten(record)) if isinstance(record, dict) else {"value": record}
+               for record in _records(data)]
+    columns: Dict[str, None] = {}
+    for record in records:
+        columns.update(dict.fromkeys(record))
+    rows = [[record.get(column, "") for column in columns] for record in records]
+    out.write(tabulate(rows, headers=list(columns), tablefmt="fancy_grid") + "\n")
+
+
+ENCODERS: Dict[str, Callable[[Any, TextIO], None]] = {
+    "json": _write_json,
+    "compact": _write_compact,
+    "ndjson": _write_ndjson,
+    "tsv": _write_tsv,
+    "table": _write_table,
+}
+
+
+def emit(data: Any, fmt: Optional[str] = None) -> None:
+    """
+    Write a command result to stdout in the selected format.
+
+    The --fields projection is applied first, so only requested keys are encoded.
+
+    :param data: JSON-compatible result, usually a dict or a list of dicts
+    :param fmt: Format name, defaults to the one selected for this command
+    """
+    if _projection is not None:
+        data = _projection(data)
+    ENCODERS[fmt or current_format()](data, sys.stdout)
@@ -0,0 +1,221 @@
+"""
+Timing of wfctl phases and IPC calls, enabled with --profile or $WFCTL_TRACE.
+
+    --profile, WFCTL_TRACE=1           summary table on stderr at exit
+    --profile=json, WFCTL_TRACE=json   summary as JSON on stderr
+    --profile=FILE, WFCTL_TRACE=FILE   Chrome trace (chrome://tracing, Perfetto) written to FILE
+
+Spans cover startup (process start to main), imports, dispatch, each command, output
+encoding, every WayfireSocket request by IPC method, pipelined asyncio
+requests and JSON decoding. In daemon and batch mode the summary
+aggregates every command served, with count, total, p50 and p99 per span.
+"""
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+# Spans kept for the trace file; statistics keep counting past it.
+MAX_SPANS = 100000
+
+# Durations kept per span name for percentiles; the most recent ones, so a
+# long-running daemon reports its current latencies.
+MAX_SAMPLES = 10000
+
+
+class Profiler:
+    """Collects spans as (name, category, start, duration, thread) in perf_counter seconds."""
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.spans: List[tuple] = []
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, name: str, category: str, start: float, duration: float) -> None:
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append((name, category, start, duration, threading.get_ident()))
+        stat = self.stats.get(name)
+        if stat is None:
+            stat = self.stats[name] = {"category": category, "count": 0, "total": 0.0, "samples": deque(maxlen=MAX_SAMPLES)}
+        stat["count"] += 1
+        stat["total"] += duration
+        stat["samples"].append(duration)
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = "phase"):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, time.perf_counter() - start)
+
+    def wrap(self, func: Callable, name: Optional[str] = None, category: str = "phase",
+             name_of: Optional[Callable] = None) -> Callable:
+        """Time every call of func, naming spans by name or by name_of(*args)."""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name_of(*args) if name_of else name, category, start, time.perf_counter() - start)
+        timed.__wrapped__ = func
+        return timed
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per span name: category, count, total, p50 and p99 in milliseconds."""
+        rows = []
+        for name, stat in self.stats.items():
+            samples = sorted(stat["samples"])
+            rows.append({
+                "name": name,
+                "category": stat["category"],
+                "count": stat["count"],
+                "total_ms": round(stat["total"] * 1000, 3),
+                "p50_ms": round(percentile(samples, 50) * 1000, 3),
+                "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            })
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        return {
+            "displayTimeUnit": "ms",
+            "traceEvents": [
+                {
+                    "name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+                    "ts": round((start - self.origin) * 1e6, 1), "dur": round(duration * 1e6, 1),
+                }
+                for name, category, start, duration, tid in self.spans
+            ],
+        }
+
+    def report(self, mode: str, out=None) -> None:
+        out = out or sys.stderr
+        if mode == "json":
+            out.write(json.dumps(self.summary(), separators=(",", ":")) + "\n")
+        elif mode == "text":
+            out.write(f"{'span':<40} {'count':>7} {'total ms':>10} {'p50 ms':>9} {'p99 ms':>9}\n")
+            for row in self.summary():
+                out.write(f"{row['name']:<40} {row['count']:>7} {row['total_ms']:>10.3f} "
+                          f"{row['p50_ms']:>9.3f} {row['p99_ms']:>9.3f}\n")
+        else:
+            with open(mode, "w") as f:
+                json.dump(self.chrome_trace(), f, separators=(",", ":"))
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, max(0, round(p / 100 * len(samples) + 0.5) - 1))]
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started, from /proc (Linux, 10 ms resolution)."""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return max(0.0, time.clock_gettime(time.CLOCK_BOOTTIME) - started)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class _TimedJson:
+    """Stand-in for the json module inside wayfire.ipc that times decoding."""
+
+    def __init__(self, profiler: Profiler, module) -> None:
+        self._module = module
+        self.loads = profiler.wrap(module.loads, "json decode", "decode")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._module, name)
+
+
+def pop_profile(argv: List[str]) -> tuple:
+    """
+    Remove --profile[=MODE] from a command line.
+
+    :return: Tuple of (remaining arguments, mode or None); $WFCTL_TRACE is the fallback
+    """
+    rest = []
+    mode = None
+    for arg in argv:
+        if arg == "--profile":
+            mode = "text"
+        elif arg.startswith("--profile="):
+            mode = arg[len("--profile="):] or "text"
+        else:
+            rest.append(arg)
+    if mode is None:
+        trace = os.getenv("WFCTL_TRACE")
+        if trace:
+            mode = "text" if trace == "1" else trace
+    return rest, mode
+
+
+_profiler: Optional[Profiler] = None
+
+
+def enable(mode: str) -> Profiler:
+    """
+    Start profiling this process and report in mode ("text", "json" or a trace file) at exit.
+
+    Timers are installed by wrapping the functions to measure, so nothing
+    is paid when profiling is off.
+    """
+    global _profiler
+    if _profiler is not None:
+        return _profiler
+    profiler = _profiler = Profiler()
+    age = process_age()
+    if age is not None:
+        profiler.record("startup", "phase", profiler.origin - age, age)
+
+    with profiler.span("import wayfire"):
+        import wayfire.ipc
+        from wayfire import WayfireSocket
+    with profiler.span("import wfctl.ipc"):
+        import wfctl.ipc
+    from wfctl import aio, connection, dispatch, output
+
+    WayfireSocket.send_json = profiler.wrap(
+        WayfireSocket.send_json, category="ipc",
+        name_of=lambda sock, msg, *rest: f"ipc {msg.get('method')}",
+    )
+    wayfire.ipc.js = _TimedJson(profiler, wayfire.ipc.js)
+    connection.ConnectionManager.connect = profiler.wrap(
+        connection.ConnectionManager.connect, "connect", "ipc",
+    )
+    wfctl.ipc.lookup = profiler.wrap(dispatch.lookup, "dispatch")
+    wfctl.ipc.emit = profiler.wrap(output.emit, "output")
+    wfctl.ipc.execute_command = profiler.wrap(
+        wfctl.ipc.execute_command, category="command",
+        name_of=lambda command: f"command {_command_name(command)}",
+    )
+
+    send = aio.AsyncWayfireSocket._send
+
+    def timed_send(sock, msg):
+        # Pipelined requests overlap, so each is timed from write to reply.
+        start = time.perf_counter()
+        future = send(sock, msg)
+        name = f"ipc {msg.get('method')} (pipelined)"
+        future.add_done_callback(lambda _: profiler.record(name, "ipc", start, time.perf_counter() - start))
+        return future
+    aio.AsyncWayfireSocket._send = timed_send
+
+    atexit.register(profiler.report, mode)
+    return profiler
+
+
+def _command_name(command: str) -> str:
+    from wfctl.dispatch import commands
+    found = commands.match(command)
+    return found[0] if found else "unknown"
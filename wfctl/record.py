@@ -0,0 +1,221 @@
+"""
+Record compositor events to a file and replay them without a compositor.
+
+    wfctl record events.ndjson [--events a,b] [--duration SECONDS]
+    wfctl replay events.ndjson [--speed N | --max] [--into monitor|mirror|cache|rules|null]
+
+A recording holds one compact JSON object per line, {"t": TIME, "e": EVENT},
+with TIME in seconds since the epoch. Files are only ever appended to, so
+several sessions can go into one file, and a gap between them is replayed
+like any other.
+
+Replay feeds the events to a consumer at their recorded pace, N times
+faster, or as fast as possible with --max, and reports the throughput on
+stderr as JSON. Consumers are the code that handles live events: the -m
+output stream (monitor, the default, with its filters and coalescing), the
+daemon's state mirror and its snapshot cache invalidation, a rules file
+(printing the commands it would run, see wfctl.rules), and null, which only
+decodes.
+"""
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+# Feed and finish of a replay consumer; finish returns statistics to report.
+Consumer = Tuple[Callable[[Optional[Dict[str, Any]]], Any], Callable[[], Dict[str, Any]]]
+
+
+def read_recording(lines: Iterable[str]) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    """Yield (time, event) pairs from recording lines, skipping blank ones."""
+    for line in lines:
+        if line.strip():
+            record = json.loads(line)
+            yield record["t"], record["e"]
+
+
+def monitor_consumer(args, out: TextIO) -> Consumer:
+    from wfctl.monitor import EventFilter, EventStream, split
+
+    stream = EventStream(
+        out,
+        EventFilter(split(args.events), [int(i) for i in split(args.view_id)], split(args.app_id)),
+        args.coalesce / 1000,
+    )
+
+    def finish():
+        stream.close()
+        return stream.stats
+    return stream.feed, finish
+
+
+def mirror_consumer(args, out: TextIO) -> Consumer:
+    from wfctl.mirror import StateMirror
+
+    mirror = StateMirror()
+
+    def feed(event):
+        if event is not None:
+            mirror.apply(event)
+
+    def finish():
+        return {"views": len(mirror.views), "outputs": len(mirror.outputs), "changes": mirror.version}
+    return feed, finish
+
+
+def cache_consumer(args, out: TextIO) -> Consumer:
+    from wfctl.cache import SnapshotCache
+
+    snapshots = SnapshotCache()
+
+    def feed(event):
+        if event is not None:
+            snapshots.invalidate_for_event(event)
+    return feed, dict
+
+
+def null_consumer(args, out: TextIO) -> Consumer:
+    return (lambda event: None), dict
+
+
+def rules_consumer(args, out: TextIO) -> Consumer:
+    from wfctl.rules import RuleRunner, load_rules, print_command
+
+    # Without a compositor the triggered commands are written out, as with --dry-run.
+    # Cooldowns run on the replay clock, so --max suppresses more than live events would.
+    runner = RuleRunner(load_rules(args.rules), print_command(out))
+    return runner.feed, lambda: runner.stats
+
+
+# Replay targets by --into name, each built from the parsed arguments and the output stream.
+CONSUMERS: Dict[str, Callable[[Any, TextIO], Consumer]] = {
+    "monitor": monitor_consumer,
+    "mirror": mirror_consumer,
+    "cache": cache_consumer,
+    "null": null_consumer,
+    "rules": rules_consumer,
+}
+
+
+def replay(recording: Iterable[Tuple[float, Dict[str, Any]]], consumer: Consumer,
+           speed: Optional[float] = 1.0, tick: float = 0.05) -> Dict[str, Any]:
+    """
+    Feed recorded events to a consumer, paced by their timestamps.
+
+    While waiting for the next event the consumer gets None every tick
+    seconds, as it would from an idle live stream.
+
+    :param speed: Pace multiplier, None to replay as fast as possible
+    :return: Statistics: events, seconds, events per second and, when paced,
+        the worst lag behind schedule in milliseconds
+    """
+    feed, finish = consumer
+    count = 0
+    lag = 0.0
+    first = None
+    start = time.perf_counter()
+    for t, event in recording:
+        if speed is not None:
+            if first is None:
+                first = t
+            due = start + max(0.0, t - first) / speed
+            while True:
+                remaining = due - time.perf_counter()
+                if remaining <= 0:
+                    break
+                time.sleep(min(remaining, tick))
+                if remaining > tick:
+                    feed(None)
+            lag = max(lag, time.perf_counter() - due)
+        feed(event)
+        count += 1
+    elapsed = time.perf_counter() - start
+    stats: Dict[str, Any] = {
+        "events": count,
+        "seconds": round(elapsed, 6),
+        "events_per_second": round(count / elapsed) if elapsed > 0 else None,
+    }
+    if speed is not None:
+        stats["max_lag_ms"] = round(lag * 1000, 3)
+    stats.update(finish())
+    return stats
+
+
+def parse_replay_args(argv: List[str]):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="wfctl replay", description="Replay recorded Wayfire events.")
+    parser.add_argument("file", help="recording, or - for stdin")
+    pace = parser.add_mutually_exclusive_group()
+    pace.add_argument("--speed", type=float, default=1.0, help="replay N times faster than recorded")
+    pace.add_argument("--max", action="store_true", help="replay as fast as possible")
+    parser.add_argument("--into", choices=sorted(CONSUMERS), default="monitor", help="consumer to feed")
+    parser.add_argument("--events", default="", help="monitor: comma separated event types")
+    parser.add_argument("--view-id", default="", help="monitor: comma separated view ids")
+    parser.add_argument("--app-id", default="", help="monitor: comma separated app-ids")
+    parser.add_argument("--coalesce", type=float, default=0.0, metavar="MS",
+                        help="monitor: merge geometry/title events per view within this window")
+    parser.add_argument("--rules", metavar="FILE", help="rules: TOML rules file whose commands to print")
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    if args.into == "rules" and not args.rules:
+        parser.error("--into rules requires --rules FILE")
+    return args
+
+
+def replay_main(argv: List[str], out: TextIO = sys.stdout) -> None:
+    """Entry point for `wfctl replay`."""
+    args = parse_replay_args(argv)
+    consumer = CONSUMERS[args.into](args, out)
+    speed = None if args.max else args.speed
+    if args.file == "-":
+        stats = replay(read_recording(sys.stdin), consumer, speed)
+    else:
+        with open(args.file) as f:
+            stats = replay(read_recording(f), consumer, speed)
+    print(json.dumps(stats), file=sys.stderr)
+
+
+def parse_record_args(argv: List[str]):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="wfctl record", description="Record Wayfire events to a file.")
+    parser.add_argument("file", help="file to append to, or - for stdout")
+    parser.add_argument("--events", default="", help="comma separated event types, all by default")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    return parser.parse_args(argv)
+
+
+def record_main(argv: List[str]) -> None:
+    """Entry point for `wfctl record`; stops on Ctrl-C, SIGTERM or after --duration."""
+    import signal
+    from wfctl.connection import manager
+    from wfctl.monitor import IDLE_FLUSH, EventStream, split
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    args = parse_record_args(argv)
+    signal.signal(signal.SIGTERM, stop)
+    out = sys.stdout if args.file == "-" else open(args.file, "a")
+    # Wall clock for the file, advanced by the monotonic clock so steps in system time don't show.
+    origin, started = time.time(), time.monotonic()
+    deadline = None if args.duration is None else started + args.duration
+    # The monitor's stream does the buffering; each event is wrapped with its time.
+    stream = EventStream(out)
+    try:
+        for event in manager.watch(split(args.events) or None, IDLE_FLUSH):
+            now = time.monotonic()
+            if event is not None:
+                event = {"t": round(origin + now - started, 6), "e": event}
+            stream.feed(event)
+            if deadline is not None and now >= deadline:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.close()
+        if out is not sys.stdout:
+            out.close()
+        print(json.dumps({"recorded": stream.stats["emitted"]}), file=sys.stderr)
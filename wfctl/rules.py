@@ -0,0 +1,307 @@
+"""
+React to compositor events with commands, from a TOML rules file.
+
+    wfctl rules rules.toml [--dry-run] [--stats]
+
+    [[rule]]
+    event = "view-mapped"            # or a list; view-mapped by default
+    app-id = "firefox"               # or a list; any app-id when left out
+    match = 'title~"Private"'        # optional view search query
+    actions = ["set view alpha {id} 0.85", "move view to workspace 2 {id}"]
+    cooldown = 0.5                   # seconds; the default
+
+Actions are wfctl commands. {id}, {app_id}, {title} and the view's other
+top-level fields, with dashes written as underscores, are filled in from
+the event's view, and {event} from the event type. Values are shell-quoted
+where needed, so a title with spaces stays one word in a search query;
+templates should not quote them again.
+
+Actions run on the events they cause, so a rule on view-geometry-changed
+that moves the view would trigger itself. After a rule fires for a view
+it is skipped for that view for cooldown seconds, which swallows those
+echoes; 0 turns this off.
+
+All rules share one process, one event subscription covering just the
+event types they use, and one request connection for their actions. Rules
+are compiled into a table keyed by event type and app-id, so an event is
+only tested against the rules that can match it, in file order.
+"""
+import shlex
+import string
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Event type a rule reacts to when it names none.
+DEFAULT_EVENT = "view-mapped"
+
+# Seconds a rule stays quiet for a view after firing for it, unless the rule sets cooldown.
+DEFAULT_COOLDOWN = 0.5
+
+
+class Rule:
+    """One compiled rule; index is its position in the file, from 1."""
+
+    __slots__ = ("index", "events", "app_ids", "match", "actions", "cooldown")
+
+    def __init__(self, index: int, events: List[str], app_ids: List[str],
+                 match: Optional[Callable[[Any], bool]], actions: List[str],
+                 cooldown: float = DEFAULT_COOLDOWN) -> None:
+        self.index = index
+        self.events = events
+        self.app_ids = app_ids
+        self.match = match
+        self.actions = actions
+        self.cooldown = cooldown
+
+
+def _strings(value: Any, key: str, index: int) -> List[str]:
+    """A string or list of strings from a rule, as a list."""
+    values = [value] if isinstance(value, str) else value
+    if not isinstance(values, list) or not values or not all(isinstance(v, str) for v in values):
+        raise ValueError(f"rule {index}: '{key}' must be a string or a list of strings")
+    return values
+
+
+def template_fields(view: Optional[Dict[str, Any]], event: Dict[str, Any]) -> Dict[str, Any]:
+    """Values available to action templates for an event, quoted for the command line."""
+    fields = {"event": event.get("event")}
+    if view:
+        for key, value in view.items():
+            if not isinstance(value, (dict, list)):
+                fields[key.replace("-", "_")] = value
+    return {
+        key: shlex.quote(value) if isinstance(value, str) else value
+        for key, value in fields.items()
+    }
+
+
+def compile_rule(index: int, data: Dict[str, Any]) -> Rule:
+    """
+    Validate and compile one [[rule]] table.
+
+    :raises ValueError: For unknown keys, wrong types or malformed queries and templates
+    """
+    from wfctl.search import QueryError
+    from wfctl.wait import view_predicate
+
+    unknown = set(data) - {"event", "app-id", "match", "actions", "cooldown"}
+    if unknown:
+        raise ValueError(f"rule {index}: unknown key '{sorted(unknown)[0]}'")
+    if "actions" not in data:
+        raise ValueError(f"rule {index}: no actions")
+    actions = _strings(data["actions"], "actions", index)
+    for action in actions:
+        try:
+            list(string.Formatter().parse(action))
+        except ValueError as e:
+            raise ValueError(f"rule {index}: bad action template '{action}': {e}")
+    cooldown = data.get("cooldown", DEFAULT_COOLDOWN)
+    if isinstance(cooldown, bool) or not isinstance(cooldown, (int, float)) or cooldown < 0:
+        raise ValueError(f"rule {index}: 'cooldown' must be a number of seconds")
+    match = None
+    if "match" in data:
+        try:
+            match = view_predicate(data["match"])
+        except QueryError as e:
+            raise ValueError(f"rule {index}: {e}")
+    return Rule(
+        index,
+        _strings(data.get("event", DEFAULT_EVENT), "event", index),
+        _strings(data["app-id"], "app-id", index) if "app-id" in data else [],
+        match,
+        actions,
+        cooldown,
+    )
+
+
+class RuleSet:
+    """
+    Rules compiled into a dispatch table.
+
+    table maps event type to app-id to rules, with None holding the rules
+    for any app-id. The rules for an (event type, app-id) pair are merged
+    in file order the first time the pair is seen and kept.
+    """
+
+    def __init__(self, rules: List[Rule]) -> None:
+        self.rules = rules
+        self.table: Dict[str, Dict[Optional[str], List[Rule]]] = {}
+        for rule in rules:
+            for event in rule.events:
+                by_app = self.table.setdefault(event, {})
+                for app_id in rule.app_ids or [None]:
+                    by_app.setdefault(app_id, []).append(rule)
+        self._resolved: Dict[Tuple[str, Any], List[Rule]] = {}
+
+    @property
+    def events(self) -> List[str]:
+        """Event types to subscribe to."""
+        return sorted(self.table)
+
+    def candidates(self, name: str, app_id: Any) -> List[Rule]:
+        key = (name, app_id)
+        rules = self._resolved.get(key)
+        if rules is None:
+            by_app = self.table.get(name, {})
+            rules = by_app.get(None, [])
+            if app_id is not None and app_id in by_app:
+                rules = sorted(rules + by_app[app_id], key=lambda rule: rule.index)
+            self._resolved[key] = rules
+        return rules
+
+    def triggered(self, event: Dict[str, Any]) -> Iterator[Tuple[Rule, Dict[str, Any]]]:
+        """Yield every rule an event triggers, with the fields for its action templates."""
+        view = event.get("view")
+        rules = self.candidates(event.get("event"), view.get("app-id") if view else None)
+        if not rules:
+            return
+        fields = None
+        for rule in rules:
+            if rule.match is not None and not rule.match(view):
+                continue
+            if fields is None:
+                fields = template_fields(view, event)
+            yield rule, fields
+
+
+def parse_rules(data: Dict[str, Any]) -> RuleSet:
+    """Compile the decoded rules file; rules live in a [[rule]] array."""
+    rules = data.get("rule")
+    if not isinstance(rules, list) or not rules:
+        raise ValueError("no [[rule]] tables found")
+    return RuleSet([compile_rule(index, rule) for index, rule in enumerate(rules, start=1)])
+
+
+def load_rules(path: str) -> RuleSet:
+    """
+    Read and compile a TOML rules file.
+
+    :raises ValueError: If the file is not valid TOML or holds invalid rules
+    """
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ImportError("Reading rules needs Python 3.11 or the tomli package.")
+    with open(path, "rb") as f:
+        try:
+            data = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise ValueError(f"{path}: {e}")
+    return parse_rules(data)
+
+
+class RuleRunner:
+    """
+    Feed events through a RuleSet and run the resulting commands.
+
+    :param execute: Runs one command and returns an error message or None
+    :param clock: Time source for rule cooldowns, in seconds
+    """
+
+    def __init__(self, ruleset: RuleSet, execute: Callable[[str], Optional[str]],
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.ruleset = ruleset
+        self.execute = execute
+        self.clock = clock
+        self.stats = {"events": 0, "matched": 0, "suppressed": 0, "actions": 0, "errors": 0}
+        # (rule index, view id) -> when the rule may fire for the view again
+        self._quiet_until: Dict[Tuple[int, Any], float] = {}
+
+    def _cooling(self, rule: Rule, view_id: Any, now: float) -> bool:
+        """Whether rule fired for view_id within its cooldown; otherwise start a new one."""
+        if not rule.cooldown:
+            return False
+        key = (rule.index, view_id)
+        if self._quiet_until.get(key, 0.0) > now:
+            return True
+        if len(self._quiet_until) >= 1024:
+            self._quiet_until = {k: t for k, t in self._quiet_until.items() if t > now}
+        self._quiet_until[key] = now + rule.cooldown
+        return False
+
+    def feed(self, event: Optional[Dict[str, Any]]) -> None:
+        if event is None:
+            return
+        self.stats["events"] += 1
+        view = event.get("view")
+        view_id = view.get("id") if view else None
+        now = self.clock()
+        for rule, fields in self.ruleset.triggered(event):
+            if self._cooling(rule, view_id, now):
+                self.stats["suppressed"] += 1
+                continue
+            self.stats["matched"] += 1
+            for action in rule.actions:
+                try:
+                    command = action.format_map(fields)
+                except KeyError as e:
+                    error = f"{event.get('event')} event has no field {e}"
+                else:
+                    self.stats["actions"] += 1
+                    error = self.execute(command)
+                if error:
+                    self.stats["errors"] += 1
+                    print(f"Error: rule {rule.index}: {action}: {error}", file=sys.stderr)
+
+
+def run_command(command: str) -> Optional[str]:
+    """Run an action through the command handlers; return its error message, if any."""
+    from wfctl.ipc import capture_command
+
+    output, status = capture_command(command)
+    if status:
+        return output.strip().removeprefix("Error:").strip() or f"exit status {status}"
+    return None
+
+
+def print_command(out) -> Callable[[str], None]:
+    """Executor for dry runs: write each command instead of running it."""
+    def execute(command: str) -> None:
+        out.write(command + "\n")
+    return execute
+
+
+def parse_args(argv: List[str]):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="wfctl rules", description="Run commands when Wayfire events match rules.")
+    parser.add_argument("file", help="TOML rules file")
+    parser.add_argument("--dry-run", action="store_true", help="print the commands instead of running them")
+    parser.add_argument("--stats", action="store_true",
+                        help="report event/match/action/error counts on stderr at exit")
+    return parser.parse_args(argv)
+
+
+def rules_main(argv: List[str], out=None) -> None:
+    """Entry point for `wfctl rules`; runs until interrupted."""
+    import json
+    import signal
+    from wfctl.cache import DEFAULT_TTLS, SnapshotCache, use_cache
+    from wfctl.connection import manager
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    args = parse_args(argv)
+    ruleset = load_rules(args.file)
+    out = out or sys.stdout
+    runner = RuleRunner(ruleset, print_command(out) if args.dry_run else run_command)
+    signal.signal(signal.SIGTERM, stop)
+    manager.keep_alive()
+    # Only the rules' event types are subscribed to, so nothing else would invalidate
+    # snapshots; actions read state fresh instead.
+    try:
+        with use_cache(SnapshotCache(ttls={name: 0 for name in DEFAULT_TTLS})):
+            for event in manager.watch(ruleset.events):
+                runner.feed(event)
+                if args.dry_run:
+                    out.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.stats:
+            print(json.dumps(runner.stats), file=sys.stderr)
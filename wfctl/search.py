@@ -0,0 +1,389 @@
+"""
+Field-scoped view search.
+
+Queries are whitespace separated terms combined with implicit AND, ``or``,
+``not`` and parentheses:
+
+    app-id=firefox title~"^Inbox" pid>1000
+    app-id=kitty or app-id=foot
+    not minimized=true geometry.width>=1000
+    firefox                      (bare term: substring of any field)
+
+Operators are ``=``, ``!=``, ``~`` (regex search), ``!~``, ``<``, ``<=``,
+``>`` and ``>=``. Fields are dotted paths into the view, e.g. ``geometry.x``.
+
+Terms are compiled once and evaluated against a ViewIndex, an inverted index
+mapping fields to their distinct values and the ids of the views holding
+them. Once a field is indexed, equality is a dictionary lookup and the other
+operators only visit distinct values, so repeated searches on a snapshot stay
+sublinear in the number of views when values repeat.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+
+_TERM = re.compile(r"^([A-Za-z0-9_.-]+?)(!=|!~|<=|>=|=|~|<|>)(.*)$")
+
+
+_MISSING = object()
+
+
+def _key(value: Any) -> Any:
+    """Index key for a field value; booleans are kept apart from the equal ints 0 and 1."""
+    return (bool, value) if isinstance(value, bool) else value
+
+
+def _value(key: Any) -> Any:
+    """Field value an index key stands for."""
+    return key[1] if isinstance(key, tuple) else key
+
+
+class QueryError(ValueError):
+    """Raised for malformed search queries."""
+
+
+class ViewIndex:
+    """
+    Inverted index over the scalar fields of a snapshot of views.
+
+    A field is indexed the first time a query touches it, so a one-off search
+    costs a single pass over the field while repeated searches on the same
+    snapshot (batch, daemon) reuse it.
+    """
+
+    def __init__(self, views: Iterable[Dict[str, Any]]) -> None:
+        self.views: Dict[int, Dict[str, Any]] = {view["id"]: view for view in views}
+        self._order: Dict[int, int] = {view_id: i for i, view_id in enumerate(self.views)}
+        # Every id, the universe `not`, `!=` and `!~` subtract from; an index is
+        # built per snapshot, so this never changes.
+        self.ids: FrozenSet[int] = frozenset(self.views)
+        # field path -> value key (see _key) -> ids of views with that value
+        self.fields: Dict[str, Dict[Any, Set[int]]] = {}
+        self._complete = False
+
+    def values(self, field: str) -> Dict[Any, Set[int]]:
+        """Distinct values of a dotted field path and the views holding each."""
+        values = self.fields.get(field)
+        if values is not None:
+            return values
+        values = self.fields[field] = {}
+        if self._complete:
+            return values
+        keys = field.split(".")
+        for view_id, view in self.views.items():
+            value: Any = view
+            for key in keys:
+                value = value.get(key, _MISSING) if isinstance(value, dict) else _MISSING
+            if value is _MISSING or isinstance(value, (dict, list)):
+                continue
+            value = _key(value)
+            ids = values.get(value)
+            if ids is None:
+                values[value] = {view_id}
+            else:
+                ids.add(view_id)
+        return values
+
+    def all_fields(self) -> Dict[str, Dict[Any, Set[int]]]:
+        """Index every scalar field, e.g. for bare terms that match any field."""
+        if not self._complete:
+            self.fields = {}
+            for view_id, view in self.views.items():
+                self._add_fields(view, "", view_id)
+            self._complete = True
+        return self.fields
+
+    def _add_fields(self, node: Dict[str, Any], prefix: str, view_id: int) -> None:
+        fields = self.fields
+        for key, value in node.items():
+            path = prefix + key if prefix else key
+            if isinstance(value, dict):
+                self._add_fields(value, path + ".", view_id)
+            elif not isinstance(value, list):
+                values = fields.get(path)
+                if values is None:
+                    values = fields[path] = {}
+                value = _key(value)
+                ids = values.get(value)
+                if ids is None:
+                    values[value] = {view_id}
+                else:
+                    ids.add(view_id)
+
+    def select(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Return the views for ids, in snapshot order."""
+        return [self.views[view_id] for view_id in sorted(ids, key=self._order.__getitem__)]
+
+
+# Compiled query nodes: callables taking a ViewIndex and returning matching ids.
+Node = Callable[[ViewIndex], Set[int]]
+
+
+def _negate(node: Node) -> Node:
+    """Node matching the views node does not; AND subtracts node instead of calling it."""
+    def negated(index: ViewIndex) -> Set[int]:
+        return index.ids - node(index)
+    negated.negates = node
+    return negated
+
+
+def _candidates(raw: str) -> List[Any]:
+    """Typed values a raw query value may stand for."""
+    values: List[Any] = [raw]
+    lowered = raw.lower()
+    if lowered in ("true", "false"):
+        values.append(lowered == "true")
+    try:
+        values.append(int(raw))
+    except ValueError:
+        try:
+            values.append(float(raw))
+        except ValueError:
+            pass
+    return values
+
+
+def _number(raw: str) -> float:
+    try:
+        return float(raw)
+    except ValueError:
+        raise QueryError(f"'{raw}' is not a number")
+
+
+def _scan(field: str, test: Callable[[Any], bool]) -> Node:
+    """Node matching views whose field value passes test, visiting distinct values only."""
+    def node(index: ViewIndex) -> Set[int]:
+        found: Set[int] = set()
+        for key, ids in index.values(field).items():
+            if test(_value(key)):
+                found |= ids
+        return found
+    return node
+
+
+def compile_term(term: str) -> Node:
+    match = _TERM.match(term)
+    if match is None:
+        # Bare term: substring of any field, as the old recursive search did.
+        def bare(index: ViewIndex) -> Set[int]:
+            found: Set[int] = set()
+            for values in index.all_fields().values():
+                for key, ids in values.items():
+                    # _value(key), inlined: this loop visits every distinct value.
+                    if term in str(key[1] if key.__class__ is tuple else key):
+                        found |= ids
+            return found
+        return bare
+
+    field, op, raw = match.groups()
+    if op == "=" or op == "!=":
+        candidates = [_key(candidate) for candidate in _candidates(raw)]
+
+        def equal(index: ViewIndex) -> Set[int]:
+            values = index.values(field)
+            found: Set[int] = set()
+            for candidate in candidates:
+                found |= values.get(candidate, set())
+            return found
+
+        if op == "=":
+            return equal
+        return _negate(equal)
+
+    if op in ("~", "!~"):
+        try:
+            pattern = re.compile(raw)
+        except re.error as e:
+            raise QueryError(f"invalid regex '{raw}': {e}")
+        found = _scan(field, lambda value: isinstance(value, str) and pattern.search(value) is not None)
+        if op == "~":
+            return found
+        return _negate(found)
+
+    bound = _number(raw)
+    compare = {
+        "<": lambda value: value < bound,
+        "<=": lambda value: value <= bound,
+        ">": lambda value: value > bound,
+        ">=": lambda value: value >= bound,
+    }[op]
+    return _scan(field, lambda value: isinstance(value, (int, float))
+                 and not isinstance(value, bool) and compare(value))
+
+
+class _Quoted(str):
+    """Token with quoted or escaped characters: never a keyword or parenthesis."""
+
+
+def _words(query: str) -> List[tuple]:
+    """
+    Split a query like a POSIX shell, keeping track of quoting.
+
+    :return: (word, quoted) pairs, quoted flagging each character of word
+    """
+    words: List[tuple] = []
+    chars: List[str] = []
+    quoted: List[bool] = []
+    started = False
+    i, n = 0, len(query)
+    while i < n:
+        c = query[i]
+        if c.isspace():
+            if started:
+                words.append(("".join(chars), quoted))
+                chars, quoted, started = [], [], False
+            i += 1
+            continue
+        started = True
+        if c in "'\"":
+            end = i + 1
+            while True:
+                if end >= n:
+                    raise QueryError("No closing quotation")
+                if query[end] == c:
+                    break
+                # Inside double quotes a backslash only escapes a quote or itself.
+                if c == '"' and query[end] == "\\" and end + 1 < n and query[end + 1] in '"\\':
+                    end += 1
+                chars.append(query[end])
+                quoted.append(True)
+                end += 1
+            i = end + 1
+        elif c == "\\":
+            if i + 1 >= n:
+                raise QueryError("No escaped character")
+            chars.append(query[i + 1])
+            quoted.append(True)
+            i += 2
+        else:
+            chars.append(c)
+            quoted.append(False)
+            i += 1
+    if started:
+        words.append(("".join(chars), quoted))
+    return words
+
+
+def _tokenize(query: str) -> List[str]:
+    # Allow parentheses glued to terms, e.g. "(app-id=a or app-id=b)". Trailing
+    # parentheses only count as grouping when unbalanced, so "title~(a|b)" works,
+    # and quoted ones never do, so "title='Chat :)'" keeps its value.
+    split: List[str] = []
+    for token, quoted in _words(query):
+        first, last = 0, len(token)
+        while last - first > 1 and token[first] == "(" and not quoted[first]:
+            split.append("(")
+            first += 1
+        closing = 0
+        while (last - first > 1 and token[last - 1] == ")" and not quoted[last - 1]
+               and token.count(")", first, last) > token.count("(", first, last)):
+            closing += 1
+            last -= 1
+        split.append(_Quoted(token[first:last]) if any(quoted[first:last]) else token[first:last])
+        split.extend(")" * closing)
+    return split
+
+
+class _Parser:
+    """Recursive descent: or_expr := and_expr ('or' and_expr)*; and_expr := unary+."""
+
+    def __init__(self, tokens: List[str]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        if self.pos >= len(self.tokens):
+            return None
+        token = self.tokens[self.pos]
+        # Quoted tokens are always terms, even when they read "or", "not" or "(";
+        # callers only compare the peeked token with those words.
+        return "" if isinstance(token, _Quoted) else token
+
+    def take(self) -> str:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise QueryError("empty query")
+        node = self.or_expr()
+        if self.peek() is not None:
+            raise QueryError(f"unexpected '{self.peek()}'")
+        return node
+
+    def or_expr(self) -> Node:
+        nodes = [self.and_expr()]
+        while self.peek() == "or":
+            self.take()
+            nodes.append(self.and_expr())
+        if len(nodes) == 1:
+            return nodes[0]
+
+        def any_of(index: ViewIndex) -> Set[int]:
+            found: Set[int] = set()
+            for node in nodes:
+                found |= node(index)
+            return found
+        return any_of
+
+    def and_expr(self) -> Node:
+        nodes = [self.unary()]
+        while self.peek() not in (None, "or", ")"):
+            nodes.append(self.unary())
+        if len(nodes) == 1:
+            return nodes[0]
+        # Negated terms are subtracted from what the others matched, so they
+        # cost the size of their own matches rather than of every view.
+        included = [node for node in nodes if not hasattr(node, "negates")]
+        excluded = [node.negates for node in nodes if hasattr(node, "negates")]
+
+        def all_of(index: ViewIndex) -> Set[int]:
+            found = included[0](index) if included else index.ids
+            for node in included[1:]:
+                if not found:
+                    break
+                found &= node(index)
+            for node in excluded:
+                if not found:
+                    break
+                found = found - node(index)
+            return found
+        return all_of
+
+    def unary(self) -> Node:
+        token = self.peek()
+        if token is None:
+            raise QueryError("unexpected end of query")
+        if token == "not":
+            self.take()
+            return _negate(self.unary())
+        if token == "(":
+            self.take()
+            node = self.or_expr()
+            if self.peek() != ")":
+                raise QueryError("missing ')'")
+            self.take()
+            return node
+        if token == ")":
+            raise QueryError("unexpected ')'")
+        return compile_term(self.take())
+
+
+@lru_cache(maxsize=256)
+def compile_query(query: str) -> Node:
+    """Compile a query string into a reusable node; results are memoized."""
+    return _Parser(_tokenize(query)).parse()
+
+
+def search(views: Iterable[Dict[str, Any]], query: str, index: Optional[ViewIndex] = None) -> List[Dict[str, Any]]:
+    """
+    Return the views matching query.
+
+    :param views: View dicts, ignored when a prebuilt index is given
+    :param query: Query string, see the module docstring
+    :param index: Index to reuse across queries on the same snapshot
+    """
+    node = compile_query(query)
+    index = index or ViewIndex(views)
+    return index.select(node(index))
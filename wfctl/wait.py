@@ -0,0 +1,207 @@
+"""
+Block until the compositor reaches a state, driven by IPC events.
+
+    wait view-mapped [QUERY]     a view matching QUERY exists
+    wait view-unmapped [QUERY]   no view matches QUERY any more
+    wait focus [QUERY]           the focused view matches QUERY (any change without one)
+    wait workspace N             an output shows workspace N
+    wait EVENT [QUERY]           the next EVENT, e.g. view-geometry-changed
+
+The events are subscribed to before the current state is checked, on the
+same connection, so a change landing between the check and the first read
+is still seen. Waiting is a single blocking socket read, with no polling.
+
+`wfctl wait` exits with status 0 once the state is reached, 2 if --timeout
+passes first and 1 for a malformed query or a failed connection.
+"""
+import select
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from wfctl.search import ViewIndex, compile_query
+
+# Returned by checks and event matchers when the condition does not hold yet.
+PENDING = object()
+
+
+# Exit status of `wfctl wait` when --timeout passes, telling it apart from errors.
+TIMEOUT_STATUS = 2
+
+
+class WaitTimeout(Exception):
+    pass
+
+
+def view_predicate(query: Optional[str]) -> Callable[[Optional[Dict[str, Any]]], bool]:
+    """Compile a search query into a test for a single view; no query matches any view."""
+    if not query:
+        return lambda view: view is not None
+    node = compile_query(query)
+    return lambda view: view is not None and bool(node(ViewIndex([view])))
+
+
+def next_event(sock, deadline: Optional[float]) -> Optional[Dict[str, Any]]:
+    """Read the next event, or return None once deadline (monotonic time) has passed."""
+    if sock.pending_events:
+        return sock.pending_events.pop(0)
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        ready, _, _ = select.select([sock.client], [], [], remaining)
+        if not ready:
+            return None
+    return sock.read_message()
+
+
+class Condition:
+    """
+    What to wait for.
+
+    :param events: Event types to subscribe to
+    :param check: Called with the socket once subscribed; returns the result
+        if the condition already holds, else PENDING
+    :param match: Called with each event; returns the result or PENDING
+    """
+
+    def __init__(self, events: List[str], match: Callable[[Dict[str, Any]], Any],
+                 check: Optional[Callable[[Any], Any]] = None) -> None:
+        self.events = events
+        self.match = match
+        self.check = check
+
+
+def view_mapped(query: Optional[str]) -> Condition:
+    matches = view_predicate(query)
+
+    def check(sock):
+        return next((view for view in sock.list_views() if matches(view)), PENDING)
+
+    def match(event):
+        view = event.get("view")
+        return view if matches(view) else PENDING
+    return Condition(["view-mapped"], match, check)
+
+
+def view_unmapped(query: Optional[str]) -> Condition:
+    matches = view_predicate(query)
+    remaining = set()
+
+    def check(sock):
+        remaining.update(view["id"] for view in sock.list_views() if matches(view))
+        return PENDING if remaining else None
+
+    def match(event):
+        view = event.get("view") or {}
+        remaining.discard(view.get("id"))
+        return PENDING if remaining else view
+    return Condition(["view-unmapped"], match, check if query else None)
+
+
+def focus(query: Optional[str]) -> Condition:
+    matches = view_predicate(query)
+
+    def check(sock):
+        view = sock.get_focused_view()
+        return view if matches(view) else PENDING
+
+    def match(event):
+        view = event.get("view")
+        return view if matches(view) else PENDING
+    return Condition(["view-focused"], match, check if query else None)
+
+
+def workspace(number: int) -> Condition:
+    from wfctl.utils import workspace_to_coordinates
+
+    def target(output: Dict[str, Any]) -> Dict[str, int]:
+        return workspace_to_coordinates(number, output["workspace"]["grid_width"])
+
+    def check(sock):
+        for output in sock.list_outputs():
+            ws = output.get("workspace") or {}
+            if "grid_width" in ws and {"x": ws["x"], "y": ws["y"]} == target(output):
+                return output
+        return PENDING
+
+    def match(event):
+        output = event.get("output-data")
+        new = event.get("new-workspace") or {}
+        if output and {"x": new.get("x"), "y": new.get("y")} == target(output):
+            return output
+        return PENDING
+    return Condition(["wset-workspace-changed"], match, check)
+
+
+def any_event(name: str, query: Optional[str]) -> Condition:
+    matches = view_predicate(query)
+
+    def match(event):
+        return event if not query or matches(event.get("view")) else PENDING
+    return Condition([name], match)
+
+
+def parse_wait(args: List[str]) -> Tuple[Condition, Optional[float]]:
+    """
+    Build the condition for `wait` arguments.
+
+    :raises ValueError: For missing or malformed arguments
+    """
+    args = list(args)
+    timeout = None
+    if "--timeout" in args:
+        i = args.index("--timeout")
+        try:
+            timeout = float(args[i + 1])
+        except (IndexError, ValueError):
+            raise ValueError("--timeout requires a number of seconds")
+        del args[i:i + 2]
+    if not args:
+        raise ValueError("Usage: wfctl wait view-mapped|view-unmapped|focus|workspace|EVENT [QUERY] [--timeout SECONDS]")
+    what, query = args[0], " ".join(args[1:]) or None
+    if query:
+        # Report malformed queries before subscribing.
+        compile_query(query)
+    if what == "view-mapped":
+        return view_mapped(query), timeout
+    if what == "view-unmapped":
+        return view_unmapped(query), timeout
+    if what == "focus":
+        return focus(query), timeout
+    if what == "workspace":
+        if not query or not query.isdigit():
+            raise ValueError("Usage: wfctl wait workspace N")
+        return workspace(int(query)), timeout
+    return any_event(what, query), timeout
+
+
+def wait_for(condition: Condition, timeout: Optional[float] = None, connect: Optional[Callable] = None) -> Any:
+    """
+    Block until condition holds and return its result.
+
+    A dedicated connection is used, so events never leak into the shared one.
+
+    :param connect: Returns a new WayfireSocket, defaults to this thread's compositor
+    :raises WaitTimeout: If timeout seconds pass first
+    """
+    if connect is None:
+        from wayfire import WayfireSocket
+        from wfctl.connection import socket_path
+        connect = lambda: WayfireSocket(socket_path())
+    deadline = None if timeout is None else time.monotonic() + timeout
+    sock = connect()
+    try:
+        sock.watch(condition.events)
+        if condition.check is not None:
+            result = condition.check(sock)
+            if result is not PENDING:
+                return result
+        while True:
+            event = next_event(sock, deadline)
+            if event is None:
+                raise WaitTimeout(f"timed out after {timeout:g}s")
+            result = condition.match(event)
+            if result is not PENDING:
+                return result
+    finally:
+        sock.close()
@@ -0,0 +1,110 @@
+"""
+Workspace grid math done locally.
+
+Everything needed to navigate, the grid size, output size and current
+workspace, is part of an output's info, which handlers take from the state
+mirror or snapshot cache. Switching or moving is then a single IPC write.
+
+Workspaces are numbered from 1 in row-major order: on a 3x3 grid, 1-3 is
+the top row and 4 sits below 1.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+from wfctl.utils import workspace_to_coordinates
+
+DIRECTIONS = {
+    "left": (-1, 0),
+    "right": (1, 0),
+    "up": (0, -1),
+    "down": (0, 1),
+}
+
+
+class Grid:
+    """Workspace grid of one output, built from its output info."""
+
+    __slots__ = ("output_id", "width", "height", "columns", "rows", "x", "y")
+
+    def __init__(self, output: Dict[str, Any]) -> None:
+        workspace = output["workspace"]
+        self.output_id = output["id"]
+        self.width = output["geometry"]["width"]
+        self.height = output["geometry"]["height"]
+        self.columns = workspace["grid_width"]
+        self.rows = workspace["grid_height"]
+        self.x = workspace["x"]
+        self.y = workspace["y"]
+
+    @property
+    def size(self) -> int:
+        return self.columns * self.rows
+
+    @property
+    def number(self) -> int:
+        """Number of the current workspace."""
+        return self.number_of(self.x, self.y)
+
+    def number_of(self, x: int, y: int) -> int:
+        return y * self.columns + x + 1
+
+    def coordinates(self, number: int) -> Tuple[int, int]:
+        """
+        Coordinates of a workspace number.
+
+        :raises ValueError: If the grid has no such workspace
+        """
+        if not 1 <= number <= self.size:
+            raise ValueError(f"Workspace {number} is out of range 1-{self.size}")
+        coordinates = workspace_to_coordinates(number, self.columns)
+        return coordinates["x"], coordinates["y"]
+
+    def offset(self, steps: int) -> Tuple[int, int]:
+        """Coordinates steps workspaces away in numbering order, wrapping around."""
+        return self.coordinates((self.number - 1 + steps) % self.size + 1)
+
+    def neighbour(self, direction: str) -> Optional[Tuple[int, int]]:
+        """Adjacent workspace in a direction, or None at the edge of the grid."""
+        dx, dy = DIRECTIONS[direction]
+        x, y = self.x + dx, self.y + dy
+        if 0 <= x < self.columns and 0 <= y < self.rows:
+            return x, y
+        return None
+
+    def view_workspace(self, view: Dict[str, Any]) -> Tuple[int, int]:
+        """Workspace holding the top-left corner of a view on this output."""
+        geometry = view["geometry"]
+        return self.x + geometry["x"] // self.width, self.y + geometry["y"] // self.height
+
+
+def set_workspace_message(grid: Grid, x: int, y: int, view_id: Optional[int] = None) -> Dict[str, Any]:
+    """vswitch request switching grid's output to (x, y), taking view_id along if given."""
+    from wayfire.core.template import get_msg_template
+
+    message = get_msg_template("vswitch/set-workspace")
+    message["data"]["x"] = x
+    message["data"]["y"] = y
+    message["data"]["output-id"] = grid.output_id
+    if view_id is not None:
+        message["data"]["view-id"] = view_id
+    return message
+
+
+def move_view_message(grid: Grid, view: Dict[str, Any], x: int, y: int) -> Dict[str, Any]:
+    """
+    configure-view request moving a view to workspace (x, y) without switching to it.
+
+    grid must be that of the output the view is on; the request names it so
+    the view stays there.
+    """
+    from wfctl.aio import configure_view_message
+
+    vx, vy = grid.view_workspace(view)
+    geometry = view["geometry"]
+    return configure_view_message(
+        view["id"],
+        geometry["x"] + (x - vx) * grid.width,
+        geometry["y"] + (y - vy) * grid.height,
+        geometry["width"],
+        geometry["height"],
+        grid.output_id,
+    )